@@ -0,0 +1,291 @@
+# coding: UTF-8
+"""
+@software: PyCharm
+@author: Lionel Johnson
+@contact: https://fairy.host
+@organization: https://github.com/FairylandFuture
+@datetime: 2026-10-17 17:02:45 UTC+08:00
+
+Micro benchmarks for the logging hot paths.
+
+    python benchmarks/bench_logger.py                       # all cases, table on stdout
+    python benchmarks/bench_logger.py -k file --json out.json
+    python benchmarks/bench_logger.py --compare baseline.json
+
+Every case reports wall-clock ns per call (best and median of ``--repeat`` runs, including the final flush of
+queued and buffered writers), the average peak of traced memory allocated by a single call, and the number of
+memory blocks still allocated per call afterwards (a leak indicator).
+"""
+
+import argparse
+import contextlib
+import datetime
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import typing as t
+
+try:
+    import fairylandlogger
+except ImportError:  # Running from a source checkout without installing the package
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+    import fairylandlogger
+
+from loguru import logger as _loguru_logger
+
+from fairylandlogger import LogManager, LoggerConfigStructure, LogLevelEnum
+
+# A case is set up inside a scratch directory and returns (call, finish): ``call`` logs one record, ``finish``
+# waits until everything logged so far has been written.
+_Case = t.Callable[[str], t.Tuple[t.Callable[[], None], t.Callable[[], None]]]
+
+
+def _configure(**options) -> None:
+    LogManager.reset()
+    LogManager.configure(LoggerConfigStructure(level=LogLevelEnum.INFO, **options))
+
+
+def _flush() -> None:
+    LogManager.get_registry().flush()
+
+
+def case_filtered_debug(dirname: str):
+    _configure(console=False)
+    logger = LogManager.get_logger("bench.filtered")
+    return (lambda: logger.debug("filtered %s", 1)), _flush
+
+
+def case_console(dirname: str):
+    _configure(console=True)
+    logger = LogManager.get_logger()
+    return (lambda: logger.info("console %s", 1)), _flush
+
+
+def case_file(dirname: str):
+    _configure(console=False, file=True, dirname=dirname, rotation="1 GB")
+    logger = LogManager.get_logger()
+    return (lambda: logger.info("file %s", 1)), _flush
+
+
+def case_json(dirname: str):
+    _configure(console=False, file=True, json=True, dirname=dirname, rotation="1 GB")
+    logger = LogManager.get_logger()
+    return (lambda: logger.info("json %s", 1, request_id="r1")), _flush
+
+
+def _case_logger_files(count: int) -> _Case:
+    def case(dirname: str):
+        _configure(console=False, file=True, dirname=dirname, rotation="1 GB")
+        loggers = [LogManager.get_logger(f"bench.svc{i}") for i in range(count)]
+        state = {"next": 0}
+
+        def call():
+            index = state["next"]
+            state["next"] = (index + 1) % count
+            loggers[index].info("per-logger %s", index)
+
+        return call, _flush
+
+    return case
+
+
+def case_route_threads(threads: int) -> _Case:
+    # Contention on ``LoggerRegistry.route``: no appenders, one loguru handler that discards everything
+    def case(dirname: str):
+        _configure(console=False)
+        _loguru_logger.add(lambda message: None, format="{message}")
+        logger = LogManager.get_logger("bench.threads")
+
+        def call():
+            logger.info("threaded %s", 1)
+
+        call.threads = threads
+        return call, _flush
+
+    return case
+
+
+def case_route_threads_reconfigure(threads: int) -> _Case:
+    # As ``route_threads`` while another thread keeps publishing new routing snapshots
+    def case(dirname: str):
+        call, finish = case_route_threads(threads)(dirname)
+        stop = threading.Event()
+
+        def mutate():
+            n = 0
+            while not stop.wait(0.001):
+                n += 1
+                LogManager.set_level(f"bench.other{n % 16}", ("DEBUG", "INFO")[n % 2])
+
+        mutator = threading.Thread(target=mutate, daemon=True)
+        mutator.start()
+        call.stop = stop.set
+        return call, finish
+
+    return case
+
+
+CASES: t.Dict[str, _Case] = {
+    "filtered_debug": case_filtered_debug,
+    "console": case_console,
+    "file": case_file,
+    "json": case_json,
+    "logger_files_1": _case_logger_files(1),
+    "logger_files_100": _case_logger_files(100),
+    "logger_files_1000": _case_logger_files(1000),
+    "route_threads_1": case_route_threads(1),
+    "route_threads_4": case_route_threads(4),
+    "route_threads_8": case_route_threads(8),
+    "route_churn_8": case_route_threads_reconfigure(8),
+}
+
+
+def _run_calls(call: t.Callable[[], None], calls: int) -> None:
+    threads = getattr(call, "threads", 1)
+    if threads == 1:
+        for _ in range(calls):
+            call()
+        return
+
+    barrier = threading.Barrier(threads)
+
+    def worker():
+        barrier.wait()
+        for _ in range(calls // threads):
+            call()
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for worker_thread in workers:
+        worker_thread.start()
+    for worker_thread in workers:
+        worker_thread.join()
+
+
+def _time(call, finish, calls: int, repeat: int) -> t.List[float]:
+    samples = []
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter_ns()
+        _run_calls(call, calls)
+        finish()
+        samples.append((time.perf_counter_ns() - started) / calls)
+    return samples
+
+
+def _allocations(call, finish, samples: int) -> t.Tuple[float, float]:
+    # Average peak of traced memory per single call, then blocks left allocated per call
+    tracemalloc.start()
+    peaks = []
+    for _ in range(samples):
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        call()
+        peaks.append(tracemalloc.get_traced_memory()[1] - current)
+    finish()
+    tracemalloc.stop()
+
+    gc.collect()
+    blocks = sys.getallocatedblocks()
+    for _ in range(samples):
+        call()
+    finish()
+    gc.collect()
+    return statistics.fmean(peaks), (sys.getallocatedblocks() - blocks) / samples
+
+
+@contextlib.contextmanager
+def _quiet_stdout():
+    stdout = sys.stdout
+    with open(os.devnull, "w") as devnull:
+        sys.stdout = devnull
+        try:
+            yield
+        finally:
+            sys.stdout = stdout
+
+
+def run_case(name: str, calls: int, repeat: int, alloc_samples: int) -> t.Dict[str, t.Any]:
+    with tempfile.TemporaryDirectory() as dirname, _quiet_stdout():
+        call, finish = CASES[name](dirname)
+        _run_calls(call, min(calls, 1000))  # Warm up caches, open files, start writer threads
+        finish()
+        samples = _time(call, finish, calls, repeat)
+        peak_bytes, retained_blocks = _allocations(call, finish, alloc_samples)
+        getattr(call, "stop", lambda: None)()  # Background threads of the case
+        LogManager.reset()
+
+    return {
+        "name": name,
+        "calls": calls,
+        "threads": getattr(call, "threads", 1),
+        "ns_per_call": min(samples),
+        "ns_per_call_median": statistics.median(samples),
+        "peak_bytes_per_call": peak_bytes,
+        "retained_blocks_per_call": retained_blocks,
+    }
+
+
+def compare(results: t.List[t.Dict[str, t.Any]], baseline: t.Dict[str, t.Any]) -> None:
+    previous = {result["name"]: result for result in baseline["results"]}
+    print(f"\nCompared with {baseline['meta'].get('version')} ({baseline['meta'].get('timestamp')}):")
+    for result in results:
+        before = previous.get(result["name"])
+        if before is None:
+            continue
+        change = (result["ns_per_call"] - before["ns_per_call"]) / before["ns_per_call"] * 100
+        print(f"  {result['name']:<20} {before['ns_per_call']:>12.0f} -> {result['ns_per_call']:>10.0f} ns/call  {change:+7.1f}%")
+
+
+def main(argv: t.Optional[t.Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="fairylandlogger micro benchmarks")
+    parser.add_argument("-k", "--filter", default="", help="only run cases whose name contains this text")
+    parser.add_argument("-n", "--calls", type=int, default=20000, help="calls per timed run")
+    parser.add_argument("-r", "--repeat", type=int, default=5, help="timed runs per case")
+    parser.add_argument("--alloc-samples", type=int, default=200, help="single calls traced for allocations")
+    parser.add_argument("--json", dest="json_path", help="write machine-readable results to this file")
+    parser.add_argument("--compare", help="results file of an earlier run to compare ns/call with")
+    args = parser.parse_args(argv)
+
+    results = []
+    print(f"{'case':<20} {'ns/call':>10} {'median':>10} {'peak B/call':>12} {'blocks/call':>12}")
+    for name in CASES:
+        if args.filter not in name:
+            continue
+        result = run_case(name, args.calls, args.repeat, args.alloc_samples)
+        results.append(result)
+        print(
+            f"{name:<20} {result['ns_per_call']:>10.0f} {result['ns_per_call_median']:>10.0f} "
+            f"{result['peak_bytes_per_call']:>12.0f} {result['retained_blocks_per_call']:>12.2f}"
+        )
+
+    document = {
+        "meta": {
+            "version": fairylandlogger.__version__,
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "gil": getattr(sys, "_is_gil_enabled", lambda: True)(),  # False on a free-threaded build
+            "platform": platform.platform(),
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "calls": args.calls,
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    if args.json_path:
+        with open(args.json_path, "w", encoding="UTF-8") as stream:
+            json.dump(document, stream, indent=2)
+    if args.compare:
+        with open(args.compare, encoding="UTF-8") as stream:
+            compare(results, json.load(stream))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,152 @@
+# coding: UTF-8
+"""
+@software: PyCharm
+@author: Lionel Johnson
+@contact: https://fairy.host
+@organization: https://github.com/FairylandFuture
+@datetime: 2026-10-17 21:26:05 UTC+08:00
+
+Import and first-logger startup benchmarks; every sample runs in a fresh interpreter.
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py -r 30 --json startup.json
+    python benchmarks/bench_startup.py --compare baseline.json
+
+Each case reports the time the measured statement took inside the child (best and median of ``--repeat`` runs)
+and the wall-clock time of the whole process, so interpreter startup is visible as the ``python`` case.
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import typing as t
+
+_SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+# Statements timed in the child; ``setup`` runs first and is not timed
+CASES: t.Dict[str, t.Dict[str, str]] = {
+    "python": {"statement": "pass"},
+    "import": {"statement": "import fairylandlogger"},
+    "import_log_manager": {"statement": "from fairylandlogger import LogManager"},
+    "first_log": {
+        "statement": "from fairylandlogger import LogManager\nLogManager.get_logger('bench').info('started')",
+    },
+    "first_log_yaml": {
+        "statement": "from fairylandlogger import LogManager\nLogManager.get_logger('bench').info('started')",
+        "config": "fairyland:\n  logger:\n    level: INFO\n    console: true\n    banner: false\n",
+    },
+    "reconfigure_x10": {
+        "setup": "from fairylandlogger import LogManager, LoggerConfigStructure\nLogManager.get_logger('bench')",
+        "statement": "for _ in range(10):\n    LogManager.configure(LoggerConfigStructure())",
+    },
+    "cli_query": {
+        "setup": "from fairylandlogger.__main__ import main",
+        "statement": "main(['query', 'missing.log'])",
+    },
+}
+
+_CHILD = """
+import sys, time
+sys.path.insert(0, {src!r})
+exec(compile({setup!r}, "<setup>", "exec"))
+started = time.perf_counter_ns()
+exec(compile({statement!r}, "<statement>", "exec"))
+elapsed = time.perf_counter_ns() - started
+sys.stdout.flush()
+sys.stderr.write("\\nelapsed_ns=%d\\n" % elapsed)
+"""
+
+
+def _sample(case: t.Dict[str, str], cwd: str) -> t.Tuple[float, float]:
+    # (in-child ns of the statement, wall-clock ns of the process)
+    code = _CHILD.format(src=_SRC, setup=case.get("setup", ""), statement=case["statement"])
+    started = time.perf_counter_ns()
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=cwd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=True,
+    )
+    wall = time.perf_counter_ns() - started
+    elapsed = int(result.stderr.rsplit("elapsed_ns=", 1)[1])
+    return elapsed, wall
+
+
+def run_case(name: str, repeat: int) -> t.Dict[str, t.Any]:
+    case = CASES[name]
+    samples, walls = [], []
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as cwd:
+            if "config" in case:
+                with open(os.path.join(cwd, "fairyland-logger.yaml"), "w", encoding="UTF-8") as stream:
+                    stream.write(case["config"])
+            elapsed, wall = _sample(case, cwd)
+        samples.append(elapsed)
+        walls.append(wall)
+
+    return {
+        "name": name,
+        "repeat": repeat,
+        "ms": min(samples) / 1e6,
+        "ms_median": statistics.median(samples) / 1e6,
+        "process_ms": min(walls) / 1e6,
+    }
+
+
+def compare(results: t.List[t.Dict[str, t.Any]], baseline: t.Dict[str, t.Any]) -> None:
+    previous = {result["name"]: result for result in baseline["results"]}
+    print(f"\nCompared with {baseline['meta'].get('version')} ({baseline['meta'].get('timestamp')}):")
+    for result in results:
+        before = previous.get(result["name"])
+        if before is None or not before["ms"]:
+            continue
+        change = (result["ms"] - before["ms"]) / before["ms"] * 100
+        print(f"  {result['name']:<20} {before['ms']:>10.2f} -> {result['ms']:>8.2f} ms  {change:+7.1f}%")
+
+
+def main(argv: t.Optional[t.Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="fairylandlogger startup benchmarks")
+    parser.add_argument("-k", "--filter", default="", help="only run cases whose name contains this text")
+    parser.add_argument("-r", "--repeat", type=int, default=15, help="fresh interpreters per case")
+    parser.add_argument("--json", dest="json_path", help="write machine-readable results to this file")
+    parser.add_argument("--compare", help="results file of an earlier run to compare with")
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, _SRC)
+    import fairylandlogger
+
+    results = []
+    print(f"{'case':<20} {'ms':>10} {'median':>10} {'process ms':>12}")
+    for name in CASES:
+        if args.filter not in name:
+            continue
+        result = run_case(name, args.repeat)
+        results.append(result)
+        print(f"{name:<20} {result['ms']:>10.2f} {result['ms_median']:>10.2f} {result['process_ms']:>12.2f}")
+
+    document = {
+        "meta": {
+            "version": fairylandlogger.__version__,
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    if args.json_path:
+        with open(args.json_path, "w", encoding="UTF-8") as stream:
+            json.dump(document, stream, indent=2)
+    if args.compare:
+        with open(args.compare, encoding="UTF-8") as stream:
+            compare(results, json.load(stream))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -34,16 +34,40 @@ __banner__ = rf"""
 #########################################################################################
 """
 
-from ._enums import LogLevelEnum, EncodingEnum
-from ._structure import LoggerConfigStructure
-from .logger import LogManager, Logger
+import typing as _t
+
+from ._enums import LogLevelEnum, EncodingEnum, QueuePolicyEnum, CompressionEnum, ConsoleStreamEnum, NetworkProtocolEnum, NetworkFormatEnum
+from ._structure import LoggerConfigStructure, LoggerTracebackStructure
+from ._messages import Lazy
+
+if _t.TYPE_CHECKING:
+    from .logger import LogManager, Logger, AsyncLogger
+
+
+def __getattr__(name: str):
+    # The loggers pull in loguru; import them on first use so tools that only read log files start fast
+    if name in ("LogManager", "Logger", "AsyncLogger"):
+        from . import logger
+
+        value = globals()[name] = getattr(logger, name)
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = [
     "LogLevelEnum",
     "EncodingEnum",
+    "QueuePolicyEnum",
+    "CompressionEnum",
+    "ConsoleStreamEnum",
+    "NetworkProtocolEnum",
+    "NetworkFormatEnum",
 
     "LoggerConfigStructure",
+    "LoggerTracebackStructure",
+    "Lazy",
 
     "LogManager",
     "Logger",
+    "AsyncLogger",
 ]
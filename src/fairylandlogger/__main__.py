@@ -0,0 +1,99 @@
+# coding: UTF-8
+"""
+@software: PyCharm
+@author: Lionel Johnson
+@contact: https://fairy.host
+@organization: https://github.com/FairylandFuture
+@datetime: 2026-10-17 19:48:30 UTC+08:00
+"""
+
+import argparse
+import datetime
+import json
+import re
+import sys
+import time
+import typing as t
+
+from ._binary import iter_records, render_pattern, to_json_document
+from ._enums import _LOG_LEVEL_SEVERITY
+from ._index import open_log, query
+
+_RELATIVE_TIME = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([smhdw])\s*$")
+_RELATIVE_UNITS: t.Dict[str, int] = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 7 * 86400}
+
+
+def _decode(args: argparse.Namespace) -> int:
+    from ._structure import _DEFAULT_LOG_PATTERN
+
+    pattern = args.pattern or _DEFAULT_LOG_PATTERN
+    out = sys.stdout
+    for path in args.files:
+        with open_log(path) as stream:
+            for record in iter_records(stream):
+                if args.format == "json":
+                    out.write(json.dumps(to_json_document(record), default=str, ensure_ascii=False, separators=(",", ":")))
+                else:
+                    out.write(render_pattern(pattern, record))
+                out.write("\n")
+    return 0
+
+
+def parse_time(value: str) -> float:
+    # ISO 8601 date/time (local time unless an offset is given), or an age like "15m", "2h", "1d"
+    match = _RELATIVE_TIME.match(value)
+    if match:
+        return time.time() - float(match.group(1)) * _RELATIVE_UNITS[match.group(2)]
+    try:
+        return datetime.datetime.fromisoformat(value.strip()).timestamp()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid time: {value!r}, expected ISO 8601 or an age like 15m/2h/1d")
+
+
+def _query(args: argparse.Namespace) -> int:
+    out = sys.stdout
+    for path in args.files:
+        for text in query(path, args.since, args.until, args.level, args.logger, args.pattern):
+            out.write(text)
+            out.write("\n")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="fairylandlogger", description="Fairyland Logger tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    decode = commands.add_parser("decode", help="turn binary (.flb) log files back into text or JSON lines")
+    decode.add_argument("files", nargs="+", help="binary log files, optionally gzip/bz2/lzma compressed")
+    decode.add_argument("--format", choices=("text", "json"), default="text")
+    decode.add_argument("--pattern", help="text pattern, defaults to the standard file pattern")
+    decode.set_defaults(handler=_decode)
+
+    query_command = commands.add_parser(
+        "query",
+        help="print the records of log files (and their rotated segments) matching time, level and logger filters",
+    )
+    query_command.add_argument("files", nargs="+", help="active log files; text, JSON and binary files are recognised")
+    query_command.add_argument("--since", type=parse_time, help="ISO 8601 time or an age like 15m/2h/1d")
+    query_command.add_argument("--until", type=parse_time, help="ISO 8601 time or an age like 15m/2h/1d")
+    query_command.add_argument("--level", type=str.upper, choices=list(_LOG_LEVEL_SEVERITY), help="minimum level")
+    query_command.add_argument("--logger", help="logger name; records of its child loggers match too")
+    query_command.add_argument("--pattern", help="text pattern the files were written with, defaults to the standard one")
+    query_command.set_defaults(handler=_query)
+
+    return parser
+
+
+def main(argv: t.Optional[t.Sequence[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        return args.handler(args)
+    except BrokenPipeError:  # e.g. piped into ``head``
+        return 0
+    except (OSError, ValueError) as error:
+        print(f"fairylandlogger: {error}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,32 +8,108 @@
 """
 
 import abc
+import datetime
+import os
+import sys
+import threading
+import time
+import traceback
 import typing as t
 from pathlib import Path
 
 from loguru import logger as _loguru_logger
 
-from fairylandlogger import __banner__
-from ._enums import LogLevelEnum, EncodingEnum
+import fairylandlogger
+from ._enums import LogLevelEnum, EncodingEnum, QueuePolicyEnum, CompressionEnum, ConsoleStreamEnum, NetworkProtocolEnum, NetworkFormatEnum, _LOG_LEVEL_SEVERITY
+from ._binary import BinaryRecordSerializer
+from ._context import resolve_pattern
+from ._recorder import _LEVEL_NAMES, RingBufferSink, exception_hooks, format_records
+from ._network import NetworkSink
+from ._serializers import JSONRecordSerializer, SyslogRecordSerializer
+from ._sinks import _URGENT_LEVEL_NO, ConsoleSink, QueuedSink, RotatingFileSink, SerializingSink, parse_size
+from ._structure import _DEFAULT_LOG_PATTERN, LoggerTracebackStructure
+from ._tracebacks import EXCEPTION_KEY, TracebackRenderer
+
+
+HANDLER_LEVEL = "TRACE"  # Handlers accept every level, ``AbstractLoggerAppender.accepts`` applies the current one
+
+
+def report_queue_recovery(summary: str) -> None:
+    _loguru_logger.bind(logger_name="fairylandlogger").warning(summary)
 
 
 class AbstractLoggerAppender(abc.ABC):
+    handler_id: t.Optional[int] = None  # loguru handler added by ``add_sink``
+    severity: int = 0  # Checked by the handler filter, so the level can change without re-adding the handler
 
     @abc.abstractmethod
     def add_sink(self): ...
 
+    def accepts(self, record: t.Dict[str, t.Any]) -> bool:
+        return record["level"].no >= self.severity
+
+    def _use_pattern(self, pattern: str, tracebacks: t.Optional[LoggerTracebackStructure]) -> None:
+        # Format pair of ``_format``; exceptions of ``Logger.exception()`` come from the appender's renderer
+        self._renderer = TracebackRenderer(tracebacks)
+        self._line_pattern, self._exception_pattern = self._renderer.patterns(pattern)
+
+    def _pattern(self, record: t.Dict[str, t.Any]) -> str:
+        return self._exception_pattern if EXCEPTION_KEY in record["extra"] else self._line_pattern
+
+    def _format(self, record: t.Dict[str, t.Any]) -> str:
+        return resolve_pattern(self._pattern(record), record["extra"])
+
+    def remove(self):
+        # loguru stops the sink when its handler is removed: queues are drained and files closed
+        if self.handler_id is not None:
+            _loguru_logger.remove(self.handler_id)
+            self.handler_id = None
+
+    def flush(self):
+        # Write out anything the appender keeps buffered; no-op for unbuffered appenders
+        pass
+
+    def stats(self) -> t.Dict[str, t.Any]:
+        return {}
+
 
 class ConsoleLoggerAppender(AbstractLoggerAppender):
+    """
+    Writes records to stdout or stderr through a batched ``ConsoleSink``.
+
+    ``colorize`` and ``flush_interval`` default to what suits the stream: colors and per-record writes on a
+    terminal, plain text flushed every 0.2 seconds (WARNING and above at once) when it is a pipe or a file.
+    """
+
     _DEFAULT_PATTERN = (
         "<green>{time:YYYY-MM-DD HH:mm:ss.SSS}</green> | "
         "<level>{level: <8}</level> | "
         "<cyan>{name}</cyan>:<cyan>{line}</cyan> - "
         "<level>{message}</level>"
     )
+    _PIPE_FLUSH_INTERVAL = 0.2
 
-    def __init__(self, level: t.Union[str, LogLevelEnum] = LogLevelEnum.INFO, pattern: t.Optional[str] = None):
-        self._level = level
+    _banner_printed: bool = False  # The banner is printed once per process, not on every configure
+
+    def __init__(
+            self,
+            level: t.Union[str, LogLevelEnum] = LogLevelEnum.INFO,
+            pattern: t.Optional[str] = None,
+            banner: bool = True,
+            stream: t.Union[str, ConsoleStreamEnum] = ConsoleStreamEnum.STDOUT,
+            colorize: t.Optional[bool] = None,
+            flush_interval: t.Optional[float] = None,
+            tracebacks: t.Optional[LoggerTracebackStructure] = None,
+    ):
+        self.level = level
         self.pattern = pattern or self._DEFAULT_PATTERN
+        self.banner = banner
+        self.stream = ConsoleStreamEnum(stream).value
+        self.colorize = colorize
+        self.flush_interval = flush_interval
+        self.tracebacks = tracebacks or LoggerTracebackStructure()
+        self._sink: t.Optional[ConsoleSink] = None
+        self._main_formats: t.Dict[t.Tuple[str, bool], str] = {}
 
     @property
     def level(self):
@@ -42,23 +118,55 @@ class ConsoleLoggerAppender(AbstractLoggerAppender):
     @level.setter
     def level(self, value: t.Union[str, LogLevelEnum]):
         self._level = value
+        self.severity = _LOG_LEVEL_SEVERITY[self.level.upper()]
 
     def add_sink(self):
-        print(__banner__)
-
-        def formatter(record):
-            if record["name"] == "__main__" and record["file"]:
-                record["name"] = Path(record["file"].name).stem
-            fmt = self.pattern
-            return fmt if fmt.endswith("\n") else fmt + "\n"
-
-        _loguru_logger.add(
-            sink=lambda x: print(x, end=""),
-            level=self.level,
-            format=formatter,
-            colorize=True,
+        stream = getattr(sys, self.stream)
+        if self.banner and not ConsoleLoggerAppender._banner_printed:
+            ConsoleLoggerAppender._banner_printed = True
+            print(fairylandlogger.__banner__, file=stream)
+
+        try:
+            interactive = stream.isatty()
+        except (AttributeError, ValueError):
+            interactive = False
+        colorize = interactive if self.colorize is None else self.colorize
+        flush_interval = self.flush_interval
+        if flush_interval is None:
+            flush_interval = 0.0 if interactive else self._PIPE_FLUSH_INTERVAL
+
+        self._use_pattern(self.pattern, self.tracebacks)
+        self._sink = ConsoleSink(self.stream, flush_interval)
+        self.handler_id = _loguru_logger.add(
+            sink=self._sink,
+            level=HANDLER_LEVEL,
+            filter=self.accepts,
+            format=self._format,
+            colorize=colorize,
+            backtrace=self.tracebacks.backtrace,
+            diagnose=self.tracebacks.diagnose,
         )
 
+    def _format(self, record: t.Dict[str, t.Any]) -> str:
+        line_pattern = self._pattern(record)
+        # Records of the main script show its file stem instead of "__main__", without modifying the record
+        if record["name"] == "__main__" and record["file"]:
+            key = (record["file"].path, line_pattern is self._exception_pattern)
+            main_pattern = self._main_formats.get(key)
+            if main_pattern is None:
+                stem = Path(key[0]).stem.replace("{", "{{").replace("}", "}}").replace("<", "\\<")
+                main_pattern = self._main_formats[key] = line_pattern.replace("{name}", stem)
+            line_pattern = main_pattern
+        return resolve_pattern(line_pattern, record["extra"])
+
+    def flush(self):
+        if self._sink is not None:
+            self._sink.drain()
+
+    def stats(self) -> t.Dict[str, t.Any]:
+        sink = self._sink
+        return {"bytes_written": sink.bytes_written, "latency": sink.latency.snapshot()} if sink is not None else {}
+
 
 class FileLoggerAppender(AbstractLoggerAppender):
 
@@ -70,13 +178,33 @@ class FileLoggerAppender(AbstractLoggerAppender):
             rotation: str = "5 MB",
             encoding: t.Union[str, EncodingEnum] = EncodingEnum.UTF8,
             pattern: t.Optional[str] = None,
+            buffer_size: t.Union[str, int] = 0,
+            flush_records: int = 0,
+            flush_interval: float = 0.0,
+            fsync: bool = False,
+            queue_size: int = 0,
+            queue_policy: t.Union[str, QueuePolicyEnum] = QueuePolicyEnum.BLOCK,
+            compression: t.Optional[t.Union[str, CompressionEnum]] = None,
+            index: bool = False,
+            tracebacks: t.Optional[LoggerTracebackStructure] = None,
     ):
         self.path = path
-        self._level = level
+        self.level = level
         self.rotation = rotation
         self.retention = retention
         self._encoding = encoding
         self.pattern = pattern
+        self.buffer_size = buffer_size
+        self.flush_records = flush_records
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.queue_size = queue_size
+        self.queue_policy = queue_policy
+        self.compression = compression
+        self.index = index
+        self.tracebacks = tracebacks or LoggerTracebackStructure()
+        self._sink: t.Optional[RotatingFileSink] = None
+        self._queue: t.Optional[QueuedSink] = None
 
     @property
     def level(self):
@@ -85,6 +213,7 @@ class FileLoggerAppender(AbstractLoggerAppender):
     @level.setter
     def level(self, value: t.Union[str, LogLevelEnum]):
         self._level = value
+        self.severity = _LOG_LEVEL_SEVERITY[self.level.upper()]
 
     @property
     def encoding(self):
@@ -95,18 +224,36 @@ class FileLoggerAppender(AbstractLoggerAppender):
         self._encoding = value
 
     def add_sink(self):
-        _loguru_logger.add(
-            sink=self.path,
+        self._sink = RotatingFileSink(
+            path=self.path,
             rotation=self.rotation,
             retention=self.retention,
             encoding=self.encoding,
-            level=self.level,
-            format=self.pattern,
-            enqueue=True,
-            backtrace=True,
-            diagnose=True,
+            buffer_size=self.buffer_size,
+            flush_records=self.flush_records,
+            flush_interval=self.flush_interval,
+            fsync=self.fsync,
+            compression=self.compression,
+            index=self.index,
+        )
+        self._queue = QueuedSink(self._sink, self.queue_size, self.queue_policy, report_queue_recovery)
+        self._use_pattern(self.pattern or _DEFAULT_LOG_PATTERN, self.tracebacks)
+        self.handler_id = _loguru_logger.add(
+            sink=self._queue,
+            level=HANDLER_LEVEL,
+            filter=self.accepts,
+            format=self._format,
+            backtrace=self.tracebacks.backtrace,
+            diagnose=self.tracebacks.diagnose,
         )
 
+    def flush(self):
+        if self._queue is not None:
+            self._queue.drain()
+
+    def stats(self) -> t.Dict[str, t.Any]:
+        return self._queue.stats() if self._queue is not None else {}
+
 
 class JSONLoggerAppender(AbstractLoggerAppender):
 
@@ -118,13 +265,35 @@ class JSONLoggerAppender(AbstractLoggerAppender):
             rotation: str = "5 MB",
             encoding: t.Union[str, EncodingEnum] = EncodingEnum.UTF8,
             pattern: t.Optional[str] = None,
+            fields: t.Optional[t.Sequence[str]] = None,
+            buffer_size: t.Union[str, int] = 0,
+            flush_records: int = 0,
+            flush_interval: float = 0.0,
+            fsync: bool = False,
+            queue_size: int = 0,
+            queue_policy: t.Union[str, QueuePolicyEnum] = QueuePolicyEnum.BLOCK,
+            compression: t.Optional[t.Union[str, CompressionEnum]] = None,
+            index: bool = False,
+            tracebacks: t.Optional[LoggerTracebackStructure] = None,
     ):
         self.path = path
-        self._level = level
+        self.level = level
         self.rotation = rotation
         self.retention = retention
         self._encoding = encoding
         self.__pattern = pattern  # Ignore this parameter in JSON mode
+        self.fields = fields
+        self.buffer_size = buffer_size
+        self.flush_records = flush_records
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.queue_size = queue_size
+        self.queue_policy = queue_policy
+        self.compression = compression
+        self.index = index
+        self.tracebacks = tracebacks or LoggerTracebackStructure()
+        self._sink: t.Optional[SerializingSink] = None
+        self._queue: t.Optional[QueuedSink] = None
 
     @property
     def level(self):
@@ -133,6 +302,7 @@ class JSONLoggerAppender(AbstractLoggerAppender):
     @level.setter
     def level(self, value: t.Union[str, LogLevelEnum]):
         self._level = value
+        self.severity = _LOG_LEVEL_SEVERITY[self.level.upper()]
 
     @property
     def encoding(self):
@@ -143,14 +313,240 @@ class JSONLoggerAppender(AbstractLoggerAppender):
         self._encoding = value
 
     def add_sink(self):
-        _loguru_logger.add(
-            sink=self.path,
+        target = RotatingFileSink(
+            path=self.path,
             rotation=self.rotation,
             retention=self.retention,
             encoding=self.encoding,
-            level=self.level,
-            enqueue=True,
-            backtrace=True,
-            diagnose=True,
-            serialize=True,
+            buffer_size=self.buffer_size,
+            flush_records=self.flush_records,
+            flush_interval=self.flush_interval,
+            fsync=self.fsync,
+            compression=self.compression,
+            index=self.index,
+        )
+        self._sink = SerializingSink(target, JSONRecordSerializer(self.fields, self.encoding))
+        # Empty pattern: the text pattern is never rendered, the message only carries the formatted exception
+        self._queue = QueuedSink(self._sink, self.queue_size, self.queue_policy, report_queue_recovery, name=str(self.path))
+        self._use_pattern("", self.tracebacks)
+        self.handler_id = _loguru_logger.add(
+            sink=self._queue,
+            level=HANDLER_LEVEL,
+            filter=self.accepts,
+            format=self._format,
+            backtrace=self.tracebacks.backtrace,
+            diagnose=self.tracebacks.diagnose,
+        )
+
+    def flush(self):
+        if self._queue is not None:
+            self._queue.drain()
+
+    def stats(self) -> t.Dict[str, t.Any]:
+        return self._queue.stats() if self._queue is not None else {}
+
+
+class BinaryLoggerAppender(FileLoggerAppender):
+    """
+    File appender writing the binary format of ``BinaryRecordSerializer`` instead of text lines; decode it with
+    ``fairylandlogger decode``. The text ``pattern`` is only used by the decoder.
+    """
+
+    def add_sink(self):
+        serializer = BinaryRecordSerializer()
+        target = RotatingFileSink(
+            path=self.path,
+            rotation=self.rotation,
+            retention=self.retention,
+            encoding=self.encoding,
+            buffer_size=self.buffer_size,
+            flush_records=self.flush_records,
+            flush_interval=self.flush_interval,
+            fsync=self.fsync,
+            compression=self.compression,
+            index=self.index,
+            header=serializer.file_header,
+        )
+        self._sink = SerializingSink(target, serializer)
+        self._queue = QueuedSink(self._sink, self.queue_size, self.queue_policy, report_queue_recovery, name=str(self.path))
+        self._use_pattern("", self.tracebacks)
+        self.handler_id = _loguru_logger.add(
+            sink=self._queue,
+            level=HANDLER_LEVEL,
+            filter=self.accepts,
+            format=self._format,
+            backtrace=self.tracebacks.backtrace,
+            diagnose=self.tracebacks.diagnose,
         )
+
+
+class NetworkLoggerAppender(AbstractLoggerAppender):
+    """
+    Ships records to a log receiver over TCP or UDP, as newline-delimited JSON or RFC 5424 syslog (octet-counted
+    over TCP). Records are batched and sent by a background thread; while the receiver is down they are kept in
+    ``spill_path`` (at most ``spill_size``) and sent once it is reachable again.
+    """
+
+    def __init__(
+            self,
+            host: str,
+            port: int,
+            level: t.Union[str, LogLevelEnum] = LogLevelEnum.INFO,
+            protocol: t.Union[str, NetworkProtocolEnum] = NetworkProtocolEnum.TCP,
+            wire_format: t.Union[str, NetworkFormatEnum] = NetworkFormatEnum.JSON,
+            fields: t.Optional[t.Sequence[str]] = None,
+            app_name: str = "",
+            batch_size: t.Union[str, int] = "64 KB",
+            flush_interval: float = 1.0,
+            spill_path: t.Optional[t.Union[str, Path]] = None,
+            spill_size: t.Union[str, int] = "16 MB",
+            tracebacks: t.Optional[LoggerTracebackStructure] = None,
+    ):
+        self.host = host
+        self.port = port
+        self.level = level
+        self.protocol = NetworkProtocolEnum(protocol)
+        self.wire_format = NetworkFormatEnum(wire_format)
+        self.fields = fields
+        self.app_name = app_name
+        self.batch_size = parse_size(batch_size) if isinstance(batch_size, str) else batch_size
+        self.flush_interval = flush_interval
+        self.spill_path = spill_path
+        self.spill_size = parse_size(spill_size) if isinstance(spill_size, str) else spill_size
+        self.tracebacks = tracebacks or LoggerTracebackStructure()
+        self._sink: t.Optional[SerializingSink] = None
+
+    @property
+    def level(self):
+        return self._level.value if isinstance(self._level, LogLevelEnum) else self._level
+
+    @level.setter
+    def level(self, value: t.Union[str, LogLevelEnum]):
+        self._level = value
+        self.severity = _LOG_LEVEL_SEVERITY[self.level.upper()]
+
+    def add_sink(self):
+        if self.wire_format is NetworkFormatEnum.JSON:
+            serializer = JSONRecordSerializer(self.fields)
+        else:
+            framing = "octet" if self.protocol is NetworkProtocolEnum.TCP else "none"
+            serializer = SyslogRecordSerializer(self.app_name, framing=framing)
+        target = NetworkSink(
+            host=self.host,
+            port=self.port,
+            protocol=self.protocol.value,
+            batch_size=self.batch_size,
+            flush_interval=self.flush_interval,
+            spill_path=str(self.spill_path) if self.spill_path else None,
+            spill_size=self.spill_size,
+            truncate=self.wire_format is NetworkFormatEnum.SYSLOG,  # A cut syslog message is still a message
+        )
+        # No queue in front: ``write_bytes`` only appends to the pending batch of the sender thread
+        self._sink = SerializingSink(target, serializer)
+        self._use_pattern("", self.tracebacks)
+        self.handler_id = _loguru_logger.add(
+            sink=self._sink,
+            level=HANDLER_LEVEL,
+            filter=self.accepts,
+            format=self._format,
+            backtrace=self.tracebacks.backtrace,
+            diagnose=self.tracebacks.diagnose,
+        )
+
+    def flush(self):
+        if self._sink is not None:
+            self._sink.drain()
+
+    def stats(self) -> t.Dict[str, t.Any]:
+        return self._sink.target.stats() if self._sink is not None else {}
+
+
+class FlightRecorderAppender(AbstractLoggerAppender):
+    """
+    Keeps the most recent records of every level at or above ``level`` in a memory-mapped ring buffer instead of
+    writing them out, including records below the configured log level.
+
+    The last ``dump_records`` records (0 for the whole ring) are written to ``<stem>-<timestamp>.dump.log`` on an
+    ERROR/CRITICAL record (at most once per ``dump_cooldown`` seconds), on an unhandled exception and on
+    ``dump()``. Not a loguru handler: ``LoggerRegistry.route`` feeds it directly.
+    """
+
+    def __init__(
+            self,
+            path: t.Union[str, Path],
+            level: t.Union[str, LogLevelEnum] = LogLevelEnum.TRACE,
+            slots: int = 4096,
+            slot_size: int = 512,
+            dump_records: int = 0,
+            dump_cooldown: float = 5.0,
+    ):
+        self.path = str(path)
+        self._level = level
+        self.severity = _LOG_LEVEL_SEVERITY[self.level]
+        self.slots = slots
+        self.slot_size = slot_size
+        self.dump_records = dump_records
+        self.dump_cooldown = dump_cooldown
+        self.dumps: int = 0
+        self._dumped_at: float = float("-inf")
+        self._dump_lock = threading.Lock()
+        self._sink: t.Optional[RingBufferSink] = None
+        self._pid = os.getpid()
+
+    @property
+    def level(self):
+        return self._level.value if isinstance(self._level, LogLevelEnum) else self._level.upper()
+
+    def add_sink(self):
+        self._sink = RingBufferSink(self.path, self.slots, self.slot_size)
+        exception_hooks.add(self._on_unhandled)
+
+    def record(self, level_no: int, message: str, timestamp: float) -> None:
+        sink = self._sink
+        if sink is None:
+            return
+        try:
+            sink.write(level_no, message, timestamp)
+        except ValueError:  # Closed by a concurrent reconfigure
+            return
+        if level_no >= _URGENT_LEVEL_NO and time.monotonic() - self._dumped_at >= self.dump_cooldown:
+            self.dump(_LEVEL_NAMES.get(level_no, "ERROR") + " record")
+
+    def dump(self, reason: str = "requested") -> t.Optional[str]:
+        sink = self._sink
+        if sink is None:
+            return None
+
+        with self._dump_lock:
+            self._dumped_at = time.monotonic()
+            records = sink.records(self.dump_records)
+            stamp = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S_%f")
+            path = f"{os.path.splitext(self.path)[0]}-{stamp}.dump.log"
+            with open(path, "w", encoding="UTF-8") as stream:
+                stream.write(f"# Flight recorder dump ({reason}): last {len(records)} records\n")
+                stream.writelines(format_records(records))
+            self.dumps += 1
+        return path
+
+    def _on_unhandled(self, error: BaseException) -> None:
+        if os.getpid() != self._pid:  # Inherited through fork, the ring belongs to the parent
+            return
+        sink = self._sink
+        if sink is None:
+            return
+        text = "".join(traceback.format_exception(type(error), error, error.__traceback__)).rstrip()
+        sink.write(_LOG_LEVEL_SEVERITY["CRITICAL"], f"Unhandled exception: {text}", time.time())
+        self.dump("unhandled exception")
+
+    def remove(self):
+        self.stop()
+
+    def stop(self):
+        exception_hooks.remove(self._on_unhandled)
+        sink, self._sink = self._sink, None
+        if sink is not None:
+            sink.close()
+
+    def stats(self) -> t.Dict[str, t.Any]:
+        sink = self._sink
+        return {"records": sink.written if sink is not None else 0, "slots": self.slots, "dumps": self.dumps}
@@ -0,0 +1,390 @@
+# coding: UTF-8
+"""
+@software: PyCharm
+@author: Lionel Johnson
+@contact: https://fairy.host
+@organization: https://github.com/FairylandFuture
+@datetime: 2026-10-17 19:04:18 UTC+08:00
+"""
+
+import datetime
+import re
+import string
+import struct
+import threading
+import typing as t
+
+from ._context import resolve_pattern
+from ._enums import _LOG_LEVEL_SEVERITY
+from ._messages import render_message, strip_logger_prefix
+from ._tracebacks import EXCEPTION_KEY
+
+# File layout: MAGIC, then frames of ``u8 type, u32 payload length, payload``. Every segment starts with a RESET
+# frame and DEFINE frames for the whole string table, so rotated files decode on their own.
+MAGIC = b"FLB\x01"
+FRAME_DEFINE = 1  # u16 id, UTF-8 string
+FRAME_RESET = 2  # forget every definition
+FRAME_RECORD = 3
+
+TEMPLATE_KEY = "fairy_template"  # extra set by the registry: (message template, args) for binary appenders
+_INTERNAL_EXTRA = frozenset(("logger_name", TEMPLATE_KEY, EXCEPTION_KEY))
+
+_FRAME = struct.Struct("<BI")
+_ID = struct.Struct("<H")
+_LEN = struct.Struct("<I")
+_COUNT = struct.Struct("<H")
+# timestamp (us), utc offset (minutes), level number, string ids of the logger name, module name, file path,
+# function, "<process id>:<process name>" and "<thread id>:<thread name>", then the line number
+_RECORD_HEAD = struct.Struct("<qhBHHHHHHI")
+_INT = struct.Struct("<q")
+_FLOAT = struct.Struct("<d")
+_INLINE = 0xFFFF  # String reference followed by an inline string instead of a table id
+
+_MESSAGE_INLINE = 0
+_MESSAGE_TEMPLATE = 1
+
+_NONE, _TRUE, _FALSE, _INTEGER, _FLOATING, _STRING = range(6)
+_LEVEL_NAMES: t.Dict[int, str] = {severity: name for name, severity in _LOG_LEVEL_SEVERITY.items()}
+
+
+class BinaryRecordSerializer:
+    """
+    Encode a loguru record as one length-prefixed binary frame.
+
+    Timestamps and levels are integers; logger, module, file, function, process and thread names, message templates
+    and extra keys are interned in a string table of at most ``max_strings`` entries (inline once it is full).
+    Messages logged with arguments keep their template and primitive arguments, others are stored rendered.
+    ``file_header`` gives what a new or reopened segment must start with; pass it as ``RotatingFileSink(header=...)``.
+    """
+
+    def __init__(self, max_strings: int = _INLINE):
+        self.max_strings = min(max_strings, _INLINE)
+        self._strings: t.Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def file_header(self, fresh: bool) -> bytes:
+        with self._lock:
+            strings = list(self._strings.items())
+        chunks = [MAGIC] if fresh else []
+        chunks.append(_FRAME.pack(FRAME_RESET, 0))
+        for value, index in strings:
+            chunks.append(self._define(index, value))
+        return b"".join(chunks)
+
+    @staticmethod
+    def _define(index: int, value: str) -> bytes:
+        data = value.encode("utf-8", "replace")
+        return _FRAME.pack(FRAME_DEFINE, _ID.size + len(data)) + _ID.pack(index) + data
+
+    def _ref(self, value: str, definitions: t.List[bytes]) -> int:
+        index = self._strings.get(value)
+        if index is None:
+            with self._lock:
+                if len(self._strings) >= self.max_strings:
+                    return _INLINE
+                index = self._strings.setdefault(value, len(self._strings))
+            definitions.append(self._define(index, value))
+        return index
+
+    def _string(self, value: str, out: bytearray, definitions: t.List[bytes]) -> None:
+        index = self._ref(value, definitions)
+        out += _ID.pack(index)
+        if index == _INLINE:
+            _pack_str(value, out)
+
+    def __call__(self, record: t.Dict[str, t.Any], exception: str = "") -> bytes:
+        definitions: t.List[bytes] = []
+        extra = record["extra"]
+        moment = record["time"]
+        offset = moment.utcoffset()
+        process, thread = record["process"], record["thread"]
+
+        names = (
+            extra.get("logger_name", ""), record["name"] or "", record["file"].path, record["function"],
+            f"{process.id}:{process.name}", f"{thread.id}:{thread.name}",
+        )
+        fields = [(self._ref(name, definitions), name) for name in names]
+        out = bytearray(_RECORD_HEAD.pack(
+            round(moment.timestamp() * 1_000_000),
+            int(offset.total_seconds() // 60) if offset is not None else 0,
+            record["level"].no,
+            *(index for index, _ in fields),
+            record["line"],
+        ))
+        for index, value in fields:
+            if index == _INLINE:
+                _pack_str(value, out)
+
+        template = extra.get(TEMPLATE_KEY)
+        if template is not None and len(template[1]) < 256 and all(_is_primitive(arg) for arg in template[1]):
+            out.append(_MESSAGE_TEMPLATE)
+            self._string(template[0], out, definitions)
+            out.append(len(template[1]))
+            for arg in template[1]:
+                _pack_value(arg, out)
+        else:
+            out.append(_MESSAGE_INLINE)
+            _pack_str(strip_logger_prefix(record["message"], names[0]), out)
+
+        items = [(key, value) for key, value in extra.items() if key not in _INTERNAL_EXTRA][:0xFFFF]
+        out += _COUNT.pack(len(items))
+        for key, value in items:
+            self._string(str(key), out, definitions)
+            _pack_value(value if _is_primitive(value) else str(value), out)
+
+        _pack_str(exception, out)
+
+        frame = _FRAME.pack(FRAME_RECORD, len(out)) + out
+        return b"".join(definitions) + frame if definitions else frame
+
+
+def _is_primitive(value: t.Any) -> bool:
+    return value is None or type(value) in (bool, int, float, str)
+
+
+def _pack_str(value: str, out: bytearray) -> None:
+    data = value.encode("utf-8", "replace")
+    out += _LEN.pack(len(data))
+    out += data
+
+
+def _pack_value(value: t.Any, out: bytearray) -> None:
+    if value is None:
+        out.append(_NONE)
+    elif value is True:
+        out.append(_TRUE)
+    elif value is False:
+        out.append(_FALSE)
+    elif type(value) is int and -2 ** 63 <= value < 2 ** 63:
+        out.append(_INTEGER)
+        out += _INT.pack(value)
+    elif type(value) is float:
+        out.append(_FLOATING)
+        out += _FLOAT.pack(value)
+    else:
+        out.append(_STRING)
+        _pack_str(str(value), out)
+
+
+class _Field:
+    """
+    Stand-in for loguru's record attributes (level, process, thread, file): formats as its main value.
+    """
+
+    __slots__ = ("value", "name", "id", "path", "no")
+
+    def __init__(self, value: t.Any, **attributes):
+        self.value = value
+        self.name = attributes.get("name")
+        self.id = attributes.get("id")
+        self.path = attributes.get("path")
+        self.no = attributes.get("no")
+
+    def __format__(self, spec: str) -> str:
+        return format(self.value, spec)
+
+    def __str__(self) -> str:
+        return str(self.value)
+
+
+class _Reader:
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self.position = 0
+
+    def unpack(self, layout: struct.Struct) -> t.Tuple[t.Any, ...]:
+        values = layout.unpack_from(self.data, self.position)
+        self.position += layout.size
+        return values
+
+    def byte(self) -> int:
+        value = self.data[self.position]
+        self.position += 1
+        return value
+
+    def text(self) -> str:
+        (size,) = self.unpack(_LEN)
+        value = self.data[self.position:self.position + size].decode("utf-8", "replace")
+        self.position += size
+        return value
+
+    def value(self) -> t.Any:
+        tag = self.byte()
+        if tag == _NONE:
+            return None
+        if tag == _TRUE:
+            return True
+        if tag == _FALSE:
+            return False
+        if tag == _INTEGER:
+            return self.unpack(_INT)[0]
+        if tag == _FLOATING:
+            return self.unpack(_FLOAT)[0]
+        return self.text()
+
+
+def iter_records(stream: t.BinaryIO, chunk_size: int = 1024 * 1024) -> t.Iterator[t.Dict[str, t.Any]]:
+    """
+    Decode a binary log file into loguru-like record dicts, streaming ``chunk_size`` bytes at a time.
+    """
+    if stream.read(len(MAGIC)) != MAGIC:
+        raise ValueError("Not a fairylandlogger binary log file")
+
+    strings: t.Dict[int, str] = {}
+    pending = b""
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        data = pending + chunk
+        position = 0
+        while position + _FRAME.size <= len(data):
+            kind, size = _FRAME.unpack_from(data, position)
+            end = position + _FRAME.size + size
+            if end > len(data):
+                break
+            payload = data[position + _FRAME.size:end]
+            position = end
+
+            if kind == FRAME_DEFINE:
+                strings[_ID.unpack_from(payload)[0]] = payload[_ID.size:].decode("utf-8", "replace")
+            elif kind == FRAME_RESET:
+                strings.clear()
+            elif kind == FRAME_RECORD:
+                yield _decode_record(_Reader(payload), strings, render_message)
+        pending = data[position:]
+
+
+def _decode_record(reader: _Reader, strings: t.Dict[int, str], render: t.Callable[..., str]) -> t.Dict[str, t.Any]:
+    head = reader.unpack(_RECORD_HEAD)
+    micros, offset, level_no = head[:3]
+    names = [strings.get(index, "") if index != _INLINE else None for index in head[3:9]]
+    names = [reader.text() if name is None else name for name in names]
+    logger_name, module, path, function, process, thread = names
+    line = head[9]
+    process_id, _, process_name = process.partition(":")
+    thread_id, _, thread_name = thread.partition(":")
+
+    kind = reader.byte()
+    if kind == _MESSAGE_TEMPLATE:
+        (index,) = reader.unpack(_ID)
+        template = reader.text() if index == _INLINE else strings.get(index, "")
+        args = tuple(reader.value() for _ in range(reader.byte()))
+        message = render(template, args)
+    else:
+        message = strip_logger_prefix(reader.text(), logger_name)  # Files written before messages were stored bare
+    if logger_name:
+        message = f"[{logger_name}] {message}"  # Decoded records render like the text log
+
+    extra = {}
+    for _ in range(reader.unpack(_COUNT)[0]):
+        (index,) = reader.unpack(_ID)
+        key = reader.text() if index == _INLINE else strings.get(index, "")
+        extra[key] = reader.value()
+    exception = reader.text()
+
+    tz = datetime.timezone(datetime.timedelta(minutes=offset))
+    moment = datetime.datetime.fromtimestamp(micros / 1_000_000, tz)
+    level = _LEVEL_NAMES.get(level_no, str(level_no))
+    file_name = path.replace("\\", "/").rsplit("/", 1)[-1]
+    return {
+        "time": moment,
+        "level": _Field(level, name=level, no=level_no),
+        "logger": logger_name,
+        "name": module,
+        "module": file_name.rsplit(".", 1)[0],
+        "file": _Field(file_name, name=file_name, path=path),
+        "function": function,
+        "line": line,
+        "message": message,
+        "process": _Field(int(process_id or 0), id=int(process_id or 0), name=process_name),
+        "thread": _Field(int(thread_id or 0), id=int(thread_id or 0), name=thread_name),
+        "extra": {"logger_name": logger_name, **extra},
+        "exception": exception,
+    }
+
+
+# loguru time tokens -> strftime (fractions of a second are handled separately)
+_TIME_TOKENS = re.compile(r"\[(.*?)\]|YYYY|YY|MMMM|MMM|MM|M|DDDD|DDD|DD|D|dddd|ddd|HH|H|hh|h|mm|m|ss|s|S+|A|ZZ|Z|zz|X|x")
+_STRFTIME = {
+    "YYYY": "%Y", "YY": "%y", "MMMM": "%B", "MMM": "%b", "MM": "%m", "DDDD": "%j", "DD": "%d", "dddd": "%A",
+    "ddd": "%a", "HH": "%H", "hh": "%I", "mm": "%M", "ss": "%S", "A": "%p", "zz": "%Z",
+}
+
+
+def format_time(moment: datetime.datetime, spec: str) -> str:
+    if not spec:
+        return moment.isoformat()
+
+    def replace(match: "re.Match[str]") -> str:
+        token = match.group(0)
+        if match.group(1) is not None:
+            return match.group(1)
+        if token in _STRFTIME:
+            return moment.strftime(_STRFTIME[token])
+        if token[0] == "S":
+            return f"{moment.microsecond:06d}"[:len(token)].ljust(len(token), "0")
+        if token == "M":
+            return str(moment.month)
+        if token == "D":
+            return str(moment.day)
+        if token == "DDD":
+            return str(moment.timetuple().tm_yday)
+        if token == "H":
+            return str(moment.hour)
+        if token == "h":
+            return str(moment.hour % 12 or 12)
+        if token == "m":
+            return str(moment.minute)
+        if token == "s":
+            return str(moment.second)
+        if token in ("Z", "ZZ"):
+            offset = moment.strftime("%z")
+            return offset[:3] + ":" + offset[3:] if token == "Z" else offset
+        if token == "X":
+            return str(int(moment.timestamp()))
+        return str(int(moment.timestamp() * 1_000_000))
+
+    return _TIME_TOKENS.sub(replace, spec)
+
+
+class _PatternFormatter(string.Formatter):
+
+    def format_field(self, value: t.Any, format_spec: str) -> str:
+        if isinstance(value, datetime.datetime):
+            return format_time(value, format_spec)
+        return format(value, format_spec)
+
+
+_formatter = _PatternFormatter()
+_MARKUP = re.compile(r"</?[a-zA-Z_ ,]*>")
+
+
+def render_pattern(pattern: str, record: t.Dict[str, t.Any]) -> str:
+    # Text line of ``record`` in a loguru-style ``pattern`` (color markup is dropped), exception appended
+    line = _formatter.vformat(_MARKUP.sub("", resolve_pattern(pattern, record["extra"])), (), record)
+    if record["exception"]:
+        line += "\n" + record["exception"]
+    return line
+
+
+def to_json_document(record: t.Dict[str, t.Any]) -> t.Dict[str, t.Any]:
+    # Same flat layout as ``JSONRecordSerializer`` with its default fields
+    document = {
+        "time": record["time"].isoformat(timespec="milliseconds"),
+        "level": record["level"].name,
+        "logger": record["logger"],
+        "name": record["name"],
+        "function": record["function"],
+        "line": record["line"],
+        "message": strip_logger_prefix(record["message"], record["logger"]),
+        "process": record["process"].id,
+        "thread": record["thread"].id,
+    }
+    if record["exception"]:
+        document["exception"] = record["exception"]
+    for key, value in record["extra"].items():
+        if key != "logger_name" and key not in document:
+            document[key] = value
+    return document
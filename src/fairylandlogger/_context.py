@@ -0,0 +1,62 @@
+# coding: UTF-8
+"""
+@software: PyCharm
+@author: Lionel Johnson
+@contact: https://fairy.host
+@organization: https://github.com/FairylandFuture
+@datetime: 2026-10-17 23:48:15 UTC+08:00
+"""
+
+import contextlib
+import contextvars
+import functools
+import re
+import typing as t
+
+# Fields of the innermost ``LogManager.context`` scope; a new dict per scope, never mutated
+_scope: "contextvars.ContextVar[t.Dict[str, t.Any]]" = contextvars.ContextVar("fairylandlogger_context", default={})
+
+# ``{extra[name]}`` fields of a loguru pattern, with an optional conversion and format spec
+_PATTERN_EXTRA = re.compile(r"\{extra\[([^\]]+)\](?:![rsa])?(?::([^{}]*))?\}")
+
+
+current_context = _scope.get  # Fields of the scope active in the calling context
+
+
+@contextlib.contextmanager
+def context_scope(**fields: t.Any) -> t.Iterator[t.Dict[str, t.Any]]:
+    # Nested scopes add to the fields of the enclosing one; asyncio tasks inherit the scope they were created in
+    token = _scope.set({**_scope.get(), **fields})
+    try:
+        yield _scope.get()
+    finally:
+        _scope.reset(token)
+
+
+def resolve_pattern(pattern: str, extra: t.Dict[str, t.Any]) -> str:
+    # ``pattern`` with the ``{extra[...]}`` fields the record lacks rendered empty, so formatting cannot fail;
+    # done per handler, the extras of records logged elsewhere through loguru are left alone
+    names = _extra_names(pattern)
+    if not names:
+        return pattern
+    missing = tuple(name for name in names if name not in extra)
+    return _blank_extras(pattern, missing) if missing else pattern
+
+
+@functools.lru_cache(maxsize=256)
+def _extra_names(pattern: str) -> t.Tuple[str, ...]:
+    return tuple(dict.fromkeys(match.group(1) for match in _PATTERN_EXTRA.finditer(pattern)))
+
+
+@functools.lru_cache(maxsize=256)
+def _blank_extras(pattern: str, missing: t.Tuple[str, ...]) -> str:
+    def blank(match: "re.Match[str]") -> str:
+        if match.group(1) not in missing:
+            return match.group(0)
+        try:
+            text = format("", match.group(2) or "")  # Keeps the padding of e.g. ``{extra[user]: <8}``
+        except ValueError:
+            text = ""
+        return text.replace("{", "{{").replace("}", "}}").replace("<", "\\<")
+
+    return _PATTERN_EXTRA.sub(blank, pattern)
@@ -0,0 +1,138 @@
+# coding: UTF-8
+"""
+@software: PyCharm
+@author: Lionel Johnson
+@contact: https://fairy.host
+@organization: https://github.com/FairylandFuture
+@datetime: 2026-10-17 13:20:41 UTC+08:00
+"""
+
+import atexit
+import os
+import queue
+import sys
+import threading
+import typing as t
+import weakref
+
+from ._structure import LoggerRecordStructure
+
+
+class LoggerDispatcher:
+    """
+    Background writer for records emitted by ``AsyncLogger``.
+
+    ``submit`` only enqueues; rendering, loguru handlers and sinks all run on the dispatcher thread. The thread is
+    shared by every ``AsyncLogger`` and stops once the last open one is closed; a later record starts it again.
+    """
+
+    _instance: t.Optional["LoggerDispatcher"] = None
+    _lock: threading.Lock = threading.Lock()
+
+    def __init__(self):
+        # Records, ``threading.Event`` markers set once everything before them is written, None to stop the thread
+        self._queue: "queue.Queue[t.Any]" = queue.Queue()
+        self._thread: t.Optional[threading.Thread] = None
+        self._users: "weakref.WeakSet[t.Any]" = weakref.WeakSet()  # Loggers not closed yet
+
+    @classmethod
+    def get_instance(cls) -> "LoggerDispatcher":
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+                    atexit.register(cls._instance.close, 5.0)
+        return cls._instance
+
+    def attach(self, user: t.Any) -> None:
+        self._users.add(user)
+
+    def detach(self, user: t.Any) -> bool:
+        # True once no open logger uses the dispatcher any more
+        with self._lock:
+            self._users.discard(user)
+            return not self._users
+
+    def submit(self, registry: t.Any, record: LoggerRecordStructure, sink: t.Any = None) -> None:
+        self._put((registry, record, sink))
+
+    def _put(self, item: t.Any) -> None:
+        # Enqueue before looking at the thread: a stopping thread either sees the item or has already let go of
+        # ``_thread``, so nothing is left behind without a thread to write it
+        self._queue.put(item)
+        if self._thread is None:
+            self._start()
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._start_unlocked()
+
+    def _run(self, previous: t.Optional[threading.Thread] = None) -> None:
+        if previous is not None:
+            previous.join()  # Records keep their order: nothing is written until the stopping thread is gone
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    break
+                if isinstance(item, threading.Event):
+                    item.set()
+                    continue
+                registry, record, sink = item
+                registry.route(record, sink)
+            except Exception as error:
+                print(f"fairylandlogger: failed to dispatch record: {error!r}", file=sys.stderr)
+        # Records submitted while stopping go to a new thread, which waits for this one to finish
+        with self._lock:
+            if self._thread is threading.current_thread():
+                self._thread = None
+            if not self._queue.empty():
+                self._start_unlocked(threading.current_thread())
+
+    def _start_unlocked(self, previous: t.Optional[threading.Thread] = None) -> None:
+        self._thread = threading.Thread(target=self._run, args=(previous,), name="fairylandlogger-dispatcher", daemon=True)
+        self._thread.start()
+
+    def join(self, timeout: t.Optional[float] = None) -> bool:
+        # Waits for the records submitted before the call only, so a steady stream of new ones cannot hold it up
+        if self._thread is None and self._queue.empty():
+            return True
+        marker = threading.Event()
+        self._put(marker)
+        return marker.wait(timeout)
+
+    def close(self, timeout: t.Optional[float] = None) -> None:
+        thread = self._thread
+        if thread is not None:
+            self._queue.put(None)
+            thread.join(timeout)
+
+    async def flush(self) -> None:
+        import asyncio  # Already loaded inside a coroutine; kept out of ``import fairylandlogger``
+
+        await asyncio.to_thread(self.join)
+
+    async def aclose(self, user: t.Any) -> None:
+        import asyncio
+
+        # Records of every logger are flushed; the thread only stops when ``user`` was the last open logger
+        if self.detach(user):
+            await asyncio.to_thread(self.close)
+        else:
+            await self.flush()
+
+    def _after_fork_in_child(self) -> None:
+        # The dispatcher thread does not survive a fork; records queued by the parent are the parent's
+        self._queue = queue.Queue()
+        self._thread = None
+
+
+def _after_fork_in_child() -> None:
+    LoggerDispatcher._lock = threading.Lock()
+    if LoggerDispatcher._instance is not None:
+        LoggerDispatcher._instance._after_fork_in_child()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
@@ -17,6 +17,34 @@ class EncodingEnum(str, Enum):
     GB18030 = "GB18030"
 
 
+class QueuePolicyEnum(str, Enum):
+    BLOCK = "block"
+    DROP_NEWEST = "drop_newest"
+    DROP_OLDEST = "drop_oldest"
+    DROP_BELOW_LEVEL = "drop_below_level"
+
+
+class CompressionEnum(str, Enum):
+    GZIP = "gzip"
+    BZ2 = "bz2"
+    LZMA = "lzma"
+
+
+class ConsoleStreamEnum(str, Enum):
+    STDOUT = "stdout"
+    STDERR = "stderr"
+
+
+class NetworkProtocolEnum(str, Enum):
+    TCP = "tcp"
+    UDP = "udp"
+
+
+class NetworkFormatEnum(str, Enum):
+    JSON = "json"
+    SYSLOG = "syslog"
+
+
 class LogLevelEnum(str, Enum):
     TRACE = "TRACE"
     DEBUG = "DEBUG"
@@ -25,3 +53,19 @@ class LogLevelEnum(str, Enum):
     WARNING = "WARNING"
     ERROR = "ERROR"
     CRITICAL = "CRITICAL"
+
+    @property
+    def severity(self) -> int:
+        return _LOG_LEVEL_SEVERITY[self.value]
+
+
+# Integer severities, aligned with loguru's level numbers so they can be compared with ``record["level"].no``.
+_LOG_LEVEL_SEVERITY = {
+    LogLevelEnum.TRACE.value: 5,
+    LogLevelEnum.DEBUG.value: 10,
+    LogLevelEnum.INFO.value: 20,
+    LogLevelEnum.SUCCESS.value: 25,
+    LogLevelEnum.WARNING.value: 30,
+    LogLevelEnum.ERROR.value: 40,
+    LogLevelEnum.CRITICAL.value: 50,
+}
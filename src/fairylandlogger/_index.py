@@ -0,0 +1,321 @@
+# coding: UTF-8
+"""
+@software: PyCharm
+@author: Lionel Johnson
+@contact: https://fairy.host
+@organization: https://github.com/FairylandFuture
+@datetime: 2026-10-17 20:37:12 UTC+08:00
+"""
+
+import bisect
+import datetime
+import glob
+import importlib
+import json
+import os
+import re
+import string
+import struct
+import typing as t
+
+from ._enums import _LOG_LEVEL_SEVERITY
+
+INDEX_SUFFIX = ".idx"
+_CODECS: t.Dict[str, str] = {".gz": "gzip", ".bz2": "bz2", ".xz": "lzma"}
+COMPRESSED_SUFFIXES: t.Tuple[str, ...] = tuple(_CODECS)
+
+_LEVELS: t.Tuple[int, ...] = tuple(sorted(_LOG_LEVEL_SEVERITY.values()))
+# One entry per block of consecutive records: offset, length, lowest and highest timestamp, records per level
+_ENTRY = struct.Struct(f"<QQdd{len(_LEVELS)}I")
+
+
+def index_path(segment: str) -> str:
+    for suffix in COMPRESSED_SUFFIXES:
+        if segment.endswith(suffix):
+            segment = segment[:-len(suffix)]
+            break
+    return segment + INDEX_SUFFIX
+
+
+class IndexBlock:
+    __slots__ = ("offset", "length", "since", "until", "counts")
+
+    def __init__(self, offset: int, length: int = 0, since: float = float("inf"), until: float = float("-inf"), counts=None):
+        self.offset = offset
+        self.length = length
+        self.since = since
+        self.until = until
+        self.counts: t.List[int] = list(counts) if counts is not None else [0] * len(_LEVELS)
+
+    def pack(self) -> bytes:
+        return _ENTRY.pack(self.offset, self.length, self.since, self.until, *self.counts)
+
+    def matches(self, since: t.Optional[float], until: t.Optional[float], min_level: int) -> bool:
+        if since is not None and self.until < since:
+            return False
+        if until is not None and self.since > until:
+            return False
+        return any(count for level_no, count in zip(_LEVELS, self.counts) if level_no >= min_level)
+
+
+class SegmentIndex:
+    """
+    Sparse sidecar index of one log segment (``<segment>.idx``).
+
+    Records are grouped into blocks of about ``block_size`` bytes; a block's entry (byte range, time range and
+    per-level counts) is appended once the block is full or the segment is closed. Records after the last entry
+    are not indexed yet and are scanned by the reader.
+    """
+
+    def __init__(self, segment: str, block_size: int = 16 * 1024):
+        self.segment = segment
+        self.block_size = block_size
+        self._stream: t.Optional[t.BinaryIO] = None
+        self._block: t.Optional[IndexBlock] = None
+
+    def open(self) -> None:
+        self._stream = open(index_path(self.segment), "ab")
+
+    def add(self, offset: int, length: int, timestamp: float, level_no: int) -> None:
+        block = self._block
+        if block is None:
+            block = self._block = IndexBlock(offset)
+        block.length = offset + length - block.offset
+        if timestamp:
+            block.since = min(block.since, timestamp)
+            block.until = max(block.until, timestamp)
+        # Custom level numbers count towards the closest standard level below them
+        block.counts[max(bisect.bisect_right(_LEVELS, level_no) - 1, 0)] += 1
+        if block.length >= self.block_size:
+            self._close_block()
+
+    def _close_block(self) -> None:
+        if self._block is not None and self._stream is not None:
+            self._stream.write(self._block.pack())
+            self._stream.flush()
+        self._block = None
+
+    def close(self) -> None:
+        self._close_block()
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+
+
+def read_index(segment: str) -> t.List[IndexBlock]:
+    try:
+        with open(index_path(segment), "rb") as stream:
+            data = stream.read()
+    except OSError:
+        return []
+    usable = len(data) - len(data) % _ENTRY.size  # A torn last entry is ignored
+    return [IndexBlock(*values[:4], counts=values[4:]) for values in _ENTRY.iter_unpack(data[:usable])]
+
+
+def segments_of(path: str) -> t.List[str]:
+    # Rotated segments of ``path`` (plain or compressed, oldest first), then ``path`` itself
+    root, suffix = os.path.splitext(path)
+    pattern = f"{glob.escape(root)}.[0-9][0-9][0-9][0-9]-*{glob.escape(suffix)}"
+    rotated = glob.glob(pattern)
+    for extension in COMPRESSED_SUFFIXES:
+        rotated.extend(glob.glob(pattern + extension))
+    rotated.sort(key=lambda p: os.path.basename(p))
+    return rotated + ([path] if os.path.exists(path) else [])
+
+
+# loguru time tokens -> strptime directives, for reading the timestamp back from text lines
+_TIME_TOKENS = re.compile(r"\[(.*?)\]|YYYY|MM|DD|HH|mm|ss|S+|ZZ|Z|.", re.DOTALL)
+_STRPTIME = {"YYYY": "%Y", "MM": "%m", "DD": "%d", "HH": "%H", "mm": "%M", "ss": "%S", "ZZ": "%z", "Z": "%z"}
+
+
+def _strptime_format(spec: str) -> t.Optional[str]:
+    parts = []
+    for match in _TIME_TOKENS.finditer(spec):
+        token = match.group(0)
+        if match.group(1) is not None:
+            parts.append(match.group(1).replace("%", "%%"))
+        elif token in _STRPTIME:
+            parts.append(_STRPTIME[token])
+        elif token[0] == "S" and token.strip("S") == "":
+            parts.append("%f")
+        elif token.isalpha():
+            return None  # Token without a strptime equivalent, fall back to the index time
+        else:
+            parts.append(token.replace("%", "%%"))
+    return "".join(parts)
+
+
+class TextRecordParser:
+    """
+    Splits text lines written with a loguru ``pattern`` back into records: a line matching the pattern starts a
+    record, other lines (tracebacks) continue it. Only time, level and message are extracted.
+    """
+
+    def __init__(self, pattern: str):
+        regex, self.time_format = [], None
+        for literal, field, spec, _ in string.Formatter().parse(re.sub(r"</?[a-zA-Z_ ,]*>", "", pattern)):
+            regex.append(re.escape(literal))
+            if field is None:
+                continue
+            if field == "time" and "time" not in "".join(regex):
+                self.time_format = _strptime_format(spec or "")
+                regex.append(r"(?P<time>.+?)")
+            elif field == "level" and "?P<level>" not in "".join(regex):
+                regex.append(r"(?P<level>[A-Z]+)\s*")
+            elif field == "message" and "?P<message>" not in "".join(regex):
+                regex.append(r"(?P<message>.*)")
+            else:
+                regex.append(r".*?")
+        self.regex = re.compile("^" + "".join(regex) + "$")
+
+    def parse(self, lines: t.Iterable[str]) -> t.Iterator[t.Dict[str, t.Any]]:
+        record: t.Optional[t.Dict[str, t.Any]] = None
+        for line in lines:
+            line = line.rstrip("\n")
+            match = self.regex.match(line)
+            if match is None:
+                if record is not None:
+                    record["text"] += "\n" + line
+                continue
+            if record is not None:
+                yield record
+            groups = match.groupdict()
+            record = {
+                "text": line,
+                "time": self._timestamp(groups.get("time")),
+                "level": groups.get("level"),
+                "logger": _logger_of(groups.get("message") or ""),
+            }
+        if record is not None:
+            yield record
+
+    def _timestamp(self, text: t.Optional[str]) -> t.Optional[float]:
+        if not text or not self.time_format:
+            return None
+        try:
+            return datetime.datetime.strptime(text, self.time_format).timestamp()
+        except ValueError:
+            return None
+
+
+def _logger_of(message: str) -> str:
+    # Messages are routed as "[<logger name>] <text>"
+    if message.startswith("["):
+        end = message.find("] ")
+        if end > 0:
+            return message[1:end]
+    return ""
+
+
+def _parse_json(lines: t.Iterable[str]) -> t.Iterator[t.Dict[str, t.Any]]:
+    for line in lines:
+        line = line.rstrip("\n")
+        try:
+            document = json.loads(line)
+        except ValueError:
+            continue
+        moment = document.get("time")
+        try:
+            timestamp = document["timestamp"] if "timestamp" in document else datetime.datetime.fromisoformat(moment).timestamp()
+        except (TypeError, ValueError):
+            timestamp = None
+        yield {"text": line, "time": timestamp, "level": document.get("level"), "logger": document.get("logger", "")}
+
+
+def open_log(path: str) -> t.BinaryIO:
+    # Rotated segments may have been compressed
+    for suffix, codec in _CODECS.items():
+        if path.endswith(suffix):
+            return importlib.import_module(codec).open(path, "rb")
+    return open(path, "rb")
+
+
+def _segment_kind(stream: t.BinaryIO) -> str:
+    from ._binary import MAGIC
+
+    head = stream.read(len(MAGIC))
+    stream.seek(0)
+    if head == MAGIC:
+        return "binary"
+    return "json" if head[:1] == b"{" else "text"
+
+
+def _byte_ranges(
+        segment: str,
+        since: t.Optional[float],
+        until: t.Optional[float],
+        min_level: int,
+        compressed: bool,
+) -> t.Optional[t.List[t.Tuple[int, t.Optional[int]]]]:
+    # (offset, length or None for "to the end") ranges worth reading, None when nothing in the segment can match
+    blocks = read_index(segment)
+    if not blocks:
+        return [(0, None)]
+    ranges = [(block.offset, block.length) for block in blocks if block.matches(since, until, min_level)]
+    # Compressed segments were rotated, so their index is complete; the active one may have an unindexed tail
+    tail = blocks[-1].offset + blocks[-1].length
+    if not compressed and tail < os.path.getsize(segment):
+        ranges.append((tail, None))
+    if not ranges:
+        return None
+    if blocks[0].offset > 0:  # Header, or content written before indexing was enabled
+        ranges.insert(0, (0, blocks[0].offset))
+    return ranges
+
+
+def _read_ranges(stream: t.BinaryIO, ranges: t.List[t.Tuple[int, t.Optional[int]]], encoding: str) -> t.Iterator[str]:
+    for offset, length in ranges:
+        stream.seek(offset)
+        data = stream.read() if length is None else stream.read(length)
+        yield from data.decode(encoding, "replace").splitlines()
+
+
+def query(
+        path: str,
+        since: t.Optional[float] = None,
+        until: t.Optional[float] = None,
+        level: t.Optional[str] = None,
+        logger: t.Optional[str] = None,
+        pattern: t.Optional[str] = None,
+        encoding: str = "UTF-8",
+) -> t.Iterator[str]:
+    """
+    Stream the records of the log file ``path`` and its rotated segments that fall in ``[since, until]`` (epoch
+    seconds), have at least ``level`` and come from ``logger`` (or a logger below it), as text.
+
+    Segments with a sidecar index are only read at the byte ranges whose blocks can match; text, JSON and binary
+    files are recognised by their content.
+    """
+    from ._binary import iter_records, render_pattern
+    from ._structure import _DEFAULT_LOG_PATTERN
+
+    pattern = pattern or _DEFAULT_LOG_PATTERN
+    min_level = _LOG_LEVEL_SEVERITY[level.upper()] if level else 0
+    parser = TextRecordParser(pattern)
+
+    def wanted(timestamp: t.Optional[float], level_name: t.Optional[str], logger_name: str) -> bool:
+        if timestamp is not None and ((since is not None and timestamp < since) or (until is not None and timestamp > until)):
+            return False
+        if min_level and _LOG_LEVEL_SEVERITY.get((level_name or "").upper(), 0) < min_level:
+            return False
+        return not logger or logger_name == logger or logger_name.startswith(logger + ".")
+
+    for segment in segments_of(path):
+        ranges = _byte_ranges(segment, since, until, min_level, segment.endswith(COMPRESSED_SUFFIXES))
+        if ranges is None:
+            continue
+
+        with open_log(segment) as stream:
+            kind = _segment_kind(stream)
+            if kind == "binary":
+                # Interned strings are defined along the way, so binary segments are decoded from the start
+                for record in iter_records(stream):
+                    if wanted(record["time"].timestamp(), record["level"].name, record["logger"]):
+                        yield render_pattern(pattern, record)
+                continue
+
+            lines = _read_ranges(stream, ranges, encoding)
+            records = _parse_json(lines) if kind == "json" else parser.parse(lines)
+            for record in records:
+                if wanted(record["time"], record["level"], record["logger"]):
+                    yield record["text"]
@@ -0,0 +1,200 @@
+# coding: UTF-8
+"""
+@software: PyCharm
+@author: Lionel Johnson
+@contact: https://fairy.host
+@organization: https://github.com/FairylandFuture
+@datetime: 2026-10-17 15:36:52 UTC+08:00
+"""
+
+import os
+import re
+import sys
+import threading
+import time
+import typing as t
+
+_RATE_PATTERN = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*/\s*(s|sec|second|m|min|minute|h|hour)\s*$", re.IGNORECASE)
+_RATE_PERIODS: t.Dict[str, float] = {"s": 1, "sec": 1, "second": 1, "m": 60, "min": 60, "minute": 60, "h": 3600, "hour": 3600}
+
+
+def parse_rate(value: str) -> t.Tuple[float, float]:
+    # "100/s" -> (records per second, burst); the burst is the count allowed per period
+    match = _RATE_PATTERN.match(value)
+    if not match:
+        raise ValueError(f"Invalid rate limit: {value!r}, expected e.g. '100/s', '600/m'")
+    count = float(match.group(1))
+    return count / _RATE_PERIODS[match.group(2).lower()], count
+
+
+class TokenBucket:
+    __slots__ = ("rate", "burst", "tokens", "updated", "suppressed", "_lock")
+
+    def __init__(self, rate: float, burst: t.Optional[float] = None):
+        self.rate = rate
+        self.burst = max(burst if burst is not None else rate, 1.0)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.suppressed = 0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> t.Optional[int]:
+        # None when rate limited, otherwise how many calls were suppressed since the last admitted one
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens < 1:
+                self.suppressed += 1
+                return None
+            self.tokens -= 1
+            suppressed, self.suppressed = self.suppressed, 0
+            return suppressed
+
+    def take_suppressed(self, quiet_for: float = 0.0) -> int:
+        # Suppressed calls not reported yet, once no call came for ``quiet_for`` seconds; they count as reported
+        with self._lock:
+            if not self.suppressed or time.monotonic() - self.updated < quiet_for:
+                return 0
+            suppressed, self.suppressed = self.suppressed, 0
+            return suppressed
+
+
+class RecordLimiter:
+    """
+    Rate limits per logger prefix (longest prefix wins, like ``set_level``) and per call site, plus collapsing
+    of consecutive duplicate messages per logger.
+    """
+
+    def __init__(
+            self,
+            rate_limits: t.Optional[t.Dict[str, str]] = None,
+            call_site_rate_limit: t.Optional[str] = None,
+            dedupe: bool = False,
+    ):
+        self._lock = threading.Lock()
+        self._prefix_buckets: t.Dict[str, TokenBucket] = {}
+        self._resolved: t.Dict[str, t.Optional[TokenBucket]] = {}  # logger name -> prefix bucket (cache)
+        self._call_site_rate = parse_rate(call_site_rate_limit) if call_site_rate_limit else None
+        self._call_site_buckets: t.Dict[t.Tuple[str, str, int], TokenBucket] = {}
+        self.dedupe = dedupe
+        self._last: t.Dict[str, t.List[t.Any]] = {}  # logger name -> [level, message, repeats, last repeat]
+
+        for prefix, rate in (rate_limits or {}).items():
+            self.set_rate_limit(prefix, rate)
+
+    @property
+    def rate_limited(self) -> bool:
+        return bool(self._prefix_buckets) or self._call_site_rate is not None
+
+    @property
+    def by_call_site(self) -> bool:
+        return self._call_site_rate is not None
+
+    def set_rate_limit(self, prefix: str, rate: t.Optional[str]) -> None:
+        with self._lock:
+            if rate is None:
+                self._prefix_buckets.pop(prefix, None)
+            else:
+                self._prefix_buckets[prefix] = TokenBucket(*parse_rate(rate))
+            self._resolved.clear()
+
+    def _bucket_for(self, logger_name: str) -> t.Optional[TokenBucket]:
+        try:
+            return self._resolved[logger_name]
+        except KeyError:
+            pass
+
+        with self._lock:
+            best = ("", self._prefix_buckets.get(""))
+            for prefix, bucket in self._prefix_buckets.items():
+                if logger_name.startswith(prefix) and len(prefix) > len(best[0]):
+                    best = (prefix, bucket)
+            self._resolved[logger_name] = best[1]
+        return best[1]
+
+    def acquire(self, logger_name: str, call_site: t.Optional[t.Tuple[str, int]] = None) -> t.Optional[int]:
+        # None when the record must be dropped, otherwise the number of records suppressed before it
+        suppressed = 0
+        bucket = self._bucket_for(logger_name)
+        if bucket is not None:
+            suppressed = bucket.acquire()
+            if suppressed is None:
+                return None
+
+        if self._call_site_rate is not None and call_site is not None:
+            key = (logger_name, *call_site)
+            site_bucket = self._call_site_buckets.get(key)
+            if site_bucket is None:
+                site_bucket = self._call_site_buckets.setdefault(key, TokenBucket(*self._call_site_rate))
+            site_suppressed = site_bucket.acquire()
+            if site_suppressed is None:
+                return None
+            # Both buckets count the same dropped records, so the larger count is the closer one
+            suppressed = max(suppressed, site_suppressed)
+
+        return suppressed
+
+    def repeat(self, logger_name: str, level: str, message: str) -> t.Optional[t.Tuple[str, int]]:
+        # Returns None for a duplicate of the previous message, otherwise (level, repeats) of the previous one
+        with self._lock:
+            last = self._last.get(logger_name)
+            if last is not None and last[0] == level and last[1] == message:
+                last[2] += 1
+                last[3] = time.monotonic()
+                return None
+            self._last[logger_name] = [level, message, 0, 0.0]
+            return (last[0], last[2]) if last is not None else (level, 0)
+
+    def pending_repeats(self, quiet_for: float = 0.0) -> t.List[t.Tuple[str, str, int]]:
+        # (logger name, level, repeats) of duplicates not yet reported whose run has had no repeat for
+        # ``quiet_for`` seconds; they are reset as reported
+        with self._lock:
+            deadline = time.monotonic() - quiet_for
+            pending = []
+            for name, last in self._last.items():
+                if last[2] and last[3] <= deadline:
+                    pending.append((name, last[0], last[2]))
+                    last[2] = 0
+        return pending
+
+    def pending_suppressed(self, quiet_for: float = 0.0) -> t.List[t.Tuple[str, int]]:
+        # (logger name or prefix, count) of rate-limited records not reported yet, see ``TokenBucket.take_suppressed``
+        with self._lock:
+            buckets = list(self._prefix_buckets.items())
+            buckets += [(key[0], bucket) for key, bucket in list(self._call_site_buckets.items())]
+        totals: t.Dict[str, int] = {}
+        for name, bucket in buckets:
+            suppressed = bucket.take_suppressed(quiet_for)
+            if suppressed:
+                totals[name] = totals.get(name, 0) + suppressed
+        return list(totals.items())
+
+
+class SummaryTicker:
+    """
+    Daemon thread calling ``tick`` every ``interval`` seconds, so the summaries of duplicate runs and rate-limited
+    bursts that have gone quiet are written without waiting for the next record of their logger.
+    """
+
+    def __init__(self, interval: float, tick: t.Callable[[], None]):
+        self.interval = interval
+        self.tick = tick
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="fairylandlogger-summaries", daemon=True)
+        self._pid = os.getpid()
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            try:
+                self.tick()
+            except Exception as error:
+                print(f"fairylandlogger: failed to write limiter summaries: {error!r}", file=sys.stderr)
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._pid == os.getpid() and self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join(1.0)
@@ -0,0 +1,66 @@
+# coding: UTF-8
+"""
+@software: PyCharm
+@author: Lionel Johnson
+@contact: https://fairy.host
+@organization: https://github.com/FairylandFuture
+@datetime: 2026-10-17 18:05:37 UTC+08:00
+"""
+
+import collections.abc
+import typing as t
+
+
+class Lazy:
+    """
+    Message computed only if the record passes the level gate: ``logger.debug(Lazy(lambda: dump(state)))``.
+
+    Any other message object, callables included, is logged as ``str(message)``.
+    """
+
+    __slots__ = ("func",)
+
+    def __init__(self, func: t.Callable[[], t.Any]):
+        self.func = func
+
+    def __repr__(self) -> str:
+        return f"Lazy({self.func!r})"
+
+
+def render_message(message: t.Any, args: t.Tuple[t.Any, ...]) -> str:
+    # ``Lazy`` messages are computed here; args use %-style, falling back to {}-style formatting. Never raises:
+    # like stdlib logging, a message that cannot be formatted is logged as the template followed by the args
+    try:
+        if isinstance(message, Lazy):
+            message = message.func()
+        if not isinstance(message, str):
+            message = str(message)
+    except Exception as error:
+        return f"<unrenderable message {type(message).__name__}: {error!r}>"
+    if not args:
+        return message
+
+    # Like stdlib logging, a single non-empty mapping feeds named fields: ``log.info("%(user)s", {"user": u})``
+    mapping = args[0] if len(args) == 1 and isinstance(args[0], collections.abc.Mapping) and args[0] else None
+    if "%" in message:
+        try:
+            return message % (mapping if mapping is not None else args)
+        except Exception:
+            pass
+    try:
+        if "{" in message:
+            return message.format(*args, **(mapping or {}))
+    except Exception:
+        pass
+    try:
+        return f"{message} {args!r}"
+    except Exception:  # A failing ``repr`` of an argument
+        return f"{message} <{len(args)} unrenderable args>"
+
+
+def strip_logger_prefix(message: str, logger_name: t.Optional[str]) -> str:
+    # ``route`` prefixes messages with "[<logger>] " for text patterns; structured formats have a logger field
+    size = len(logger_name) if logger_name else 0
+    if size and message.startswith("[") and message.startswith(logger_name, 1) and message.startswith("] ", size + 1):
+        return message[size + 3:]
+    return message
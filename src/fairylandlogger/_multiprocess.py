@@ -0,0 +1,291 @@
+# coding: UTF-8
+"""
+@software: PyCharm
+@author: Lionel Johnson
+@contact: https://fairy.host
+@organization: https://github.com/FairylandFuture
+@datetime: 2026-10-17 14:02:18 UTC+08:00
+"""
+
+import atexit
+import os
+import sys
+import threading
+import time
+import typing as t
+
+from ._sinks import RotatingFileSink, find_sink, set_forwarder
+
+WRITER_ADDRESS_ENV = "FAIRY_LOG_WRITER_ADDRESS"
+WRITER_PID_ENV = "FAIRY_LOG_WRITER_PID"
+
+_URGENT_LEVEL_NO = 40
+
+# One batch on the wire: sink specs not yet sent on this connection, then (path, data, level_no, timestamp) entries
+_Batch = t.Tuple[t.Dict[str, t.Dict[str, t.Any]], t.List[t.Tuple[str, bytes, int, float]]]
+
+if t.TYPE_CHECKING:
+    from multiprocessing.connection import Connection
+
+
+def _process_authkey() -> bytes:
+    # The multiprocessing authkey: inherited by forked and ``multiprocessing`` children, but not by programs
+    # started with exec, which must not be able to send pickles to the writer
+    import multiprocessing.process
+
+    return bytes(multiprocessing.process.current_process().authkey)
+
+
+class CentralLogWriter:
+    """
+    Owns every log file for a group of processes.
+
+    Runs in the process that configured logging first (e.g. the pre-fork master). Worker processes send batches
+    of encoded records over a local connection, and they are written, rotated and retained here only. Only the
+    address is advertised in the environment; connections authenticate with the multiprocessing authkey.
+    """
+
+    def __init__(self, address: t.Optional[str] = None, authkey: t.Optional[bytes] = None):
+        # multiprocessing.connection is only imported when multiprocess mode is used
+        from multiprocessing.connection import Listener
+
+        self._authkey = authkey or _process_authkey()
+        self._listener = Listener(address, authkey=self._authkey)
+        self.address: str = self._listener.address
+        self._connections: t.List["Connection"] = []
+        self._specs: t.Dict[str, t.Dict[str, t.Any]] = {}
+        self._owned: t.Dict[str, RotatingFileSink] = {}  # Sinks created for files this process never opened itself
+        self._lock = threading.Lock()
+        self._closed = False
+        self._threads: t.List[threading.Thread] = []
+
+    def start(self) -> None:
+        for target, name in ((self._accept, "fairylandlogger-writer-accept"), (self._read, "fairylandlogger-writer")):
+            thread = threading.Thread(target=target, name=name, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+        os.environ[WRITER_ADDRESS_ENV] = self.address
+        os.environ[WRITER_PID_ENV] = str(os.getpid())
+
+    def _accept(self) -> None:
+        while not self._closed:
+            try:
+                connection = self._listener.accept()
+            except (OSError, EOFError):
+                if self._closed:
+                    return
+                continue
+            with self._lock:
+                self._connections.append(connection)
+
+    def _read(self) -> None:
+        from multiprocessing.connection import wait
+
+        while not self._closed:
+            with self._lock:
+                connections = list(self._connections)
+            if not connections:
+                time.sleep(0.05)
+                continue
+
+            for connection in wait(connections, timeout=0.2):
+                try:
+                    batch = connection.recv()
+                except (OSError, EOFError):
+                    self._drop(connection)
+                    continue
+                except Exception as error:  # A message that cannot be unpickled; the next one is still readable
+                    print(f"fairylandlogger: central writer received an unreadable batch: {error!r}", file=sys.stderr)
+                    continue
+                try:
+                    self._write_batch(batch)
+                except Exception as error:
+                    # This thread writes for every worker: report the batch and keep serving the others
+                    print(f"fairylandlogger: central writer failed to write a batch: {error!r}", file=sys.stderr)
+
+    def _drop(self, connection: "Connection") -> None:
+        with self._lock:
+            if connection in self._connections:
+                self._connections.remove(connection)
+        connection.close()
+
+    def _write_batch(self, batch: _Batch) -> None:
+        specs, entries = batch
+        self._specs.update(specs)
+        failures = []
+        for path, data, level_no, timestamp in entries:
+            try:
+                sink = find_sink(path) or self._owned.get(path)
+                if sink is None:
+                    sink = self._owned[path] = RotatingFileSink(**self._specs[path])
+                sink.write_local(data, level_no, timestamp)
+            except Exception as error:  # One bad file must not cost the records of the others
+                failures.append(f"{path}: {error!r}")
+        if failures:
+            raise RuntimeError(f"{len(failures)} records not written ({failures[0]})")
+
+    def close(self) -> None:
+        self._closed = True
+        self._listener.close()
+        for thread in self._threads:
+            thread.join(1.0)
+        with self._lock:
+            for connection in self._connections:
+                connection.close()
+            self._connections.clear()
+        for sink in self._owned.values():
+            sink.stop()
+
+        if os.environ.get(WRITER_PID_ENV) == str(os.getpid()):
+            for name in (WRITER_ADDRESS_ENV, WRITER_PID_ENV):
+                os.environ.pop(name, None)
+
+
+class LogChannel:
+    """
+    Worker side of ``CentralLogWriter``: collects encoded records and sends them in batches.
+
+    A batch is sent once it holds ``batch_records`` records or ``batch_bytes`` bytes, every ``interval`` seconds,
+    immediately for ERROR/CRITICAL, and at exit. When the writer is unreachable the batch is written locally.
+    """
+
+    def __init__(
+            self,
+            address: str,
+            authkey: bytes,
+            batch_records: int = 256,
+            batch_bytes: int = 64 * 1024,
+            interval: float = 0.2,
+    ):
+        self.address = address
+        self._authkey = authkey
+        self.batch_records = batch_records
+        self.batch_bytes = batch_bytes
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._entries: t.List[t.Tuple[str, bytes, int, float]] = []
+        self._pending_bytes = 0
+        self._specs: t.Dict[str, t.Dict[str, t.Any]] = {}
+        self._sent_specs: t.Set[str] = set()
+        self._connection: t.Optional["Connection"] = None
+        self._thread: t.Optional[threading.Thread] = None
+
+    @classmethod
+    def from_env(cls) -> t.Optional["LogChannel"]:
+        address = os.getenv(WRITER_ADDRESS_ENV)
+        if not address or os.getenv(WRITER_PID_ENV) == str(os.getpid()):
+            return None
+        return cls(address, _process_authkey())
+
+    def send(self, sink: RotatingFileSink, data: bytes, level_no: int, timestamp: float = 0.0) -> None:
+        with self._lock:
+            if sink.path not in self._specs:
+                self._specs[sink.path] = sink.spec()
+            self._entries.append((sink.path, data, level_no, timestamp))
+            self._pending_bytes += len(data)
+            if (
+                    len(self._entries) >= self.batch_records
+                    or self._pending_bytes >= self.batch_bytes
+                    or level_no >= _URGENT_LEVEL_NO
+            ):
+                self._send()
+
+        if self._thread is None:
+            self._start()
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="fairylandlogger-channel", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.interval)
+            self.flush()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._send()
+
+    def _send(self) -> None:
+        if not self._entries:
+            return
+
+        from multiprocessing.connection import AuthenticationError, Client
+
+        entries, self._entries, self._pending_bytes = self._entries, [], 0
+        try:
+            if self._connection is None:
+                self._connection = Client(self.address, authkey=self._authkey)
+                self._sent_specs.clear()
+            paths = {entry[0] for entry in entries} - self._sent_specs
+            self._connection.send(({path: self._specs[path] for path in paths}, entries))
+            self._sent_specs.update(paths)
+        except (OSError, EOFError, ValueError, AuthenticationError) as error:
+            # AuthenticationError: a program started with exec inherited the address but not the authkey
+            self._connection = None
+            print(f"fairylandlogger: central writer unreachable, writing locally: {error!r}", file=sys.stderr)
+            self._write_locally(entries)
+
+    def _write_locally(self, entries: t.List[t.Tuple[str, bytes, int, float]]) -> None:
+        for path, data, level_no, timestamp in entries:
+            sink = find_sink(path) or RotatingFileSink(**self._specs[path])
+            sink.write_local(data, level_no, timestamp)
+
+    def close(self) -> None:
+        with self._lock:
+            self._send()
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+_channel: t.Optional[LogChannel] = None
+
+
+def connect_channel() -> bool:
+    # Forward every file write of this process to the central writer, if one is advertised by the environment
+    global _channel
+    channel = LogChannel.from_env()
+    if channel is None:
+        return False
+
+    if _channel is not None:
+        _channel.close()
+    _channel = channel
+    set_forwarder(channel)
+    return True
+
+
+def disconnect_channel() -> None:
+    # Multiprocess mode was turned off: write locally again, after sending what is already batched
+    global _channel
+    channel, _channel = _channel, None
+    set_forwarder(None)
+    if channel is not None:
+        channel.close()
+
+
+def flush_channel() -> None:
+    if _channel is not None:
+        _channel.flush()
+
+
+def _close_channel() -> None:
+    if _channel is not None:
+        _channel.close()
+
+
+def _after_fork_in_child() -> None:
+    global _channel
+    # The inherited channel (connection, batch, thread) belongs to the parent
+    _channel = None
+    set_forwarder(None)
+    connect_channel()
+
+
+atexit.register(_close_channel)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
@@ -0,0 +1,360 @@
+# coding: UTF-8
+"""
+@software: PyCharm
+@author: Lionel Johnson
+@contact: https://fairy.host
+@organization: https://github.com/FairylandFuture
+@datetime: 2026-10-17 23:58:36 UTC+08:00
+"""
+
+import atexit
+import os
+import random
+import shutil
+import struct
+import sys
+import threading
+import time
+import typing as t
+import weakref
+
+if t.TYPE_CHECKING:
+    import socket
+
+_FRAME_LEN = struct.Struct("<I")  # Spill file: every record is stored as ``u32 length, bytes``
+_INITIAL_BACKOFF = 0.5
+_REPLAY_BATCH = 1024  # Spilled records read and sent at a time
+_MAX_DATAGRAM = 65507  # Largest UDP payload over IPv4
+
+_network_sinks: "weakref.WeakSet[NetworkSink]" = weakref.WeakSet()
+
+
+class NetworkSink:
+    """
+    Ships encoded records to a TCP or UDP receiver from one background thread.
+
+    ``write_bytes`` only appends to the pending batch. The sender thread sends it once ``batch_size`` bytes are
+    pending or every ``flush_interval`` seconds, over one connection kept open between batches. While the
+    receiver cannot be reached, batches go to a spill file of at most ``spill_size`` bytes (records beyond that
+    are dropped and counted), reconnects back off exponentially up to ``max_backoff`` seconds, and the spilled
+    records are sent first once a connection succeeds. Delivery is at least once: the records of an interrupted
+    batch that may not have gone out are spilled and sent again.
+
+    Over UDP, records longer than ``max_datagram`` cannot be sent: they are cut to that length with ``truncate``
+    (fine for syslog) and dropped otherwise (a cut JSON document is useless); both are counted.
+    """
+
+    def __init__(
+            self,
+            host: str,
+            port: int,
+            protocol: str = "tcp",
+            batch_size: int = 64 * 1024,
+            flush_interval: float = 1.0,
+            spill_path: t.Optional[str] = None,
+            spill_size: int = 16 * 1024 ** 2,
+            timeout: float = 5.0,
+            max_backoff: float = 30.0,
+            max_datagram: int = _MAX_DATAGRAM,
+            truncate: bool = False,
+    ):
+        self.host = host
+        self.port = port
+        self.protocol = getattr(protocol, "value", protocol)
+        if self.protocol not in ("tcp", "udp"):
+            raise ValueError(f"Invalid network protocol: {protocol!r}")
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.spill_path = spill_path
+        self._spill_origin = spill_path  # Forked children spill to ``<spill_path>.<pid>``
+        self.spill_size = spill_size if spill_path else 0
+        self.timeout = timeout
+        self.max_backoff = max_backoff
+        self.max_datagram = max_datagram
+        self.truncate = truncate
+
+        self.bytes_written: int = 0  # Bytes delivered to the socket
+        self.records_sent: int = 0
+        self.spilled: int = 0
+        self.dropped: int = 0
+        self.reconnects: int = 0
+        self.truncated: int = 0
+
+        self._cond = threading.Condition()
+        self._pending: t.List[bytes] = []
+        self._pending_bytes: int = 0
+        self._busy = False
+        self._flush_requested = False
+        self._stopping = False
+        self._thread: t.Optional[threading.Thread] = None
+        self._sock: t.Optional["socket.socket"] = None
+        self._address: t.Optional[t.Any] = None
+        self._failed = False  # The last attempt to reach the receiver failed
+        self._backoff = _INITIAL_BACKOFF
+        self._next_attempt: float = 0.0
+        self._sent: int = 0  # Records of the last ``_send`` call that went out, also when it failed
+        self._spill_bytes: int = self._spilled_size()
+        _network_sinks.add(self)
+
+    def _spilled_size(self) -> int:
+        # Records spilled by an earlier run are sent once the receiver is reachable
+        return os.path.getsize(self.spill_path) if self.spill_path and os.path.exists(self.spill_path) else 0
+
+    @property
+    def connected(self) -> bool:
+        return self._sock is not None
+
+    def stats(self) -> t.Dict[str, t.Any]:
+        return {
+            "depth": len(self._pending),
+            "bytes_written": self.bytes_written,
+            "records_sent": self.records_sent,
+            "connected": self.connected,
+            "reconnects": self.reconnects,
+            "spilled": self.spilled,
+            "spill_bytes": self._spill_bytes,
+            "dropped": self.dropped,
+            "truncated": self.truncated,
+        }
+
+    def write_bytes(self, data: bytes, level_no: int = 0, timestamp: float = 0.0) -> None:
+        with self._cond:
+            self._pending.append(data)
+            self._pending_bytes += len(data)
+            if self._pending_bytes >= self.batch_size:
+                self._cond.notify_all()
+        if self._thread is None:
+            self._start()
+
+    def _start(self) -> None:
+        with self._cond:
+            if self._thread is None:
+                self._stopping = False
+                self._thread = threading.Thread(target=self._run, name=f"fairylandlogger-network-{self.host}:{self.port}", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                if not (self._pending_bytes >= self.batch_size or self._flush_requested or self._stopping):
+                    self._cond.wait(self.flush_interval)
+                batch, stopping = self._pending, self._stopping
+                self._pending, self._pending_bytes = [], 0
+                self._busy, self._flush_requested = True, False
+
+            if batch or self._spill_bytes:
+                try:
+                    self._ship(batch)
+                except Exception as error:
+                    # Keep the thread alive: ``write_bytes`` only starts it once and would queue forever otherwise
+                    self.dropped += len(batch)
+                    print(f"fairylandlogger: network sink {self.host}:{self.port} failed: {error!r}", file=sys.stderr)
+
+            with self._cond:
+                self._busy = False
+                self._cond.notify_all()
+            if stopping:
+                return
+
+    def _ship(self, batch: t.List[bytes]) -> None:
+        if self._sock is None and not self._connect():
+            self._spill(batch)
+            return
+        try:
+            if self._spill_bytes:
+                self._replay()
+        except OSError:
+            self._disconnect()
+            self._spill(batch)
+            return
+        try:
+            self._send(batch)
+        except OSError:
+            self._disconnect()
+            self._spill(batch[self._sent:])
+
+    def _connect(self) -> bool:
+        import socket  # Only needed once a network appender is used
+
+        now = time.monotonic()
+        if now < self._next_attempt:
+            return False
+        try:
+            if self.protocol == "tcp":
+                sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                address = None
+            else:
+                family, kind, proto, _, address = socket.getaddrinfo(self.host, self.port, type=socket.SOCK_DGRAM)[0]
+                sock = socket.socket(family, kind, proto)
+                sock.settimeout(self.timeout)
+        except OSError:
+            self._failed = True
+            self._next_attempt = now + self._backoff * random.uniform(0.5, 1.0)
+            self._backoff = min(self._backoff * 2, self.max_backoff)
+            return False
+
+        if self._failed:
+            self.reconnects += 1
+        self._sock, self._address = sock, address
+        self._failed = False
+        self._backoff = _INITIAL_BACKOFF
+        return True
+
+    def _disconnect(self) -> None:
+        sock, self._sock = self._sock, None
+        self._failed = True
+        self._next_attempt = time.monotonic() + self._backoff * random.uniform(0.5, 1.0)
+        if sock is not None:
+            try:
+                sock.close()
+            except OSError:
+                pass
+
+    def _send(self, batch: t.List[bytes]) -> None:
+        # Sets ``_sent``; over TCP a failed ``sendall`` counts as nothing sent, since any part of it may be lost
+        self._sent = 0
+        if not batch:
+            return
+        if self._address is None:
+            data = b"".join(batch)
+            self._sock.sendall(data)
+            self._sent = len(batch)
+            self.records_sent += len(batch)
+            self.bytes_written += len(data)
+            return
+        for datagram in batch:
+            if len(datagram) > self.max_datagram:
+                if not self.truncate:
+                    self.dropped += 1
+                    self._sent += 1
+                    continue
+                datagram = datagram[:self.max_datagram]
+                self.truncated += 1
+            self._sock.sendto(datagram, self._address)
+            self._sent += 1
+            self.records_sent += 1
+            self.bytes_written += len(datagram)
+
+    def _spill(self, batch: t.List[bytes]) -> None:
+        if not batch:
+            return
+        if not self.spill_size:
+            self.dropped += len(batch)
+            return
+        frames = []
+        for data in batch:
+            size = _FRAME_LEN.size + len(data)
+            if self._spill_bytes + size > self.spill_size:
+                self.dropped += 1
+                continue
+            frames.append(_FRAME_LEN.pack(len(data)))
+            frames.append(data)
+            self._spill_bytes += size
+            self.spilled += 1
+        if frames:
+            os.makedirs(os.path.dirname(os.path.abspath(self.spill_path)), exist_ok=True)
+            with open(self.spill_path, "ab") as stream:
+                stream.write(b"".join(frames))
+
+    def _replay(self) -> None:
+        # Send the spill file before anything newer, a batch at a time; on failure it is cut to the records not
+        # sent yet
+        done = 0  # Bytes of the file already sent
+        failure: t.Optional[OSError] = None
+        with open(self.spill_path, "rb") as stream:
+            for records, ends in self._read_spill(stream):
+                try:
+                    self._send(records)
+                except OSError as error:
+                    if self._sent:
+                        done = ends[self._sent - 1]
+                    failure = error
+                    break
+                done = ends[-1]
+        if failure is not None:
+            self._rewrite_spill(done)
+            raise failure
+        os.remove(self.spill_path)
+        self._spill_bytes = 0
+
+    @staticmethod
+    def _read_spill(stream: t.BinaryIO) -> t.Iterator[t.Tuple[t.List[bytes], t.List[int]]]:
+        # (records, file offset after each) of at most ``_REPLAY_BATCH`` records
+        offset = 0
+        while True:
+            records, ends = [], []
+            while len(records) < _REPLAY_BATCH:
+                head = stream.read(_FRAME_LEN.size)
+                if len(head) < _FRAME_LEN.size:
+                    break
+                (size,) = _FRAME_LEN.unpack(head)
+                data = stream.read(size)
+                if len(data) < size:  # Torn last frame, e.g. a crash while spilling
+                    break
+                offset += _FRAME_LEN.size + size
+                records.append(data)
+                ends.append(offset)
+            if not records:
+                return
+            yield records, ends
+            if len(records) < _REPLAY_BATCH:
+                return
+
+    def _rewrite_spill(self, start: int) -> None:
+        temporary = self.spill_path + ".tmp"
+        with open(self.spill_path, "rb") as source, open(temporary, "wb") as target:
+            source.seek(start)
+            shutil.copyfileobj(source, target)
+            size = target.tell()
+        os.replace(temporary, self.spill_path)
+        self._spill_bytes = size
+
+    def drain(self, timeout: t.Optional[float] = None) -> None:
+        # Send (or spill) everything written so far; waits at most ``timeout`` seconds for a slow receiver
+        if self._thread is None:
+            return
+        deadline = time.monotonic() + (self.timeout * 2 if timeout is None else timeout)
+        with self._cond:
+            self._flush_requested = True
+            self._cond.notify_all()
+            while (self._pending or self._busy or self._flush_requested) and self._thread is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+    def stop(self) -> None:
+        with self._cond:
+            thread, self._stopping = self._thread, True
+            self._cond.notify_all()
+        if thread is not None:
+            thread.join(self.timeout * 2)
+        self._thread = None
+        self._disconnect()
+
+    def _after_fork_in_child(self) -> None:
+        self._cond = threading.Condition()
+        self._pending, self._pending_bytes = [], 0
+        self._busy = self._flush_requested = False
+        self._thread = None
+        self._sock = None
+        # The parent keeps its spill file: sharing it would interleave frames and replay records twice
+        if self._spill_origin:
+            self.spill_path = f"{self._spill_origin}.{os.getpid()}"
+        self._spill_bytes = self._spilled_size()
+
+
+def _drain_all() -> None:
+    for sink in list(_network_sinks):
+        sink.drain(1.0)
+
+
+def _after_fork_in_child() -> None:
+    for sink in list(_network_sinks):
+        sink._after_fork_in_child()
+
+
+atexit.register(_drain_all)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
@@ -0,0 +1,149 @@
+# coding: UTF-8
+"""
+@software: PyCharm
+@author: Lionel Johnson
+@contact: https://fairy.host
+@organization: https://github.com/FairylandFuture
+@datetime: 2026-10-17 18:11:36 UTC+08:00
+"""
+
+import datetime
+import itertools
+import mmap
+import os
+import struct
+import sys
+import threading
+import typing as t
+
+from ._enums import _LOG_LEVEL_SEVERITY
+
+_MAGIC = b"FAIRYREC"
+_FILE_HEADER = struct.Struct("<8sII")  # magic, slots, slot size
+_HEADER_SIZE = 64
+_SLOT_HEADER = struct.Struct("<QdII")  # sequence (0 while being written), timestamp, level number, payload length
+_LEVEL_NAMES: t.Dict[int, str] = {severity: name for name, severity in _LOG_LEVEL_SEVERITY.items()}
+
+
+class RingBufferSink:
+    """
+    Fixed-size ring of records in a memory-mapped file.
+
+    The file holds ``slots`` slots of ``slot_size`` bytes; record ``n`` goes to slot ``n % slots``, so writing is
+    two header packs and one copy of the encoded message (truncated to the slot). The mapping is shared with the
+    file, so the last records stay readable with ``read_ring_buffer`` after the process crashed. A file left by
+    a previous run is kept as ``<path>.prev``.
+    """
+
+    def __init__(self, path: str, slots: int = 4096, slot_size: int = 512):
+        if slots <= 0 or slot_size <= _SLOT_HEADER.size:
+            raise ValueError(f"Invalid ring buffer geometry: {slots} slots of {slot_size} bytes")
+        self.path = str(path)
+        self.slots = slots
+        self.slot_size = slot_size
+        self._capacity = slot_size - _SLOT_HEADER.size
+        self._counter = itertools.count(1)  # ``next`` is atomic, no lock on the write path
+        self.written: int = 0
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        if os.path.exists(self.path):
+            os.replace(self.path, self.path + ".prev")
+        with open(self.path, "w+b") as stream:
+            stream.truncate(_HEADER_SIZE + slots * slot_size)
+            self._mmap = mmap.mmap(stream.fileno(), 0)
+        _FILE_HEADER.pack_into(self._mmap, 0, _MAGIC, slots, slot_size)
+
+    def write(self, level_no: int, message: str, timestamp: float) -> None:
+        data = message.encode("utf-8", "replace")
+        size = min(len(data), self._capacity)
+        sequence = next(self._counter)
+        offset = _HEADER_SIZE + (sequence % self.slots) * self.slot_size
+        mm = self._mmap
+        _SLOT_HEADER.pack_into(mm, offset, 0, timestamp, level_no, size)
+        start = offset + _SLOT_HEADER.size
+        mm[start:start + size] = data if size == len(data) else data[:size]
+        _SLOT_HEADER.pack_into(mm, offset, sequence, timestamp, level_no, size)
+        self.written = sequence
+
+    def records(self, last: int = 0) -> t.List[t.Tuple[int, float, int, str]]:
+        return _read_slots(self._mmap, last)
+
+    def close(self) -> None:
+        if not self._mmap.closed:
+            self._mmap.flush()
+            self._mmap.close()
+
+
+def _read_slots(buffer: t.Any, last: int = 0) -> t.List[t.Tuple[int, float, int, str]]:
+    magic, slots, slot_size = _FILE_HEADER.unpack_from(buffer, 0)
+    if magic != _MAGIC:
+        raise ValueError("Not a fairylandlogger ring buffer")
+
+    records = []
+    for index in range(slots):
+        offset = _HEADER_SIZE + index * slot_size
+        sequence, timestamp, level_no, size = _SLOT_HEADER.unpack_from(buffer, offset)
+        if sequence:  # 0: never written, or torn by a crash in the middle of a write
+            start = offset + _SLOT_HEADER.size
+            records.append((sequence, timestamp, level_no, bytes(buffer[start:start + size]).decode("utf-8", "replace")))
+    records.sort()
+    return records[-last:] if last else records
+
+
+def read_ring_buffer(path: str, last: int = 0) -> t.List[t.Tuple[int, float, int, str]]:
+    # (sequence, timestamp, level number, message) of the records in a ring buffer file, oldest first
+    with open(path, "rb") as stream:
+        return _read_slots(stream.read(), last)
+
+
+def format_records(records: t.Iterable[t.Tuple[int, float, int, str]]) -> t.Iterator[str]:
+    for _, timestamp, level_no, message in records:
+        moment = datetime.datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+        yield f"{moment} | {_LEVEL_NAMES.get(level_no, str(level_no)): <8} | {message}\n"
+
+
+class _ExceptionHooks:
+    """
+    Chains ``sys.excepthook`` and ``threading.excepthook`` so callbacks run before the previous hooks.
+    """
+
+    def __init__(self):
+        self._callbacks: t.List[t.Callable[[BaseException], None]] = []
+        self._sys_hook: t.Optional[t.Callable[..., None]] = None
+        self._threading_hook: t.Optional[t.Callable[..., None]] = None
+
+    def add(self, callback: t.Callable[[BaseException], None]) -> None:
+        self._callbacks.append(callback)
+
+        # (Re-)install when missing, e.g. after another library or a test runner replaced the hooks
+        if sys.excepthook is not self._sys_hook:
+            previous_sys = sys.excepthook
+
+            def sys_hook(kind, error, traceback):
+                self._notify(error)
+                previous_sys(kind, error, traceback)
+
+            sys.excepthook = self._sys_hook = sys_hook
+
+        if threading.excepthook is not self._threading_hook:
+            previous_threading = threading.excepthook
+
+            def threading_hook(args):
+                self._notify(args.exc_value)
+                previous_threading(args)
+
+            threading.excepthook = self._threading_hook = threading_hook
+
+    def remove(self, callback: t.Callable[[BaseException], None]) -> None:
+        if callback in self._callbacks:
+            self._callbacks.remove(callback)
+
+    def _notify(self, error: BaseException) -> None:
+        for callback in list(self._callbacks):
+            try:
+                callback(error)
+            except Exception:
+                pass
+
+
+exception_hooks = _ExceptionHooks()
@@ -7,31 +7,117 @@
 @datetime: 2025-11-29 16:56:33 UTC+08:00
 """
 
+import atexit
+import functools
 import os
+import sys
 import threading
+import time
 import typing as t
+import weakref
+from dataclasses import dataclass, field
 from enum import Enum
 from pathlib import Path
+from types import MappingProxyType
 
 from loguru import logger as _loguru_logger
 
-from ._appenders import AbstractLoggerAppender, ConsoleLoggerAppender, FileLoggerAppender, JSONLoggerAppender
-from ._enums import LogLevelEnum
-from ._structure import LoggerConfigStructure, LoggerRecordStructure
+from ._appenders import (
+    AbstractLoggerAppender,
+    HANDLER_LEVEL,
+    BinaryLoggerAppender,
+    ConsoleLoggerAppender,
+    FileLoggerAppender,
+    FlightRecorderAppender,
+    JSONLoggerAppender,
+    NetworkLoggerAppender,
+    report_queue_recovery,
+)
+from ._binary import TEMPLATE_KEY
+from ._context import resolve_pattern
+from ._enums import LogLevelEnum, _LOG_LEVEL_SEVERITY
+from ._limits import RecordLimiter, SummaryTicker
+from ._messages import render_message
+from ._multiprocess import CentralLogWriter, connect_channel, disconnect_channel, flush_channel
+from ._sinks import LoggerFileRouter, QueuedSink, parse_size, rotation_scheduler
+from ._stats import LoggerStats, StatsReporter
+from ._structure import LoggerCallSiteStructure, LoggerConfigStructure, LoggerRecordStructure
+from ._tracebacks import EXCEPTION_KEY, TracebackRenderer
+from ._watcher import ConfigWatcher
+
+
+@dataclass(frozen=True)
+class RoutingSnapshot:
+    """
+    Routing state read by ``route`` and the loggers without taking the registry lock.
+
+    Writers build a new snapshot under the lock and publish it with a single attribute assignment, so a reader
+    sees the old or the new state but never a mix of both. ``thresholds`` caches the level resolved per logger
+    name and only ever holds values computed from this snapshot.
+    """
+
+    severity: int = LogLevelEnum.INFO.severity
+    levels: t.Tuple[t.Tuple[str, int], ...] = ()  # (prefix, severity), longest prefix first
+    appenders: t.Tuple[AbstractLoggerAppender, ...] = ()
+    recorder: t.Optional[FlightRecorderAppender] = None
+    limiter: t.Optional[RecordLimiter] = None
+    binary: bool = False
+    logger_files: t.Mapping[str, t.Any] = field(default_factory=lambda: MappingProxyType({}))  # logger name -> file sink
+    thresholds: t.Dict[str, int] = field(default_factory=dict, compare=False, repr=False)
+
+    def threshold(self, logger_name: str) -> int:
+        try:
+            return self.thresholds[logger_name]
+        except KeyError:
+            pass
+
+        severity = self.severity
+        for prefix, prefix_severity in self.levels:
+            if logger_name.startswith(prefix):
+                severity = prefix_severity
+                break
+        self.thresholds[logger_name] = severity  # Concurrent misses store the same value
+        return severity
 
 
 class LoggerRegistry:
     _instance: t.Optional["LoggerRegistry"] = None
     _lock: threading.RLock = threading.RLock()
-    _LOG_LEVEL_ORDER: t.List[str] = ["TRACE", "DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"]
+    _LOG_LEVEL_SEVERITY: t.Dict[str, int] = _LOG_LEVEL_SEVERITY
+    # Frames between the loguru call in ``route`` and the user code: route <- Logger._emit <- Logger.<level>
+    _ROUTE_DEPTH: int = 3
+    # (working directory, config file, mtime, size) -> config parsed by ``ensure_default``
+    _auto_configs: t.Dict[t.Tuple[t.Any, ...], LoggerConfigStructure] = {}
+    _TRACEBACK_APPENDERS: t.Tuple[str, ...] = ("console", "file", "json", "binary", "network", "logger_files")
+    _SUMMARY_INTERVAL: float = 1.0  # Seconds between checks for duplicate runs and bursts that went quiet
+    _SUMMARY_QUIET: float = 1.0  # Seconds without a repeat or suppressed call before their summary is written
 
     def __init__(self):
         self._configured: bool = False
         self._config: t.Optional[LoggerConfigStructure] = None
         self._appenders: t.List[AbstractLoggerAppender] = []
+        self._appender_keys: t.Dict[t.Hashable, AbstractLoggerAppender] = {}  # Settings key -> appender, for reconfigure
         self._level: t.Union[str, LogLevelEnum] = LogLevelEnum.INFO
-        self._levels: t.Dict[str, t.Union[str, LogLevelEnum]] = {}
-        self._logger_file_handlers: t.Dict[str, t.List[int]] = {}  # Track logger-specific file handlers
+        self._severity: int = LogLevelEnum.INFO.severity
+        self._levels: t.Dict[str, int] = {}  # prefix -> severity, replaced (never mutated) on change
+        self._logger_file_router: t.Optional[LoggerFileRouter] = None  # One loguru handler for every logger-specific file
+        self._logger_file_queue: t.Optional[QueuedSink] = None
+        self._logger_file_handler_id: t.Optional[int] = None
+        self._logger_file_renderer: t.Optional[TracebackRenderer] = None
+        self._logger_file_patterns: t.Tuple[str, str] = ("", "")  # (line, exception) formats of the logger files
+        self._logger_file_dirs: t.Dict[str, str] = {}  # Logger name -> sub-directory it registered its file with
+        self._listeners: "weakref.WeakSet[t.Any]" = weakref.WeakSet()  # Loggers refreshed on reconfigure
+        self._central_writer: t.Optional[CentralLogWriter] = None
+        self._limiter: t.Optional[RecordLimiter] = None  # Rate limits and duplicate collapsing, None when unused
+        self._summary_ticker: t.Optional[SummaryTicker] = None  # Writes the summaries of runs that went quiet
+        self._stats: LoggerStats = LoggerStats()
+        self._stats_reporter: t.Optional[StatsReporter] = None
+        self._recorder: t.Optional[FlightRecorderAppender] = None  # Fed by ``route``, also below the level gate
+        self._binary: bool = False  # Pass message templates to the binary appender
+        self._capture_backtrace: bool = False  # Some appender renders frames above the catch point
+        self._config_watcher: t.Optional[ConfigWatcher] = None
+        # Published copy of the state above that the emit path reads; rebuilt by ``_publish`` under the lock
+        self._snapshot: RoutingSnapshot = RoutingSnapshot()
 
     def __new__(cls, *args, **kwargs):
         if cls._instance is None:
@@ -46,15 +132,39 @@ class LoggerRegistry:
 
     @level.setter
     def level(self, value: t.Union[str, LogLevelEnum]):
-        self._level = value
+        with self._lock:
+            self._severity = self.severity_of(value)
+            self._level = value
+            self._apply_level()
+            self._invalidate()
+
+    def _apply_level(self) -> None:
+        for appender in self._appenders:
+            if not isinstance(appender, FlightRecorderAppender):
+                appender.level = self._level
+        if self._logger_file_router is not None:
+            self._logger_file_router.severity = self._severity
 
     @property
     def config(self) -> t.Optional[LoggerConfigStructure]:
         return self._config
 
+    @property
+    def capture_backtrace(self) -> bool:
+        return self._capture_backtrace
+
     @property
     def appenders(self) -> t.List[AbstractLoggerAppender]:
-        return self._appenders.copy()
+        return list(self._snapshot.appenders)
+
+    @property
+    def snapshot(self) -> RoutingSnapshot:
+        return self._snapshot
+
+    @property
+    def counters(self) -> LoggerStats:
+        # Also counted into by the loggers' own level gates
+        return self._stats
 
     @property
     def is_configured(self) -> bool:
@@ -70,6 +180,16 @@ class LoggerRegistry:
     @classmethod
     def reset(cls):
         with cls._lock:
+            if cls._instance is not None and cls._instance._central_writer is not None:
+                cls._instance._central_writer.close()
+            if cls._instance is not None and cls._instance._stats_reporter is not None:
+                cls._instance._stats_reporter.stop()
+            if cls._instance is not None and cls._instance._summary_ticker is not None:
+                cls._instance._summary_ticker.stop()
+            if cls._instance is not None and cls._instance._recorder is not None:
+                cls._instance._recorder.stop()
+            if cls._instance is not None and cls._instance._config_watcher is not None:
+                cls._instance._config_watcher.stop()
             cls._instance = None
             try:
                 _loguru_logger.remove()
@@ -77,21 +197,247 @@ class LoggerRegistry:
                 raise error
 
     def configure(self, config: LoggerConfigStructure):
+        # Incremental: appenders whose settings are unchanged keep their handler, open files and queued records
+        # and only take the new level; changed ones are replaced, new handlers going in before old ones go out
+        if config.binary and config.multiprocess:
+            raise ValueError("The binary log format cannot be combined with multiprocess mode")
+
         with self._lock:
-            self._reset_loguru_handlers()
-            self._appenders.clear()
-            self._logger_file_handlers.clear()
+            previous = self._config if self._configured else None
+            if previous is None:
+                self._reset_loguru_handlers()
 
             self._config = config
             self._level = config.level
+            self._severity = self.severity_of(config.level)
+            if previous is None or self._limiter_options(previous) != self._limiter_options(config):
+                limiter = None
+                if config.rate_limits or config.call_site_rate_limit or config.dedupe:
+                    limiter = RecordLimiter(config.rate_limits, config.call_site_rate_limit, config.dedupe)
+                self._set_limiter(limiter)
+            self._binary = config.file and config.binary
+            self._capture_backtrace = any(config.traceback_options(name).backtrace for name in self._TRACEBACK_APPENDERS)
+
+            if config.multiprocess and config.file:
+                self._setup_multiprocess()
+            else:
+                self._teardown_multiprocess()
 
-            if config.console:
-                self._add_console_appender()
+            self._apply_appenders(config)
 
-            if config.file:
-                self._add_file_appenders(config)
+            if self._logger_file_router is not None:
+                if previous is None or not config.file or self._logger_file_options(previous) != self._logger_file_options(config):
+                    self._replace_logger_file_router(previous)
+
+            if previous is None or previous.stats_interval != config.stats_interval:
+                if self._stats_reporter is not None:
+                    self._stats_reporter.stop()
+                    self._stats_reporter = None
+                if config.stats_interval > 0:
+                    self._stats_reporter = StatsReporter(config.stats_interval, self.stats, self._report_stats)
+                    self._stats_reporter.start()
 
             self._configured = True
+            self._invalidate()
+
+    def _apply_appenders(self, config: LoggerConfigStructure) -> None:
+        current = self._appender_keys
+        plan = self._appender_plan(config)
+        replaced = [appender for key, appender in current.items() if key not in dict(plan)]
+        appenders: t.List[AbstractLoggerAppender] = []
+        keys: t.Dict[t.Hashable, AbstractLoggerAppender] = {}
+        for key, factory in plan:
+            appender = current.get(key)
+            if appender is None:
+                appender = factory()
+                # Two sinks must never write one file: the old one drains and closes before the new one opens
+                files = self._appender_files(appender)
+                for old in replaced:
+                    if files & self._appender_files(old):
+                        old.remove()
+                appender.add_sink()
+            appenders.append(appender)
+            keys[key] = appender
+
+        for key, appender in current.items():
+            if keys.get(key) is not appender:
+                appender.remove()
+
+        self._appenders = appenders
+        self._appender_keys = keys
+        self._recorder = next((a for a in appenders if isinstance(a, FlightRecorderAppender)), None)
+        self._apply_level()
+
+    @staticmethod
+    def _appender_files(appender: AbstractLoggerAppender) -> t.Set[str]:
+        paths = (getattr(appender, "path", None), getattr(appender, "spill_path", None))
+        return {os.path.abspath(str(path)) for path in paths if path}
+
+    def _appender_plan(self, config: LoggerConfigStructure) -> t.List[t.Tuple[t.Hashable, t.Callable[[], AbstractLoggerAppender]]]:
+        # (key, factory) of every appender the config asks for; the key holds all settings except the level
+        def planned(appender_class: t.Type[AbstractLoggerAppender], **options):
+            key = (appender_class.__name__,) + tuple(sorted((name, str(value)) for name, value in options.items()))
+            if appender_class is FlightRecorderAppender:
+                return key, functools.partial(appender_class, **options)
+            return key, functools.partial(appender_class, level=self._level, **options)
+
+        plan = []
+        if config.console:
+            plan.append(planned(
+                ConsoleLoggerAppender,
+                banner=config.banner,
+                stream=config.console_stream,
+                colorize=config.console_colorize,
+                flush_interval=config.console_flush_interval,
+                tracebacks=config.traceback_options("console"),
+            ))
+
+        if config.file:
+            path = self._get_log_file_path(config.dirname, config.filename)
+            file_options = {
+                "rotation": config.rotation,
+                "retention": config.retention,
+                "encoding": config.encoding,
+                "compression": config.compression,
+                "index": config.index,
+                **self._buffer_options(config),
+                **self._queue_options(config),
+            }
+            # Standard file appender, or the binary one in its place
+            if config.binary:
+                plan.append(planned(
+                    BinaryLoggerAppender, path=self._get_binary_log_path(path), pattern=config.pattern,
+                    tracebacks=config.traceback_options("binary"), **file_options,
+                ))
+            else:
+                plan.append(planned(
+                    FileLoggerAppender, path=path, pattern=config.pattern, tracebacks=config.traceback_options("file"), **file_options,
+                ))
+            if config.json:
+                plan.append(planned(
+                    JSONLoggerAppender, path=self._get_json_log_path(path), fields=config.json_fields,
+                    tracebacks=config.traceback_options("json"), **file_options,
+                ))
+
+        if config.network:
+            spill_size = parse_size(config.network_spill_size)
+            if spill_size is None:
+                raise ValueError(f"Invalid network spill size: {config.network_spill_size!r}")
+            spill_path = None
+            if spill_size:
+                spill_path = self._get_log_file_path(config.dirname, os.path.splitext(config.filename)[0] + ".spill")
+            plan.append(planned(
+                NetworkLoggerAppender,
+                host=config.network_host,
+                port=config.network_port,
+                protocol=config.network,
+                wire_format=config.network_format,
+                fields=config.json_fields,
+                app_name=config.network_app_name,
+                batch_size=config.network_batch_size,
+                flush_interval=config.network_flush_interval,
+                spill_path=spill_path,
+                spill_size=spill_size,
+                tracebacks=config.traceback_options("network"),
+            ))
+
+        if config.flight_recorder:
+            plan.append(planned(
+                FlightRecorderAppender,
+                path=self._get_log_file_path(config.dirname, os.path.splitext(config.filename)[0] + ".flight"),
+                level=config.flight_recorder_level,
+                slots=config.flight_recorder_records,
+                dump_records=config.flight_recorder_dump_records,
+            ))
+        return plan
+
+    @staticmethod
+    def _limiter_options(config: LoggerConfigStructure) -> t.Tuple[t.Any, ...]:
+        return config.rate_limits, config.call_site_rate_limit, config.dedupe
+
+    def _logger_file_options(self, config: LoggerConfigStructure) -> t.Tuple[t.Any, ...]:
+        return (
+            config.dirname, config.rotation, config.retention, config.encoding, config.compression, config.index,
+            config.pattern, config.traceback_options("logger_files"), self._buffer_options(config), self._queue_options(config),
+            config.logger_files_max_open, config.logger_files_idle_timeout,
+        )
+
+    def queue_stats(self) -> t.Dict[str, t.Dict[str, t.Any]]:
+        return {name: value for name, value in self._appender_stats().items() if "depth" in value}
+
+    def _appender_stats(self) -> t.Dict[str, t.Dict[str, t.Any]]:
+        stats = {str(getattr(appender, "path", type(appender).__name__)): appender.stats() for appender in self._appenders}
+        if self._logger_file_queue is not None:
+            stats["logger-files"] = {**self._logger_file_queue.stats(), **self._logger_file_router.pool.stats()}
+        return {name: value for name, value in stats.items() if value}
+
+    def stats(self) -> t.Dict[str, t.Any]:
+        stats = self._stats.snapshot()
+        stats["appenders"] = self._appender_stats()
+        # Rotation and retention of every file sink run in the shared scheduler
+        stats["rotation"] = rotation_scheduler.stats()
+        return stats
+
+    def flush(self) -> None:
+        # Report collapsed duplicates and rate-limited records, wait for loguru's enqueued messages, then write out
+        # buffered appenders
+        if self._limiter is not None:
+            self._write_summaries(self._limiter)
+        _loguru_logger.complete()
+        for appender in self._appenders:
+            appender.flush()
+        if self._logger_file_queue is not None:
+            self._logger_file_queue.drain()
+        flush_channel()
+
+    def _set_limiter(self, limiter: t.Optional[RecordLimiter]) -> None:
+        # Summaries still pending in the replaced limiter are written first; the ticker runs while a limiter does
+        if self._limiter is not None:
+            self._write_summaries(self._limiter)
+        self._limiter = limiter
+        if limiter is None and self._summary_ticker is not None:
+            self._summary_ticker.stop()
+            self._summary_ticker = None
+        elif limiter is not None and self._summary_ticker is None:
+            self._summary_ticker = SummaryTicker(self._SUMMARY_INTERVAL, self._tick_summaries)
+            self._summary_ticker.start()
+
+    def _tick_summaries(self) -> None:
+        limiter = self._limiter
+        if limiter is not None:
+            self._write_summaries(limiter, self._SUMMARY_QUIET)
+
+    @staticmethod
+    def _write_summaries(limiter: RecordLimiter, quiet_for: float = 0.0) -> None:
+        # Counts the emit path would report with the next record of the logger, written now because none may come
+        summaries = []
+        if limiter.dedupe:
+            for name, level, repeats in limiter.pending_repeats(quiet_for):
+                summaries.append((name, level, f"Last message repeated {repeats} times"))
+        for name, suppressed in limiter.pending_suppressed(quiet_for):
+            summaries.append((name, LogLevelEnum.WARNING.value, f"{suppressed} records suppressed by rate limit"))
+        for name, level, message in summaries:
+            prefix = f"[{name}] " if name else ""
+            _loguru_logger.bind(logger_name=name).log(level, f"{prefix}{message}")
+
+    @staticmethod
+    def _report_stats(line: str) -> None:
+        _loguru_logger.bind(logger_name="fairylandlogger").info(line)
+
+    def _setup_multiprocess(self):
+        # Workers forward file output to the advertised central writer; the first process to configure owns it
+        if connect_channel():
+            return
+        if self._central_writer is None:
+            self._central_writer = CentralLogWriter()
+            self._central_writer.start()
+
+    def _teardown_multiprocess(self):
+        # Multiprocess mode or file output was turned off: stop forwarding, and stop serving the workers if owned
+        disconnect_channel()
+        if self._central_writer is not None:
+            self._central_writer.close()
+            self._central_writer = None
 
     def _reset_loguru_handlers(self):
         try:
@@ -99,38 +445,24 @@ class LoggerRegistry:
         except Exception as error:
             raise error
 
-    def _add_console_appender(self):
-        console = ConsoleLoggerAppender(level=self._level)
-        console.add_sink()
-        self._appenders.append(console)
-
-    def _add_file_appenders(self, config: LoggerConfigStructure):
-        path = self._get_log_file_path(config.dirname, config.filename)
-
-        # Add standard file appender
-        file_appender = FileLoggerAppender(
-            path=path,
-            level=self._level,
-            rotation=config.rotation,
-            retention=config.retention,
-            encoding=config.encoding,
-            pattern=config.pattern,
-        )
-        file_appender.add_sink()
-        self._appenders.append(file_appender)
-
-        # Add JSON appender if enabled
-        if config.json:
-            json_path = self._get_json_log_path(path)
-            json_appender = JSONLoggerAppender(
-                path=json_path,
-                level=self._level,
-                rotation=config.rotation,
-                retention=config.retention,
-                encoding=config.encoding,
-            )
-            json_appender.add_sink()
-            self._appenders.append(json_appender)
+    def dump_flight_recorder(self, reason: str = "requested") -> t.Optional[str]:
+        return self._recorder.dump(reason) if self._recorder is not None else None
+
+    @staticmethod
+    def _queue_options(config: LoggerConfigStructure) -> t.Dict[str, t.Any]:
+        return {"queue_size": config.queue_size, "queue_policy": config.queue_policy}
+
+    @staticmethod
+    def _buffer_options(config: LoggerConfigStructure) -> t.Dict[str, t.Any]:
+        if not config.buffered:
+            return {}
+
+        return {
+            "buffer_size": config.buffer_size,
+            "flush_records": config.flush_records,
+            "flush_interval": config.flush_interval,
+            "fsync": config.fsync,
+        }
 
     def _get_log_file_path(self, dirname: t.Union[str, Path], filename: str) -> t.Union[str, Path]:
         os.makedirs(dirname, exist_ok=True)
@@ -142,6 +474,9 @@ class LoggerRegistry:
         else:
             raise TypeError("dirname must be str or Path")
 
+    def _get_binary_log_path(self, path: t.Union[str, Path]) -> str:
+        return os.path.splitext(str(path))[0] + ".flb"
+
     def _get_json_log_path(self, path: t.Union[str, Path]) -> str:
         json_path = str(path)
         if json_path.endswith('.log'):
@@ -154,17 +489,43 @@ class LoggerRegistry:
         if not self._configured:
             config = self._auto_load_config()
             self.configure(config)
+            if config.watch_interval > 0:
+                config_path = self._find_config_file()
+                if config_path is not None:
+                    self.watch_config(config_path, config.watch_interval)
 
-    def _auto_load_config(self) -> LoggerConfigStructure:
-        config_path = self._find_config_file()
-        if not config_path:
-            return LoggerConfigStructure()
-
-        return LoggerConfigStructure.from_yaml(config_path)
+    def watch_config(self, path: t.Union[str, Path], interval: float = 1.0) -> None:
+        # Re-apply ``path`` whenever it changes; an interval of 0 stops watching
+        with self._lock:
+            if self._config_watcher is not None:
+                self._config_watcher.stop()
+                self._config_watcher = None
+            if interval > 0:
+                self._config_watcher = ConfigWatcher(path, interval, self.configure)
+                self._config_watcher.start()
 
-    def _find_config_file(self) -> t.Optional[Path]:
+    def _auto_load_config(self) -> LoggerConfigStructure:
+        # The YAML file is parsed again only once it changed, so ``reset`` followed by logging stays cheap
+        root = os.getcwd()
+        config_path = self._find_config_file(root)
+        key: t.Tuple[t.Any, ...] = (root, None)
+        if config_path is not None:
+            try:
+                stat = config_path.stat()
+                key = (root, str(config_path), stat.st_mtime_ns, stat.st_size)
+            except OSError:
+                config_path = None
+        config = self._auto_configs.get(key)
+        if config is None:
+            config = LoggerConfigStructure.from_yaml(config_path) if config_path else LoggerConfigStructure()
+            if len(self._auto_configs) >= 16:  # Stale entries of edited files
+                self._auto_configs.clear()
+            self._auto_configs[key] = config
+        return config
+
+    def _find_config_file(self, root: t.Optional[str] = None) -> t.Optional[Path]:
         possible_files = ["fairyland-logger.yaml", "fairyland.yaml", "application.yaml", "logging.yaml"]
-        root_path = Path.cwd()
+        root_path = Path(root) if root else Path.cwd()
 
         for file_name in possible_files:
             config_file = root_path.joinpath(file_name)
@@ -174,90 +535,288 @@ class LoggerRegistry:
         return None
 
     @classmethod
-    def _should_log(cls, msg_level: t.Union[str, LogLevelEnum], eff_level: t.Union[str, LogLevelEnum]) -> bool:
-        msg_level = msg_level.value if isinstance(msg_level, LogLevelEnum) else msg_level
-        eff_level = eff_level.value if isinstance(eff_level, LogLevelEnum) else eff_level
-
+    def severity_of(cls, level: t.Union[str, LogLevelEnum]) -> int:
+        if isinstance(level, LogLevelEnum):
+            return level.severity
         try:
-            return cls._LOG_LEVEL_ORDER.index(msg_level) >= cls._LOG_LEVEL_ORDER.index(eff_level)
-        except ValueError:
-            return True
+            return cls._LOG_LEVEL_SEVERITY[level.upper()]
+        except KeyError:
+            raise ValueError(f"Unknown log level: {level!r}") from None
 
     def set_level(self, prefix: str, level: t.Union[str, LogLevelEnum]) -> None:
+        severity = self.severity_of(level)
+        with self._lock:
+            self._levels = {**self._levels, prefix: severity}
+            self._invalidate()
+
+    def set_rate_limit(self, prefix: str, rate: t.Optional[str]) -> None:
+        # ``rate`` like "100/s" or "600/m"; None removes the limit of this prefix
+        with self._lock:
+            if self._limiter is None:
+                if rate is None:
+                    return
+                self._set_limiter(RecordLimiter())
+                self._publish()
+            self._limiter.set_rate_limit(prefix, rate)
+
+    def effective_severity(self, logger_name: str) -> int:
+        return self._snapshot.threshold(logger_name)
+
+    def attach(self, logger: t.Any) -> None:
+        # Attached loggers get ``_refresh()`` called whenever levels or handlers change
         with self._lock:
-            self._levels[prefix] = level
+            self._listeners.add(logger)
+
+    def _publish(self) -> None:
+        # Called with the lock held whenever levels, appenders, limiter or logger files change
+        router = self._logger_file_router
+        self._snapshot = RoutingSnapshot(
+            severity=self._severity,
+            # An empty prefix never overrides the root level
+            levels=tuple(sorted(((p, s) for p, s in self._levels.items() if p), key=lambda item: len(item[0]), reverse=True)),
+            appenders=tuple(self._appenders),
+            recorder=self._recorder,
+            limiter=self._limiter,
+            binary=self._binary,
+            logger_files=router.routes if router is not None else MappingProxyType({}),
+        )
+
+    def _invalidate(self) -> None:
+        with self._lock:
+            self._publish()
+            for logger in list(self._listeners):
+                logger._refresh()
 
-    def _effective_level(self, logger_name: str) -> str:
-        best = ("", self._level)
-        for p, lvl in self._levels.items():
-            if logger_name.startswith(p) and len(p) > len(best[0]):
-                best = (p, lvl)
+    def bind_logger(self, logger_name: str, depth: int = 0, context: t.Optional[t.Dict[str, t.Any]] = None):
+        extra = {**context, "logger_name": logger_name} if context else {"logger_name": logger_name}
+        return _loguru_logger.bind(**extra).opt(depth=self._ROUTE_DEPTH + depth)
 
-        return best[1]
+    def gate_severity(self, logger_name: str) -> int:
+        # Threshold a logger checks before building a record: the flight recorder may want more than the handlers
+        snapshot = self._snapshot
+        severity = snapshot.threshold(logger_name)
+        recorder = snapshot.recorder
+        return min(severity, recorder.severity) if recorder is not None else severity
+
+    def is_enabled(self, logger_name: str, level: t.Union[str, LogLevelEnum]) -> bool:
+        return self.severity_of(level) >= self.effective_severity(logger_name)
 
     def register_logger_file(self, logger_name: str, dirname: str = "") -> None:
         if not self._config or not self._config.file or not logger_name:
             return
 
+        if logger_name in self._snapshot.logger_files:
+            return
+
         with self._lock:
             # Skip if already registered
-            if logger_name in self._logger_file_handlers:
+            if self._logger_file_router is not None and logger_name in self._logger_file_router:
                 return
 
-            # Build logger-specific file path
-            if logger_name.endswith(".log"):
-                log_filename = logger_name
-            else:
-                log_filename = f"{logger_name}.log"
+            if self._logger_file_router is None:
+                self._logger_file_router = self._add_logger_file_router()
+            self._logger_file_router.add(logger_name, self._logger_file_path(logger_name, dirname))
+            self._logger_file_dirs[logger_name] = dirname
+            self._publish()
 
-            if not dirname:
-                dirname = self._config.dirname
-            else:
-                dirname = os.path.join(self._config.dirname, dirname)
-                os.makedirs(dirname, exist_ok=True)
-
-            log_path = self._get_log_file_path(dirname, log_filename)
-
-            # Add logger-specific file handler
-            handler_id = _loguru_logger.add(
-                sink=log_path,
-                rotation=self._config.rotation,
-                retention=self._config.retention,
-                encoding=self._config.encoding.value if isinstance(self._config.encoding, Enum) else self._config.encoding,
-                level=self._level.value if isinstance(self._level, LogLevelEnum) else self._level,
-                format=self._config.pattern,
-                filter=lambda record: record["extra"].get("logger_name") == logger_name,
-                enqueue=True,
-                backtrace=True,
-                diagnose=True,
-            )
-
-            # Track the handler
-            self._logger_file_handlers[logger_name] = [handler_id]
-
-    def route(self, record: LoggerRecordStructure) -> None:
-        if not self._should_log(record.level, self._effective_level(record.name)):
+    def _logger_file_path(self, logger_name: str, dirname: str = "") -> t.Union[str, Path]:
+        # Build logger-specific file path
+        if logger_name.endswith(".log"):
+            log_filename = logger_name
+        else:
+            log_filename = f"{logger_name}.log"
+
+        if not dirname:
+            dirname = self._config.dirname
+        else:
+            dirname = os.path.join(self._config.dirname, dirname)
+            os.makedirs(dirname, exist_ok=True)
+
+        return self._get_log_file_path(dirname, log_filename)
+
+    def _replace_logger_file_router(self, previous: t.Optional[LoggerConfigStructure]) -> None:
+        # No gap: every route is registered again before records go to the new router
+        old_router, old_queue, old_handler_id = self._logger_file_router, self._logger_file_queue, self._logger_file_handler_id
+        if not self._config.file:
+            self._logger_file_router = self._logger_file_queue = self._logger_file_handler_id = None
+            _loguru_logger.remove(old_handler_id)  # Writes out the queue and closes the files
             return
 
-        depth = record.depth + 5
-        msg = f"[{record.name}] {record.message}" if record.name else record.message
-
-        extra_context = {"logger_name": record.name}
-        self._log_message(record.level, msg, depth, extra_context)
-
-    def _log_message(self, level: LogLevelEnum, msg: str, depth: int, extra: t.Dict[str, t.Any]) -> None:
-        log_method = self._get_log_method(level)
-        log_method(depth, msg, extra)
-
-    def _get_log_method(self, level: LogLevelEnum) -> t.Callable:
-        level_methods = {
-            LogLevelEnum.TRACE: lambda d, m, e: _loguru_logger.opt(depth=d).bind(**e).trace(m),
-            LogLevelEnum.DEBUG: lambda d, m, e: _loguru_logger.opt(depth=d).bind(**e).debug(m),
-            LogLevelEnum.INFO: lambda d, m, e: _loguru_logger.opt(depth=d).bind(**e).info(m),
-            LogLevelEnum.WARNING: lambda d, m, e: _loguru_logger.opt(depth=d).bind(**e).warning(m),
-            LogLevelEnum.ERROR: lambda d, m, e: _loguru_logger.opt(depth=d).bind(**e).error(m),
-            LogLevelEnum.SUCCESS: lambda d, m, e: _loguru_logger.opt(depth=d).bind(**e).success(m),
-            LogLevelEnum.CRITICAL: lambda d, m, e: _loguru_logger.opt(depth=d).bind(**e).critical(m),
-        }
+        tracebacks = self._config.traceback_options("logger_files")
+        if previous is not None and previous.traceback_options("logger_files") == tracebacks:
+            # Same handler: the queue writes what it holds to the old files and closes them before opening the new
+            router = self._new_logger_file_router(old_router.routes)
+            self._logger_file_patterns = self._logger_file_renderer.patterns(self._config.pattern)
+            old_queue.maxsize = self._config.queue_size
+            old_queue.policy = getattr(self._config.queue_policy, "value", self._config.queue_policy)
+            self._logger_file_router = router
+            old_queue.retarget(router)
+            return
+
+        # Traceback settings belong to the loguru handler: the new one goes in before the old one goes out
+        self._logger_file_router = self._add_logger_file_router(old_router.routes)
+        _loguru_logger.remove(old_handler_id)
+
+    def _new_logger_file_router(self, logger_names: t.Iterable[str] = ()) -> LoggerFileRouter:
+        router = LoggerFileRouter(
+            rotation=self._config.rotation,
+            retention=self._config.retention,
+            encoding=self._config.encoding.value if isinstance(self._config.encoding, Enum) else self._config.encoding,
+            compression=self._config.compression,
+            index=self._config.index,
+            max_open=self._config.logger_files_max_open,
+            idle_timeout=self._config.logger_files_idle_timeout,
+            **self._buffer_options(self._config),
+        )
+        router.severity = self._severity
+        for logger_name in logger_names:
+            router.add(logger_name, self._logger_file_path(logger_name, self._logger_file_dirs.get(logger_name, "")))
+        return router
+
+    def _add_logger_file_router(self, logger_names: t.Iterable[str] = ()) -> LoggerFileRouter:
+        router = self._new_logger_file_router(logger_names)
+        queue = QueuedSink(router, self._config.queue_size, self._config.queue_policy, report_queue_recovery, name="logger-files")
+        tracebacks = self._config.traceback_options("logger_files")
+        self._logger_file_renderer = TracebackRenderer(tracebacks)
+        self._logger_file_patterns = self._logger_file_renderer.patterns(self._config.pattern)
+        handler_id = _loguru_logger.add(
+            sink=queue,
+            level=HANDLER_LEVEL,
+            format=self._logger_file_format,
+            filter=functools.partial(self._accepts_logger_file, queue),
+            backtrace=tracebacks.backtrace,
+            diagnose=tracebacks.diagnose,
+        )
+        # Switches every record from the previous handler, if any, to this one at once
+        self._logger_file_queue, self._logger_file_handler_id = queue, handler_id
+        return router
+
+    def _logger_file_format(self, record: t.Dict[str, t.Any]) -> str:
+        line_pattern, exception_pattern = self._logger_file_patterns
+        return resolve_pattern(exception_pattern if EXCEPTION_KEY in record["extra"] else line_pattern, record["extra"])
+
+    def _accepts_logger_file(self, queue: QueuedSink, record: t.Dict[str, t.Any]) -> bool:
+        router = self._logger_file_router
+        return queue is self._logger_file_queue and router is not None and router.accepts(record)
+
+    def route(self, record: LoggerRecordStructure, sink: t.Any = None) -> None:
+        # ``sink`` is a loguru logger pre-bound by ``bind_logger`` for this record's name and depth
+        # One read of the published snapshot: no lock, and a concurrent reconfigure cannot mix old and new state
+        snapshot = self._snapshot
+        stats = self._stats.shard()  # This thread's counters
+        recorder = snapshot.recorder
+        severity = self._LOG_LEVEL_SEVERITY[record.level]
+        if severity < snapshot.threshold(record.name):
+            if recorder is not None and severity >= recorder.severity:
+                self._record_flight(recorder, record, severity, self._render_message(record.message, record.args))
+            stats.filtered += 1
+            return
+
+        limiter = snapshot.limiter
+        suppressed = 0
+        if limiter is not None and limiter.rate_limited:
+            suppressed = limiter.acquire(record.name, self._call_site_key(record) if limiter.by_call_site else None)
+            if suppressed is None:
+                stats.rate_limited += 1
+                return
+
+        if sink is None:
+            sink = self.bind_logger(record.name, record.depth)
+
+        msg = self._render_message(record.message, record.args)
+        prefix = f"[{record.name}] " if record.name else ""
+        if recorder is not None:
+            self._record_flight(recorder, record, severity, msg)
+
+        if limiter is not None and limiter.dedupe:
+            previous = limiter.repeat(record.name, record.level, msg)
+            if previous is None:
+                stats.deduplicated += 1
+                return
+            if previous[1]:
+                sink.log(previous[0], f"{prefix}Last message repeated {previous[1]} times")
+        if suppressed:
+            sink.log(record.level, f"{prefix}{suppressed} records suppressed by rate limit")
+
+        msg = prefix + msg
+        extra = record.extra
+        if snapshot.binary and record.args and isinstance(record.message, str):
+            extra = {**extra, TEMPLATE_KEY: (record.message, record.args)}
+        if record.exception is not None:
+            extra = {**extra, EXCEPTION_KEY: record.exception}
+        if extra:
+            sink = sink.bind(**extra)
+        if record.call_site is not None:
+            sink = sink.patch(functools.partial(self._apply_call_site, record.call_site))
+        sink.log(record.level, msg)
+        stats.emitted(record.name, record.level)
+
+    def _call_site_key(self, record: LoggerRecordStructure) -> t.Optional[t.Tuple[str, int]]:
+        if record.call_site is not None:
+            return record.call_site.file, record.call_site.line
+        try:
+            frame = sys._getframe(self._ROUTE_DEPTH + record.depth + 1)
+        except ValueError:
+            return None
+        return frame.f_code.co_filename, frame.f_lineno
+
+    def _record_flight(self, recorder: FlightRecorderAppender, record: LoggerRecordStructure, severity: int, msg: str) -> None:
+        call_site = record.call_site
+        if call_site is not None:
+            location, timestamp = f"{call_site.name}:{call_site.function}:{call_site.line}", call_site.timestamp
+        else:
+            try:
+                frame = sys._getframe(self._ROUTE_DEPTH + record.depth + 1)
+                location = f"{frame.f_globals.get('__name__', '')}:{frame.f_code.co_name}:{frame.f_lineno}"
+            except ValueError:
+                location = ""
+            timestamp = time.time()
+        prefix = f"[{record.name}] " if record.name else ""
+        recorder.record(severity, f"{location} - {prefix}{msg}", timestamp)
+
+    @staticmethod
+    def _apply_call_site(call_site: LoggerCallSiteStructure, record: t.Dict[str, t.Any]) -> None:
+        # Restore the caller's location, thread and time on records emitted from a background writer
+        file_name = os.path.basename(call_site.file)
+        record["name"] = call_site.name
+        record["function"] = call_site.function
+        record["line"] = call_site.line
+        record["file"] = type(record["file"])(file_name, call_site.file)
+        record["module"] = os.path.splitext(file_name)[0]
+        record["thread"] = type(record["thread"])(call_site.thread_id, call_site.thread_name)
+
+        now = record["time"]
+        record["time"] = type(now).fromtimestamp(call_site.timestamp, now.tzinfo)
+        record["elapsed"] -= now - record["time"]
+
+    _render_message = staticmethod(render_message)
+
+
+def _after_fork_in_child() -> None:
+    # A lock held by another thread at fork time would never be released in the child
+    LoggerRegistry._lock = threading.RLock()
+    if LoggerRegistry._instance is not None:
+        LoggerRegistry._instance._central_writer = None
+        LoggerRegistry._instance._stats._after_fork_in_child()
+        LoggerRegistry._instance._stats_reporter = None
+        LoggerRegistry._instance._summary_ticker = None
+        LoggerRegistry._instance._recorder = None
+        LoggerRegistry._instance._config_watcher = None
+        LoggerRegistry._instance._publish()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def _flush_at_exit() -> None:
+    # Registered after the sinks' and loguru's own exit hooks, so it runs before they close the handlers
+    registry = LoggerRegistry._instance
+    if registry is not None and registry._configured and registry._limiter is not None:
+        try:
+            registry._write_summaries(registry._limiter)
+        except Exception as error:
+            print(f"fairylandlogger: failed to write limiter summaries: {error!r}", file=sys.stderr)
+
 
-        return level_methods.get(level, level_methods[LogLevelEnum.CRITICAL])
+atexit.register(_flush_at_exit)
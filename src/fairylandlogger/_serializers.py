@@ -0,0 +1,147 @@
+# coding: UTF-8
+"""
+@software: PyCharm
+@author: Lionel Johnson
+@contact: https://fairy.host
+@organization: https://github.com/FairylandFuture
+@datetime: 2026-10-17 11:05:27 UTC+08:00
+"""
+
+import json
+import os
+import sys
+import typing as t
+
+try:
+    import orjson as _orjson
+except ImportError:  # pragma: no cover - optional dependency
+    _orjson = None
+
+from ._binary import TEMPLATE_KEY
+from ._messages import strip_logger_prefix
+from ._tracebacks import EXCEPTION_KEY
+
+_FIELD_GETTERS: t.Dict[str, t.Callable[[t.Dict[str, t.Any]], t.Any]] = {
+    "time": lambda record: record["time"].isoformat(timespec="milliseconds"),
+    "timestamp": lambda record: record["time"].timestamp(),
+    "level": lambda record: record["level"].name,
+    "logger": lambda record: record["extra"].get("logger_name", ""),
+    "name": lambda record: record["name"],
+    "module": lambda record: record["module"],
+    "function": lambda record: record["function"],
+    "line": lambda record: record["line"],
+    "file": lambda record: record["file"].path,
+    "message": lambda record: strip_logger_prefix(record["message"], record["extra"].get("logger_name")),
+    "process": lambda record: record["process"].id,
+    "process_name": lambda record: record["process"].name,
+    "thread": lambda record: record["thread"].id,
+    "thread_name": lambda record: record["thread"].name,
+    "elapsed": lambda record: record["elapsed"].total_seconds(),
+}
+
+JSON_FIELDS: t.Tuple[str, ...] = tuple(_FIELD_GETTERS) + ("exception",)
+DEFAULT_JSON_FIELDS: t.Tuple[str, ...] = (
+    "time", "level", "logger", "name", "function", "line", "message", "process", "thread", "exception",
+)
+
+
+class JSONRecordSerializer:
+    """
+    Encode a loguru record as one flat JSON line.
+
+    Only the configured ``fields`` are emitted, followed by the caller's extras as top-level keys (fields win
+    on conflicts). ``message`` comes without the "[<logger>] " prefix of the text log, which is in ``logger``.
+    ``exception`` is only present when the record carries one. orjson is used when installed and the output
+    encoding is UTF-8, the stdlib ``json`` module otherwise.
+    """
+
+    def __init__(self, fields: t.Optional[t.Iterable[str]] = None, encoding: str = "UTF-8", use_orjson: t.Optional[bool] = None):
+        fields = tuple(fields or DEFAULT_JSON_FIELDS)
+        unknown = [field for field in fields if field not in JSON_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown JSON fields: {unknown}")
+
+        self.fields = fields
+        self.encoding = encoding
+        self._getters = [(field, _FIELD_GETTERS[field]) for field in fields if field != "exception"]
+        self._with_exception = "exception" in fields
+
+        if use_orjson is None:
+            use_orjson = _orjson is not None and encoding.replace("-", "").upper() == "UTF8"
+        elif use_orjson and _orjson is None:
+            raise ImportError("orjson is not installed")
+        self._dumps = self._dumps_orjson if use_orjson else self._dumps_stdlib
+
+    def __call__(self, record: t.Dict[str, t.Any], exception: str = "") -> bytes:
+        document = {field: getter(record) for field, getter in self._getters}
+        if exception and self._with_exception:
+            document["exception"] = exception
+
+        extra = record["extra"]
+        if len(extra) > 1 or "logger_name" not in extra:
+            for key, value in extra.items():
+                if key != "logger_name" and key != TEMPLATE_KEY and key != EXCEPTION_KEY and key not in document:
+                    document[key] = value
+
+        return self._dumps(document)
+
+    @staticmethod
+    def _dumps_orjson(document: t.Dict[str, t.Any]) -> bytes:
+        return _orjson.dumps(document, default=str, option=_orjson.OPT_APPEND_NEWLINE)
+
+    def _dumps_stdlib(self, document: t.Dict[str, t.Any]) -> bytes:
+        return (json.dumps(document, default=str, ensure_ascii=False, separators=(",", ":")) + "\n").encode(self.encoding)
+
+
+# loguru level number -> RFC 5424 severity (7 debug ... 2 critical); SUCCESS is "notice"
+_SYSLOG_SEVERITY = {5: 7, 10: 7, 20: 6, 25: 5, 30: 4, 40: 3, 50: 2}
+_SD_ESCAPES = str.maketrans({"\\": "\\\\", '"': '\\"', "]": "\\]"})
+
+
+class SyslogRecordSerializer:
+    """
+    Encode a loguru record as an RFC 5424 syslog message.
+
+    Extras go into one structured data element (``[fairy@32473 key="value" ...]``) and the exception, if any,
+    follows the message on the next lines. ``framing`` is ``octet`` (RFC 6587 octet counting, for TCP),
+    ``newline`` or ``none`` (one message per UDP datagram).
+    """
+
+    def __init__(self, app_name: str = "", facility: int = 1, framing: str = "octet", encoding: str = "UTF-8"):
+        import socket  # Only for the host name; keeps it out of ``import fairylandlogger``
+
+        if framing not in ("octet", "newline", "none"):
+            raise ValueError(f"Invalid syslog framing: {framing!r}")
+        app_name = app_name or os.path.splitext(os.path.basename(sys.argv[0] if sys.argv and sys.argv[0] else ""))[0]
+        self.app_name = self._token(app_name, 48)
+        self.hostname = self._token(socket.gethostname(), 255)
+        self.facility = facility
+        self.framing = framing
+        self.encoding = encoding
+
+    @staticmethod
+    def _token(value: str, limit: int) -> str:
+        # Printable US-ASCII without spaces, "-" when empty
+        value = "".join(c for c in value if 33 <= ord(c) <= 126)[:limit]
+        return value or "-"
+
+    def __call__(self, record: t.Dict[str, t.Any], exception: str = "") -> bytes:
+        priority = self.facility * 8 + _SYSLOG_SEVERITY.get(record["level"].no, 6)
+        extra = record["extra"]
+        params = " ".join(
+            f'{self._token(str(key).replace("=", ""), 32)}="{str(value).translate(_SD_ESCAPES)}"'
+            for key, value in extra.items()
+            if key != TEMPLATE_KEY and key != EXCEPTION_KEY
+        )
+        structured = f"[fairy@32473 {params}]" if params else "-"
+        message = strip_logger_prefix(record["message"], extra.get("logger_name")) + ("\n" + exception if exception else "")
+        head = (
+            f"<{priority}>1 {record['time'].isoformat(timespec='microseconds')} {self.hostname} {self.app_name} "
+            f"{record['process'].id} {self._token(record['level'].name, 32)} {structured} "
+        )
+        data = head.encode("ascii", "replace") + message.encode(self.encoding, "replace")
+        if self.framing == "octet":
+            return b"%d %s" % (len(data), data)
+        if self.framing == "newline":
+            return data.replace(b"\n", b" ") + b"\n"
+        return data
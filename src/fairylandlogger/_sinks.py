@@ -0,0 +1,1061 @@
+# coding: UTF-8
+"""
+@software: PyCharm
+@author: Lionel Johnson
+@contact: https://fairy.host
+@organization: https://github.com/FairylandFuture
+@datetime: 2026-10-17 09:12:40 UTC+08:00
+"""
+
+import atexit
+import collections
+import concurrent.futures
+import datetime
+import glob
+import heapq
+import importlib
+import os
+import shutil
+import re
+import threading
+import time
+import typing as t
+import sys
+import weakref
+from pathlib import Path
+from types import MappingProxyType
+
+from ._index import SegmentIndex, index_path
+from ._stats import LatencyHistogram
+
+_SIZE_UNITS: t.Dict[str, int] = {"B": 1, "KB": 1024, "MB": 1024 ** 2, "GB": 1024 ** 3, "TB": 1024 ** 4}
+_DURATION_UNITS: t.Dict[str, int] = {
+    "second": 1,
+    "minute": 60,
+    "hour": 3600,
+    "day": 86400,
+    "week": 7 * 86400,
+    "month": 30 * 86400,
+    "year": 365 * 86400,
+}
+_SIZE_PATTERN = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([KMGT]?B)\s*$", re.IGNORECASE)
+_DURATION_PATTERN = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*(second|minute|hour|day|week|month|year)s?\s*$", re.IGNORECASE)
+_WEEKDAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+# loguru's wall-clock rotation: "00:00", "18:30:15", "monday", "w0", "monday at 12:00"
+_DAYTIME_PATTERN = re.compile(
+    rf"^\s*(?:({'|'.join(_WEEKDAYS)}|w[0-6])\s*)?(?:(?:at\s+)?(\d{{1,2}}):(\d{{2}})(?::(\d{{2}}))?)?\s*$", re.IGNORECASE,
+)
+# name -> (extension, codec module); codecs are imported by the compressor on first use
+_COMPRESSION: t.Dict[str, t.Tuple[str, str]] = {
+    "gzip": (".gz", "gzip"),
+    "bz2": (".bz2", "bz2"),
+    "lzma": (".xz", "lzma"),
+}
+_URGENT_LEVEL_NO = 40  # ERROR and above bypass write buffering
+_KEEP_LEVEL_NO = 30  # WARNING and above survive the drop_below_level policy
+_PROMPT_LEVEL_NO = 30  # WARNING and above reach the console without waiting for the next batch
+
+
+def parse_size(value: str) -> t.Optional[int]:
+    match = _SIZE_PATTERN.match(value)
+    if not match:
+        return None
+    return int(float(match.group(1)) * _SIZE_UNITS[match.group(2).upper()])
+
+
+def parse_duration(value: str) -> t.Optional[float]:
+    match = _DURATION_PATTERN.match(value)
+    if not match:
+        return None
+    return float(match.group(1)) * _DURATION_UNITS[match.group(2).lower()]
+
+
+def parse_daytime(value: str) -> t.Optional[t.Tuple[t.Optional[int], int]]:
+    # (weekday with Monday 0 or None for every day, seconds after midnight)
+    match = _DAYTIME_PATTERN.match(value)
+    if not match or not (match.group(1) or match.group(2)):
+        return None
+    day, hour, minute, second = match.groups()
+    hour, minute, second = int(hour or 0), int(minute or 0), int(second or 0)
+    if hour > 23 or minute > 59 or second > 59:
+        return None
+    weekday = None
+    if day:
+        day = day.lower()
+        weekday = int(day[1]) if len(day) == 2 else _WEEKDAYS.index(day)
+    return weekday, hour * 3600 + minute * 60 + second
+
+
+def next_daytime(daytime: t.Tuple[t.Optional[int], int], after: float) -> float:
+    # First local time matching ``daytime`` later than the timestamp ``after``
+    weekday, offset = daytime
+    moment = datetime.datetime.fromtimestamp(after)
+    candidate = moment.replace(hour=0, minute=0, second=0, microsecond=0) + datetime.timedelta(seconds=offset)
+    if weekday is not None:
+        candidate += datetime.timedelta(days=(weekday - moment.weekday()) % 7)
+    if candidate.timestamp() <= after:
+        candidate += datetime.timedelta(days=1 if weekday is None else 7)
+    return candidate.timestamp()
+
+
+class RotatingFileSink:
+    """
+    Plain file writer with size, interval or time of day based rotation and age or count based retention.
+
+    ``rotation`` takes the string forms of loguru: a size ("5 MB"), an interval ("1 day") or a local time of
+    day, optionally on one weekday ("00:00", "monday at 12:00").
+
+    Rotated segments are renamed to ``<stem>.<YYYY-MM-DD_HH-MM-SS_ffffff><suffix>``, like loguru does.
+
+    With ``buffer_size`` > 0 records are collected in memory and written in one call once the buffer holds
+    ``buffer_size`` bytes or ``flush_records`` records, every ``flush_interval`` seconds, and immediately for
+    ERROR/CRITICAL records. ``fsync`` forces the data to disk after each write.
+
+    Rotation deadlines and retention belong to the shared ``rotation_scheduler``: the write path only compares
+    the segment's byte counter with ``_rotate_limit``, and retention runs in the scheduler thread. With
+    ``compression`` (gzip, bz2 or lzma) rotated segments are compressed by a background worker pool first, so
+    rotation only costs a rename on the write path.
+
+    With ``index`` every segment gets a sparse sidecar index (``<segment>.idx``, see ``SegmentIndex``) that
+    ``fairylandlogger query`` uses to read only the byte ranges that can match.
+
+    With a ``pool`` the file is only kept open while the pool allows it; a sink closed by the pool keeps its
+    segment and reopens it in append mode on the next write.
+    """
+
+    def __init__(
+            self,
+            path: t.Union[str, Path],
+            rotation: t.Optional[str] = None,
+            retention: t.Optional[t.Union[str, int]] = None,
+            encoding: str = "UTF-8",
+            buffer_size: t.Union[str, int] = 0,
+            flush_records: int = 0,
+            flush_interval: float = 0.0,
+            fsync: bool = False,
+            compression: t.Optional[str] = None,
+            header: t.Optional[t.Callable[[bool], bytes]] = None,
+            index: bool = False,
+            pool: t.Optional["FileHandlePool"] = None,
+    ):
+        self.path = str(path)
+        self.pool = pool
+        self.header = header  # ``header(fresh)`` is written whenever a segment is opened, for self-describing formats
+        self.rotation = rotation
+        self.retention = retention
+        self.encoding = encoding
+        self.buffer_size = parse_size(buffer_size) if isinstance(buffer_size, str) else buffer_size
+        if self.buffer_size is None:
+            raise ValueError(f"Invalid buffer_size: {buffer_size!r}")
+        self.flush_records = flush_records
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.compression = getattr(compression, "value", compression) or None
+        if self.compression is not None and self.compression not in _COMPRESSION:
+            raise ValueError(f"Invalid compression: {compression!r}, expected one of {sorted(_COMPRESSION)}")
+        self.index = index
+        self._rotation_size: t.Optional[int] = None
+        self._rotation_interval: t.Optional[float] = None
+        self._rotation_daytime: t.Optional[t.Tuple[t.Optional[int], int]] = None
+        self._retention_age: t.Optional[float] = None
+        self._retention_count: t.Optional[int] = None
+
+        if rotation:
+            self._rotation_size = parse_size(rotation)
+            if self._rotation_size is None:
+                self._rotation_interval = parse_duration(rotation)
+                if self._rotation_interval is None:
+                    self._rotation_daytime = parse_daytime(rotation)
+                    if self._rotation_daytime is None:
+                        raise ValueError(f"Invalid rotation: {rotation!r}")
+
+        if isinstance(retention, int):
+            self._retention_count = retention
+        elif retention:
+            self._retention_age = parse_duration(retention)
+            if self._retention_age is None:
+                raise ValueError(f"Invalid retention: {retention!r}")
+
+        self._lock = threading.Lock()
+        self._file: t.Optional[t.BinaryIO] = None
+        self._size: int = 0  # Bytes in the current segment, counted by the writer rather than stat-ed
+        self._opened_at: float = 0.0
+        # The next write rotates once the segment would exceed this; the scheduler lowers it when an interval ends
+        self._rotate_limit: float = self._rotation_size if self._rotation_size is not None else float("inf")
+        self._rotate_deadline: float = 0.0
+        self._resume = False  # The pool closed the file, the next open continues the same segment
+        self._used_at: float = 0.0  # Last write, for the pool's least recently used order
+        self._buffer: t.List[bytes] = []
+        self._buffered_bytes: int = 0
+        self._marks: t.List[t.Tuple[int, float, int]] = []  # (length, timestamp, level number) of buffered records
+        self._index: t.Optional[SegmentIndex] = None
+        self._flushed_at: float = time.monotonic()
+        self.bytes_written: int = 0
+
+        if self.buffered and flush_interval > 0:
+            _flusher.register(self)
+        _open_sinks[self.path] = self
+
+    @property
+    def buffered(self) -> bool:
+        return self.buffer_size > 0
+
+    def spec(self) -> t.Dict[str, t.Any]:
+        # Constructor arguments, used to re-create the sink in a central writer process
+        return {
+            "path": self.path,
+            "rotation": self.rotation,
+            "retention": self.retention,
+            "encoding": self.encoding,
+            "buffer_size": self.buffer_size,
+            "flush_records": self.flush_records,
+            "flush_interval": self.flush_interval,
+            "fsync": self.fsync,
+            "compression": self.compression,
+            "index": self.index,
+        }
+
+    def _next_rotation(self, after: float) -> float:
+        if self._rotation_interval is not None:
+            return after + self._rotation_interval
+        return next_daytime(self._rotation_daytime, after)
+
+    def _open(self) -> t.BinaryIO:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._file = open(self.path, "ab")
+        self._size = self._file.tell()
+        if self._resume:
+            self._resume = False
+        else:
+            self._opened_at = time.time()
+            if self._rotation_interval is not None or self._rotation_daytime is not None:
+                self._rotate_limit = float("inf")
+                self._rotate_deadline = self._next_rotation(self._opened_at)
+                rotation_scheduler.schedule(self, self._rotate_deadline)
+        if self.pool is not None:
+            self.pool.opened(self)
+        if self.header is not None:
+            data = self.header(self._size == 0)
+            self._file.write(data)
+            self._size += len(data)
+        if self.index:
+            self._index = SegmentIndex(self.path)
+            self._index.open()
+        return self._file
+
+    def write(self, message: str) -> None:
+        record = getattr(message, "record", None)
+        if record is None:
+            self.write_bytes(message.encode(self.encoding))
+            return
+        self.write_bytes(message.encode(self.encoding), record["level"].no, record["time"].timestamp())
+
+    def write_bytes(self, data: bytes, level_no: int = 0, timestamp: float = 0.0) -> None:
+        self.bytes_written += len(data)
+        forwarder = _forwarder
+        if forwarder is not None:
+            forwarder.send(self, data, level_no, timestamp)
+            return
+        self.write_local(data, level_no, timestamp)
+
+    def write_local(self, data: bytes, level_no: int = 0, timestamp: float = 0.0) -> None:
+        with self._lock:
+            if self.pool is not None:
+                self._used_at = time.monotonic()
+            if not self.buffered:
+                self._write(data, ((len(data), timestamp, level_no),) if self.index else ())
+                return
+
+            self._buffer.append(data)
+            self._buffered_bytes += len(data)
+            if self.index:
+                self._marks.append((len(data), timestamp, level_no))
+            if (
+                    self._buffered_bytes >= self.buffer_size
+                    or (self.flush_records and len(self._buffer) >= self.flush_records)
+                    or level_no >= _URGENT_LEVEL_NO
+            ):
+                self._drain()
+
+    def drain(self) -> None:
+        # Not named ``flush``: loguru would call it after every single record
+        with self._lock:
+            self._drain()
+
+    def _drain(self) -> None:
+        self._flushed_at = time.monotonic()
+        if not self._buffer:
+            return
+        data = b"".join(self._buffer)
+        marks = self._marks
+        self._buffer.clear()
+        self._buffered_bytes = 0
+        self._marks = []
+        self._write(data, marks)
+
+    def _write(self, data: bytes, marks: t.Sequence[t.Tuple[int, float, int]] = ()) -> None:
+        stream = self._file or self._open()
+        if self._size > 0 and self._size + len(data) > self._rotate_limit:
+            self._rotate()
+            stream = self._open()
+        offset = self._size
+        stream.write(data)
+        stream.flush()
+        if self.fsync:
+            os.fsync(stream.fileno())
+        self._size += len(data)
+
+        index = self._index
+        if index is not None:
+            for length, timestamp, level_no in marks:
+                index.add(offset, length, timestamp, level_no)
+                offset += length
+
+    def _close_file(self) -> None:
+        self._file.close()
+        self._file = None
+        if self.pool is not None:
+            self.pool.closed(self)
+
+    def _rotate(self) -> None:
+        self._close_file()
+
+        root, suffix = os.path.splitext(self.path)
+        stamp = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S_%f")
+        rotated = f"{root}.{stamp}{suffix}"
+        os.replace(self.path, rotated)
+        if self._index is not None:
+            self._index.close()
+            self._index = None
+            os.replace(index_path(self.path), index_path(rotated))
+        if self.compression is not None:
+            _compressor.submit(self, rotated)
+        else:
+            rotation_scheduler.retain(self)
+        rotation_scheduler.rotations += 1
+
+    def rotated_files(self) -> t.List[str]:
+        # Plain and compressed segments; in-progress ``.tmp`` files of the compressor are not included
+        root, suffix = os.path.splitext(self.path)
+        # Rotation stamps start with the year, which keeps ``app.db.log`` out of the segments of ``app.log``
+        pattern = f"{glob.escape(root)}.[0-9][0-9][0-9][0-9]-*{glob.escape(suffix)}"
+        paths = glob.glob(pattern)
+        for extension, _ in _COMPRESSION.values():
+            paths.extend(glob.glob(pattern + extension))
+        return [p for p in paths if p != self.path]
+
+    @property
+    def has_retention(self) -> bool:
+        return self._retention_age is not None or self._retention_count is not None
+
+    def _segment_time(self, path: str) -> t.Optional[float]:
+        # Rotation time from the stamp in the segment name, which saves a stat per segment
+        offset = len(os.path.splitext(self.path)[0]) + 1
+        try:
+            return datetime.datetime.strptime(path[offset:offset + 26], "%Y-%m-%d_%H-%M-%S_%f").timestamp()
+        except ValueError:
+            try:
+                return os.stat(path).st_mtime
+            except OSError:  # Removed meanwhile, e.g. replaced by its compressed segment
+                return None
+
+    def _apply_retention(self) -> int:
+        # Runs in the scheduler thread; returns the number of segments removed
+        if not self.has_retention:
+            return 0
+
+        files = []
+        for path in self.rotated_files():
+            rotated_at = self._segment_time(path)
+            if rotated_at is not None:
+                files.append((rotated_at, path))
+        files.sort(reverse=True)
+
+        if self._retention_count is not None:
+            expired = [path for _, path in files[self._retention_count:]]
+        else:
+            limit = time.time() - self._retention_age
+            expired = [path for rotated_at, path in files if rotated_at < limit]
+
+        for path in expired:
+            for expired_path in (path, index_path(path)):
+                try:
+                    os.remove(expired_path)
+                except OSError:
+                    pass
+        return len(expired)
+
+    def release(self) -> None:
+        # Called by the pool with ``_lock`` held: close the handle but keep the segment and any buffered records
+        self._file.close()
+        self._file = None
+        self._resume = True
+        if self._index is not None:
+            self._index.close()
+            self._index = None
+
+    def stop(self) -> None:
+        with self._lock:
+            self._drain()
+            if self._file is not None:
+                self._close_file()
+            if self._index is not None:
+                self._index.close()
+                self._index = None
+
+    def _after_fork_in_child(self) -> None:
+        # Records buffered before the fork belong to the parent; the child must not write them again
+        self._lock = threading.Lock()
+        self._buffer.clear()
+        self._buffered_bytes = 0
+        self._marks = []
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self._index is not None:
+            # The open block also describes the parent's records, only the parent appends it
+            self._index._block = None
+            self._index.close()
+            self._index = None
+
+
+class SerializingSink:
+    """
+    Loguru sink that encodes each record with ``serializer`` and appends the bytes to ``target``.
+
+    The handler is expected to use an empty pattern, so the formatted message only carries the rendered
+    exception (if any) and the text pattern is never rendered.
+    """
+
+    def __init__(self, target: RotatingFileSink, serializer: t.Callable[..., bytes]):
+        self.target = target
+        self.serializer = serializer
+
+    def write(self, message) -> None:
+        record = message.record
+        exception = message[1:].rstrip("\n") if len(message) > 1 else ""
+        self.target.write_bytes(self.serializer(record, exception), record["level"].no, record["time"].timestamp())
+
+    @property
+    def bytes_written(self) -> int:
+        return self.target.bytes_written
+
+    def drain(self) -> None:
+        self.target.drain()
+
+    def stop(self) -> None:
+        self.target.stop()
+
+
+class _PeriodicFlusher:
+    """
+    One daemon thread draining every interval-flushed sink, plus a final drain at interpreter exit.
+    """
+
+    def __init__(self):
+        self._sinks: "weakref.WeakSet[RotatingFileSink]" = weakref.WeakSet()
+        self._lock = threading.Lock()
+        self._thread: t.Optional[threading.Thread] = None
+
+    def register(self, sink: RotatingFileSink) -> None:
+        with self._lock:
+            self._sinks.add(sink)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="fairylandlogger-flusher", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            sinks = list(self._sinks)
+            time.sleep(min((sink.flush_interval for sink in sinks), default=1.0))
+            now = time.monotonic()
+            for sink in sinks:
+                if now - sink._flushed_at >= sink.flush_interval:
+                    sink.drain()
+
+    def drain_all(self) -> None:
+        for sink in list(self._sinks):
+            sink.drain()
+
+
+_flusher = _PeriodicFlusher()
+atexit.register(_flusher.drain_all)
+
+
+class _SegmentCompressor:
+    """
+    Worker pool compressing rotated segments off the write path.
+
+    A segment is written to ``<segment><ext>.tmp``, renamed into place with the original modification time (so
+    age and count based retention keep their order), and only then is the plain segment removed.
+    """
+
+    def __init__(self, workers: int = 2):
+        self.workers = workers
+        self._lock = threading.Lock()
+        self._pool: t.Optional[concurrent.futures.ThreadPoolExecutor] = None
+
+    def submit(self, sink: RotatingFileSink, path: str) -> concurrent.futures.Future:
+        with self._lock:
+            if self._pool is None:
+                self._pool = concurrent.futures.ThreadPoolExecutor(self.workers, thread_name_prefix="fairylandlogger-compress")
+            return self._pool.submit(self._compress, sink, path)
+
+    @staticmethod
+    def _compress(sink: RotatingFileSink, path: str) -> None:
+        extension, codec = _COMPRESSION[sink.compression]
+        opener = importlib.import_module(codec).open
+        target = path + extension
+        try:
+            stat = os.stat(path)
+            with open(path, "rb") as source, opener(target + ".tmp", "wb") as compressed:
+                shutil.copyfileobj(source, compressed, 1024 * 1024)
+            os.utime(target + ".tmp", (stat.st_atime, stat.st_mtime))
+            os.replace(target + ".tmp", target)
+            os.remove(path)
+        except FileNotFoundError:  # Expired by retention before it was compressed
+            pass
+        except OSError as error:
+            print(f"fairylandlogger: failed to compress {path}: {error!r}", file=sys.stderr)
+            try:
+                os.remove(target + ".tmp")
+            except OSError:
+                pass
+        rotation_scheduler.retain(sink)
+
+    def join(self) -> None:
+        # Wait for every submitted segment; the pool is re-created on the next submit
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
+
+
+_compressor = _SegmentCompressor()
+
+
+class RotationScheduler:
+    """
+    One daemon thread owning the rotation deadlines and the retention of every ``RotatingFileSink``.
+
+    Interval based sinks register the end of their current segment; when it passes, the scheduler lowers the
+    sink's ``_rotate_limit`` so its next write rotates, without a clock read per write. Sinks with a retention
+    policy queue themselves after each rotation and the expired segments are deleted here, off the write path.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._deadlines: t.List[t.Tuple[float, int, "weakref.ref[RotatingFileSink]"]] = []  # heap
+        self._sequence = 0
+        self._pending: "collections.OrderedDict[int, RotatingFileSink]" = collections.OrderedDict()
+        self._busy = False
+        self._thread: t.Optional[threading.Thread] = None
+        self.rotations: int = 0
+        self.deleted: int = 0
+
+    def schedule(self, sink: RotatingFileSink, deadline: float) -> None:
+        with self._cond:
+            self._sequence += 1
+            heapq.heappush(self._deadlines, (deadline, self._sequence, weakref.ref(sink)))
+            self._start()
+            self._cond.notify()
+
+    def retain(self, sink: RotatingFileSink) -> None:
+        if not sink.has_retention:
+            return
+        with self._cond:
+            self._pending[id(sink)] = sink  # Several rotations before the thread runs need one pass
+            self._start()
+            self._cond.notify()
+
+    def _start(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="fairylandlogger-rotation", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while True:
+                    self._expire_deadlines(time.time())
+                    if self._pending:
+                        break
+                    timeout = self._deadlines[0][0] - time.time() if self._deadlines else None
+                    self._cond.wait(timeout)
+                sinks = list(self._pending.values())
+                self._pending.clear()
+                self._busy = True
+
+            deleted = 0
+            for sink in sinks:
+                try:
+                    deleted += sink._apply_retention()
+                except Exception as error:
+                    print(f"fairylandlogger: retention of {sink.path} failed: {error!r}", file=sys.stderr)
+
+            with self._cond:
+                self.deleted += deleted
+                self._busy = False
+                self._cond.notify_all()
+
+    def _expire_deadlines(self, now: float) -> None:
+        while self._deadlines and self._deadlines[0][0] <= now:
+            deadline, _, ref = heapq.heappop(self._deadlines)
+            sink = ref()
+            if sink is None or sink._rotate_deadline != deadline:  # Closed, or a newer segment was opened since
+                continue
+            if sink._size > 0:
+                sink._rotate_limit = 0
+            else:
+                # Nothing was written during the interval: keep the empty segment for another one
+                sink._rotate_deadline = sink._next_rotation(deadline)
+                self._sequence += 1
+                heapq.heappush(self._deadlines, (sink._rotate_deadline, self._sequence, ref))
+
+    def join(self, timeout: float = 5.0) -> None:
+        # Wait until every queued retention pass is done
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._pending or self._busy:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+    def stats(self) -> t.Dict[str, int]:
+        return {"rotations": self.rotations, "deleted": self.deleted, "scheduled": len(self._deadlines)}
+
+    def _after_fork_in_child(self) -> None:
+        # Sinks schedule their deadline again when they reopen their file in the child
+        self._cond = threading.Condition()
+        self._deadlines = []
+        self._pending = collections.OrderedDict()
+        self._busy = False
+        self._thread = None
+
+
+rotation_scheduler = RotationScheduler()
+
+_open_sinks: "weakref.WeakValueDictionary[str, RotatingFileSink]" = weakref.WeakValueDictionary()
+_queued_sinks: "weakref.WeakSet[QueuedSink]" = weakref.WeakSet()
+_console_sinks: "weakref.WeakSet[ConsoleSink]" = weakref.WeakSet()
+_pools: "weakref.WeakSet[FileHandlePool]" = weakref.WeakSet()
+
+
+class _WriterThread(threading.local):
+    active = False  # True in the writer threads of ``QueuedSink``s
+
+
+_writer_thread = _WriterThread()
+_forwarder: t.Optional[t.Any] = None  # Set in worker processes whose files are owned by a central writer
+
+
+def find_sink(path: str) -> t.Optional[RotatingFileSink]:
+    return _open_sinks.get(path)
+
+
+def set_forwarder(forwarder: t.Optional[t.Any]) -> None:
+    # ``forwarder.send(sink, data, level_no, timestamp)`` replaces local writes of every RotatingFileSink
+    global _forwarder
+    _forwarder = forwarder
+
+
+def _after_fork_in_child() -> None:
+    _flusher._lock = threading.Lock()
+    _flusher._thread = None
+    _compressor._lock = threading.Lock()
+    _compressor._pool = None
+    rotation_scheduler._after_fork_in_child()
+    for pool in list(_pools):
+        pool._after_fork_in_child()
+    for sink in list(_open_sinks.values()):
+        sink._after_fork_in_child()
+    for queued in list(_queued_sinks):
+        queued._after_fork_in_child()
+    for console in list(_console_sinks):
+        console._after_fork_in_child()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+class FileHandlePool:
+    """
+    Bounds the number of files a group of ``RotatingFileSink``s keeps open, such as the per-logger files.
+
+    Sinks join the pool when they open their file. Once more than ``max_open`` are open, the least recently
+    written ones are closed; every ``idle_timeout`` / 2 seconds a sweeper closes the files not written for
+    ``idle_timeout`` seconds. A sink that is busy writing is skipped rather than waited for. ``max_open`` 0
+    and ``idle_timeout`` 0 disable the respective bound.
+    """
+
+    def __init__(self, max_open: int = 256, idle_timeout: float = 60.0):
+        self.max_open = max_open
+        self.idle_timeout = idle_timeout
+        self._lock = threading.Lock()
+        self._open: t.Dict[int, RotatingFileSink] = {}
+        self._stopped = threading.Event()
+        self._thread: t.Optional[threading.Thread] = None
+        self.opened_files: int = 0
+        self.evicted: int = 0
+        self.expired: int = 0
+        _pools.add(self)
+
+    def __len__(self) -> int:
+        return len(self._open)
+
+    def opened(self, sink: RotatingFileSink) -> None:
+        # Called by ``sink`` with its lock held; other sinks' locks are only tried, so two sinks cannot deadlock
+        sink._used_at = time.monotonic()
+        with self._lock:
+            self._open[id(sink)] = sink
+            self.opened_files += 1
+            if self.max_open and len(self._open) > self.max_open:
+                candidates = sorted((s for s in self._open.values() if s is not sink), key=lambda s: s._used_at)
+                self.evicted += self._release(candidates, len(self._open) - self.max_open)
+            if self.idle_timeout > 0 and self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="fairylandlogger-file-pool", daemon=True)
+                self._thread.start()
+
+    def closed(self, sink: RotatingFileSink) -> None:
+        with self._lock:
+            self._open.pop(id(sink), None)
+
+    def _release(self, candidates: t.Iterable[RotatingFileSink], count: int) -> int:
+        released = 0
+        for sink in candidates:
+            if released >= count:
+                break
+            if not sink._lock.acquire(blocking=False):
+                continue
+            try:
+                if sink._file is not None:
+                    sink.release()
+                    released += 1
+            finally:
+                sink._lock.release()
+            self._open.pop(id(sink), None)
+        return released
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.idle_timeout / 2):
+            limit = time.monotonic() - self.idle_timeout
+            with self._lock:
+                idle = [sink for sink in self._open.values() if sink._used_at < limit]
+                self.expired += self._release(idle, len(idle))
+
+    def stats(self) -> t.Dict[str, int]:
+        return {"open_files": len(self._open), "opened_files": self.opened_files, "evicted_files": self.evicted, "expired_files": self.expired}
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+    def _after_fork_in_child(self) -> None:
+        # The sinks close their inherited files themselves
+        self._lock = threading.Lock()
+        self._open = {}
+        self._thread = None
+
+
+class LoggerFileRouter:
+    """
+    Single loguru sink that dispatches each record to the file of its ``logger_name`` with one dict lookup.
+
+    ``add`` replaces the routing dict instead of mutating it, so the writer thread never reads a dict that is
+    being changed. The files share one ``FileHandlePool``, so thousands of loggers do not keep thousands of
+    descriptors open.
+    """
+
+    def __init__(
+            self,
+            rotation: t.Optional[str] = None,
+            retention: t.Optional[str] = None,
+            encoding: str = "UTF-8",
+            max_open: int = 256,
+            idle_timeout: float = 60.0,
+            **options,
+    ):
+        self.rotation = rotation
+        self.retention = retention
+        self.encoding = encoding
+        self.options = options  # Buffering and compression options forwarded to every RotatingFileSink
+        self.pool = FileHandlePool(max_open, idle_timeout)
+        self.severity: int = 0  # Minimum level number, updated in place on reconfigure
+        self._sinks: t.Dict[str, RotatingFileSink] = {}
+
+    def __contains__(self, logger_name: str) -> bool:
+        return logger_name in self._sinks
+
+    def __len__(self) -> int:
+        return len(self._sinks)
+
+    def add(self, logger_name: str, path: t.Union[str, Path]) -> None:
+        if logger_name not in self._sinks:
+            sink = RotatingFileSink(path, self.rotation, self.retention, self.encoding, pool=self.pool, **self.options)
+            self._sinks = {**self._sinks, logger_name: sink}
+
+    @property
+    def routes(self) -> t.Mapping[str, RotatingFileSink]:
+        return MappingProxyType(self._sinks)
+
+    @property
+    def bytes_written(self) -> int:
+        return sum(sink.bytes_written for sink in list(self._sinks.values()))
+
+    def accepts(self, record: t.Dict[str, t.Any]) -> bool:
+        return record["level"].no >= self.severity and record["extra"].get("logger_name") in self._sinks
+
+    def write(self, message) -> None:
+        sink = self._sinks.get(message.record["extra"].get("logger_name"))
+        if sink is not None:
+            sink.write(message)
+
+    def drain(self) -> None:
+        for sink in list(self._sinks.values()):
+            sink.drain()
+
+    def stop(self) -> None:
+        for sink in self._sinks.values():
+            sink.stop()
+        self.pool.stop()
+
+
+class ConsoleSink:
+    """
+    Batched writer for ``sys.stdout`` or ``sys.stderr``.
+
+    Formatted records are collected and written with a single ``write`` and ``flush`` every ``flush_interval``
+    seconds, once ``buffer_size`` characters are pending, and immediately for WARNING and above; with
+    ``flush_interval`` 0 every record is written at once. The stream is looked up on every write-out, so
+    ``contextlib.redirect_stdout`` and test runners capturing output keep working.
+    """
+
+    def __init__(self, stream: str = "stdout", flush_interval: float = 0.2, buffer_size: int = 64 * 1024):
+        self.stream = getattr(stream, "value", stream)
+        self.flush_interval = flush_interval
+        self.buffer_size = buffer_size
+        self._lock = threading.Lock()
+        self._buffer: t.List[str] = []
+        self._buffered: int = 0
+        self._flushed_at: float = time.monotonic()
+        self.bytes_written: int = 0  # Characters, the console stream does the encoding
+        self.latency = LatencyHistogram()
+
+        if flush_interval > 0:
+            _flusher.register(self)
+        _console_sinks.add(self)
+
+    def write(self, message) -> None:
+        started = time.perf_counter()
+        with self._lock:
+            self._buffer.append(message)
+            self._buffered += len(message)
+            if not self.flush_interval or message.record["level"].no >= _PROMPT_LEVEL_NO or self._buffered >= self.buffer_size:
+                self._drain()
+        self.latency.observe(time.perf_counter() - started)
+        self.bytes_written += len(message)
+
+    def drain(self) -> None:
+        # Not named ``flush``: loguru would call it after every single record
+        with self._lock:
+            self._drain()
+
+    def _drain(self) -> None:
+        self._flushed_at = time.monotonic()
+        if not self._buffer:
+            return
+        data = "".join(self._buffer)
+        self._buffer.clear()
+        self._buffered = 0
+        stream = getattr(sys, self.stream)
+        stream.write(data)
+        stream.flush()
+
+    def stop(self) -> None:
+        self.drain()
+
+    def _after_fork_in_child(self) -> None:
+        self._lock = threading.Lock()
+        self._buffer.clear()
+        self._buffered = 0
+
+
+class QueuedSink:
+    """
+    Hands formatted messages to one background thread that writes them to ``target``.
+
+    With ``maxsize`` > 0 the queue is bounded and ``policy`` decides what happens when it is full: ``block`` the
+    producer, ``drop_newest``, ``drop_oldest`` or ``drop_below_level`` (drop records below WARNING, block for the
+    rest). Dropped records are counted, and ``report`` is called with a summary once the queue has drained.
+
+    Writes made from a queue's own writer thread (such as that summary, which goes back through loguru) bypass
+    the policy: waiting for room there would wait for the thread itself.
+
+    ``retarget`` switches to another target without a gap: messages queued before the call are still written
+    to the old target, which is then stopped, and only later ones go to the new target.
+    """
+
+    def __init__(
+            self,
+            target: t.Any,
+            maxsize: int = 0,
+            policy: str = "block",
+            report: t.Optional[t.Callable[[str], None]] = None,
+            name: str = "",
+    ):
+        self.target = target
+        self.maxsize = maxsize
+        self.policy = getattr(policy, "value", policy)
+        if self.policy not in ("block", "drop_newest", "drop_oldest", "drop_below_level"):
+            raise ValueError(f"Invalid queue policy: {policy!r}")
+        self.report = report
+        self.name = name or getattr(target, "path", type(target).__name__)
+        self.dropped: int = 0
+        self.high_water: int = 0
+        self._unreported: int = 0
+        self.latency = LatencyHistogram()  # Time spent in ``target.write`` per record
+        self._queue: t.Deque[t.Any] = collections.deque()
+        self._handoffs: t.List[t.Tuple[t.Deque[t.Any], t.Any]] = []  # (messages for the old target, new target)
+        self._cond = threading.Condition()
+        self._busy = False
+        self._stopping = False
+        self._thread: t.Optional[threading.Thread] = None
+        _queued_sinks.add(self)
+
+    @property
+    def depth(self) -> int:
+        return len(self._queue)
+
+    def stats(self) -> t.Dict[str, t.Any]:
+        return {
+            "depth": len(self._queue),
+            "bytes_written": getattr(self.target, "bytes_written", 0),
+            "latency": self.latency.snapshot(),
+            "maxsize": self.maxsize,
+            "policy": self.policy,
+            "high_water": self.high_water,
+            "dropped": self.dropped,
+        }
+
+    def write(self, message) -> None:
+        with self._cond:
+            if self.maxsize and len(self._queue) >= self.maxsize and not _writer_thread.active and not self._make_room(message):
+                return
+            self._queue.append(message)
+            if len(self._queue) > self.high_water:
+                self.high_water = len(self._queue)
+            self._cond.notify_all()
+
+        if self._thread is None:
+            self._start()
+
+    def _make_room(self, message) -> bool:
+        # Called with the condition held and the queue full; returns whether ``message`` should be queued
+        if self.policy == "drop_newest":
+            self._drop()
+            return False
+        if self.policy == "drop_oldest":
+            self._queue.popleft()
+            self._drop()
+            return True
+        if self.policy == "drop_below_level":
+            if message.record["level"].no < _KEEP_LEVEL_NO:
+                self._drop()
+                return False
+            for index, queued in enumerate(self._queue):
+                if queued.record["level"].no < _KEEP_LEVEL_NO:
+                    del self._queue[index]
+                    self._drop()
+                    return True
+
+        while len(self._queue) >= self.maxsize and not self._stopping and self._thread is not None:
+            self._cond.wait()
+        return True
+
+    def _drop(self) -> None:
+        self.dropped += 1
+        self._unreported += 1
+
+    def retarget(self, target: t.Any) -> None:
+        with self._cond:
+            self._handoffs.append((self._queue, target))
+            self._queue = collections.deque()
+            self._cond.notify_all()
+        if self._thread is None:
+            self._start()
+
+    def _start(self) -> None:
+        with self._cond:
+            if self._thread is None:
+                self._stopping = False
+                self._thread = threading.Thread(target=self._run, name=f"fairylandlogger-queue-{self.name}", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        _writer_thread.active = True
+        while True:
+            with self._cond:
+                while not self._queue and not self._handoffs and not self._stopping:
+                    self._cond.wait()
+                if not self._queue and not self._handoffs:
+                    return
+                handoffs, self._handoffs = self._handoffs, []
+                batch = list(self._queue)
+                self._queue.clear()
+                self._busy = True
+                self._cond.notify_all()
+
+            for messages, target in handoffs:
+                self._write(messages)
+                previous, self.target = self.target, target
+                try:
+                    previous.stop()
+                except Exception as error:
+                    print(f"fairylandlogger: sink {self.name} failed to stop: {error!r}", file=sys.stderr)
+            self._write(batch)
+
+            with self._cond:
+                self._busy = False
+                dropped, self._unreported = (self._unreported, 0) if not self._queue else (0, self._unreported)
+                self._cond.notify_all()
+
+            if dropped and self.report is not None:
+                self.report(f"Log queue {self.name} recovered: {dropped} records dropped ({self.policy}), {self.dropped} in total")
+
+    def _write(self, batch: t.Iterable[t.Any]) -> None:
+        observe, clock = self.latency.observe, time.perf_counter
+        for message in batch:
+            started = clock()
+            try:
+                self.target.write(message)
+            except Exception as error:
+                print(f"fairylandlogger: sink {self.name} failed: {error!r}", file=sys.stderr)
+            observe(clock() - started)
+
+    def join(self) -> None:
+        with self._cond:
+            while (self._queue or self._handoffs or self._busy) and self._thread is not None:
+                self._cond.wait()
+
+    def drain(self) -> None:
+        self.join()
+        if hasattr(self.target, "drain"):
+            self.target.drain()
+
+    def stop(self) -> None:
+        with self._cond:
+            thread, self._stopping = self._thread, True
+            self._cond.notify_all()
+        if thread is not None:
+            thread.join()
+        self._thread = None
+        if hasattr(self.target, "stop"):
+            self.target.stop()
+
+    def _after_fork_in_child(self) -> None:
+        self._queue = collections.deque()
+        self._handoffs = []
+        self._cond = threading.Condition()
+        self._busy = False
+        self._thread = None
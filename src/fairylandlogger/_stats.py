@@ -0,0 +1,213 @@
+# coding: UTF-8
+"""
+@software: PyCharm
+@author: Lionel Johnson
+@contact: https://fairy.host
+@organization: https://github.com/FairylandFuture
+@datetime: 2026-10-17 16:24:09 UTC+08:00
+"""
+
+import os
+import sys
+import threading
+import typing as t
+
+# Upper bounds of the latency buckets in microseconds (powers of two up to ~1 s); the last bucket is open
+_LATENCY_BOUNDS_US: t.Tuple[int, ...] = tuple(2 ** i for i in range(21))
+
+
+class LatencyHistogram:
+    """
+    Log2-bucketed histogram of write latencies.
+
+    ``observe`` is a few integer operations and takes no lock; counts may be slightly off when the same
+    histogram is updated from several threads at once, which is acceptable for monitoring.
+    """
+
+    __slots__ = ("count", "total", "max", "buckets")
+
+    def __init__(self):
+        self.count: int = 0
+        self.total: float = 0.0
+        self.max: float = 0.0
+        self.buckets: t.List[int] = [0] * (len(_LATENCY_BOUNDS_US) + 1)
+
+    def observe(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        micros = int(seconds * 1_000_000)
+        self.buckets[min(micros.bit_length(), len(_LATENCY_BOUNDS_US))] += 1
+
+    def percentile(self, fraction: float) -> t.Optional[float]:
+        # Upper bound (in microseconds) of the bucket holding the given fraction of observations
+        if not self.count:
+            return None
+        rank = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if seen >= rank:
+                return float(_LATENCY_BOUNDS_US[index]) if index < len(_LATENCY_BOUNDS_US) else self.max * 1_000_000
+        return self.max * 1_000_000
+
+    def snapshot(self) -> t.Dict[str, t.Any]:
+        labels = [f"<{bound}us" for bound in _LATENCY_BOUNDS_US] + [f">={_LATENCY_BOUNDS_US[-1]}us"]
+        return {
+            "count": self.count,
+            "mean_us": self.total * 1_000_000 / self.count if self.count else 0.0,
+            "max_us": self.max * 1_000_000,
+            "p50_us": self.percentile(0.5),
+            "p99_us": self.percentile(0.99),
+            "buckets": {label: count for label, count in zip(labels, self.buckets) if count},
+        }
+
+
+_MAX_LOGGERS = 1024  # Distinct logger names counted per thread; the rest are counted under _OTHER_LOGGERS
+_OTHER_LOGGERS = "<other>"
+
+
+class StatsShard:
+    """
+    Counters of one thread. Only that thread writes them, so plain ``+= 1`` loses nothing, with or without a GIL.
+    """
+
+    __slots__ = ("by_level", "by_logger", "filtered", "rate_limited", "deduplicated")
+
+    def __init__(self):
+        self.by_level: t.Dict[str, int] = {}
+        self.by_logger: t.Dict[str, int] = {}
+        self.filtered: int = 0  # Rejected by a level gate, the loggers' own or the one in ``route``
+        self.rate_limited: int = 0
+        self.deduplicated: int = 0
+
+    def emitted(self, logger_name: str, level: str) -> None:
+        by_level, by_logger = self.by_level, self.by_logger
+        by_level[level] = by_level.get(level, 0) + 1
+        if logger_name not in by_logger and len(by_logger) >= _MAX_LOGGERS:
+            logger_name = _OTHER_LOGGERS
+        by_logger[logger_name] = by_logger.get(logger_name, 0) + 1
+
+    def merge(self, other: "StatsShard") -> None:
+        for level, count in other.by_level.items():
+            self.by_level[level] = self.by_level.get(level, 0) + count
+        for name, count in other.by_logger.items():
+            if name not in self.by_logger and len(self.by_logger) >= _MAX_LOGGERS:
+                name = _OTHER_LOGGERS
+            self.by_logger[name] = self.by_logger.get(name, 0) + count
+        self.filtered += other.filtered
+        self.rate_limited += other.rate_limited
+        self.deduplicated += other.deduplicated
+
+
+class LoggerStats:
+    """
+    Counters kept by the registry for every routed record.
+
+    Every thread counts into its own ``StatsShard`` (see ``shard``) and ``snapshot`` sums them: exact under
+    contention without a lock on the emit path. The shards of finished threads are folded into one, and at most
+    ``_MAX_LOGGERS`` logger names are counted separately.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._shards: t.List[t.Tuple[threading.Thread, StatsShard]] = []
+        self._retired = StatsShard()  # Counts of threads that have finished
+
+    def shard(self) -> StatsShard:
+        try:
+            return self._local.shard
+        except AttributeError:
+            return self._add_shard()
+
+    def _add_shard(self) -> StatsShard:
+        shard = self._local.shard = StatsShard()
+        with self._lock:
+            self._retire()
+            self._shards.append((threading.current_thread(), shard))
+        return shard
+
+    def _retire(self) -> None:
+        # Called with the lock held; a finished thread no longer writes its shard
+        alive = []
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                alive.append((thread, shard))
+            else:
+                self._retired.merge(shard)
+        self._shards = alive
+
+    def emitted(self, logger_name: str, level: str) -> None:
+        self.shard().emitted(logger_name, level)
+
+    def snapshot(self) -> t.Dict[str, t.Any]:
+        total = StatsShard()
+        with self._lock:
+            self._retire()
+            total.merge(self._retired)
+            shards = [shard for _, shard in self._shards]
+        for shard in shards:
+            # Copies first: the owning thread may add a key meanwhile
+            copy = StatsShard()
+            copy.by_level, copy.by_logger = dict(shard.by_level), dict(shard.by_logger)
+            copy.filtered, copy.rate_limited, copy.deduplicated = shard.filtered, shard.rate_limited, shard.deduplicated
+            total.merge(copy)
+        return {
+            "emitted": sum(total.by_level.values()),
+            "by_level": total.by_level,
+            "by_logger": total.by_logger,
+            "filtered": total.filtered,
+            "rate_limited": total.rate_limited,
+            "deduplicated": total.deduplicated,
+        }
+
+    def _after_fork_in_child(self) -> None:
+        # Only the forking thread survives; the other shards are folded on the next snapshot
+        self._lock = threading.Lock()
+
+
+class StatsReporter:
+    """
+    Daemon thread passing a one-line summary of ``collect()`` to ``report`` every ``interval`` seconds.
+    """
+
+    def __init__(self, interval: float, collect: t.Callable[[], t.Dict[str, t.Any]], report: t.Callable[[str], None]):
+        self.interval = interval
+        self.collect = collect
+        self.report = report
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="fairylandlogger-stats", daemon=True)
+        self._pid = os.getpid()
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            try:
+                self.report(format_stats(self.collect()))
+            except Exception as error:
+                print(f"fairylandlogger: failed to report stats: {error!r}", file=sys.stderr)
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._pid == os.getpid() and self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join(1.0)
+
+
+def format_stats(stats: t.Dict[str, t.Any]) -> str:
+    parts = [
+        f"emitted={stats['emitted']}",
+        f"filtered={stats['filtered']}",
+        f"rate_limited={stats['rate_limited']}",
+        f"deduplicated={stats['deduplicated']}",
+    ]
+    for name, appender in stats["appenders"].items():
+        latency = appender.get("latency") or {}
+        parts.append(
+            f"{name}: depth={appender.get('depth', 0)} dropped={appender.get('dropped', 0)} "
+            f"bytes={appender.get('bytes_written', 0)} p99={latency.get('p99_us') or 0:.0f}us"
+        )
+    return "Logging stats: " + ", ".join(parts)
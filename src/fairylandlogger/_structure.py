@@ -12,9 +12,7 @@ import typing as t
 from dataclasses import dataclass
 from pathlib import Path
 
-import yaml
-
-from ._enums import LogLevelEnum, EncodingEnum
+from ._enums import LogLevelEnum, EncodingEnum, QueuePolicyEnum, CompressionEnum, ConsoleStreamEnum, NetworkProtocolEnum, NetworkFormatEnum
 
 _DEFAULT_LOG_PATTERN = "{time:YYYY-MM-DD HH:mm:ss.SSS} | {level: <8} | {name}:{line} | P:{process} T:{thread} - {message}"
 
@@ -23,14 +21,70 @@ _DEFAULT_LOG_PATTERN = "{time:YYYY-MM-DD HH:mm:ss.SSS} | {level: <8} | {name}:{l
 class LoggerConfigStructure:
     level: LogLevelEnum = LogLevelEnum.TRACE
     console: bool = True
+    banner: bool = True  # Print the banner once per process when the console appender is first added
+    console_stream: ConsoleStreamEnum = ConsoleStreamEnum.STDOUT
+    console_colorize: t.Optional[bool] = None  # None: only when the stream is a terminal
+    console_flush_interval: t.Optional[float] = None  # None: 0 (every record) on a terminal, 0.2 s otherwise
     file: bool = False
     dirname: t.Optional[t.Union[str, Path]] = "logs"
     filename: str = "fairyland-logger.log"
     rotation: str = "5 MB"
     retention: str = "180 days"
+    compression: t.Optional[CompressionEnum] = None  # Compress rotated segments in the background
+    index: bool = False  # Sparse sidecar index (<segment>.idx) per file segment, used by ``fairylandlogger query``
     pattern: str = _DEFAULT_LOG_PATTERN
+    backtrace: bool = False  # Tracebacks also show the frames above the one that caught the exception
+    diagnose: bool = False  # Tracebacks show variable values, which may include secrets
+    backtrace_level: LogLevelEnum = LogLevelEnum.TRACE  # Lowest record level ``backtrace`` applies to
+    diagnose_level: LogLevelEnum = LogLevelEnum.TRACE  # Lowest record level ``diagnose`` applies to
+    fingerprint_tracebacks: bool = True  # A repeated stack is rendered once per appender, later records cite its hash
+    appender_tracebacks: t.Optional[t.Dict[str, t.Dict[str, t.Any]]] = None  # e.g. {"console": {"diagnose": True}}
     json: bool = False
+    json_fields: t.Optional[t.Tuple[str, ...]] = None
+    binary: bool = False  # Write the main log file in the binary format (<stem>.flb) instead of text
+    network: t.Optional[NetworkProtocolEnum] = None  # Also ship records to a receiver over "tcp" or "udp"
+    network_host: str = "127.0.0.1"
+    network_port: int = 5140
+    network_format: NetworkFormatEnum = NetworkFormatEnum.JSON  # Newline-delimited JSON or RFC 5424 syslog
+    network_app_name: str = ""  # Syslog APP-NAME, the script name when empty
+    network_batch_size: str = "64 KB"
+    network_flush_interval: float = 1.0
+    network_spill_size: str = "16 MB"  # Bound of <stem>.spill in dirname while the receiver is down, "0 B" drops instead
     encoding: EncodingEnum = EncodingEnum.UTF8
+    buffered: bool = False
+    buffer_size: str = "64 KB"
+    flush_records: int = 1000
+    flush_interval: float = 1.0
+    fsync: bool = False
+    logger_files_max_open: int = 256  # Per-logger files kept open at once, least recently written closed first; 0 unbounded
+    logger_files_idle_timeout: float = 60.0  # Seconds without writes before a per-logger file is closed, 0 never
+    multiprocess: bool = False
+    queue_size: int = 0
+    queue_policy: QueuePolicyEnum = QueuePolicyEnum.BLOCK
+    rate_limits: t.Optional[t.Dict[str, str]] = None  # logger name prefix -> rate, e.g. {"app.db": "100/s"}
+    call_site_rate_limit: t.Optional[str] = None
+    dedupe: bool = False
+    stats_interval: float = 0.0  # Seconds between self-report lines, 0 disables them
+    flight_recorder: bool = False
+    flight_recorder_level: LogLevelEnum = LogLevelEnum.TRACE
+    flight_recorder_records: int = 4096  # Ring buffer capacity
+    flight_recorder_dump_records: int = 0  # Records written per dump, 0 for the whole ring
+    watch_interval: float = 0.0  # Seconds between checks of the auto-loaded YAML file for changes, 0 disables
+
+    def traceback_options(self, appender: str) -> "LoggerTracebackStructure":
+        # Traceback settings of one appender ("console", "file", "json", "binary", "network" or "logger_files")
+        options = dict(
+            backtrace=self.backtrace,
+            diagnose=self.diagnose,
+            backtrace_level=self.backtrace_level,
+            diagnose_level=self.diagnose_level,
+            fingerprint=self.fingerprint_tracebacks,
+        )
+        for name, value in ((self.appender_tracebacks or {}).get(appender) or {}).items():
+            if name not in options:
+                raise ValueError(f"Unknown traceback option for {appender!r}: {name!r}")
+            options[name] = LogLevelEnum(value) if name.endswith("_level") else bool(value)
+        return LoggerTracebackStructure(**options)
 
     @staticmethod
     def from_env(frefix: str = "FAIRY_LOG_") -> "LoggerConfigStructure":
@@ -43,18 +97,60 @@ class LoggerConfigStructure:
         return LoggerConfigStructure(
             level=LogLevelEnum(os.getenv(f"{frefix}LEVEL", "INFO")),
             console=get_bool("ENABLE_CONSOLE", True),
+            banner=get_bool("BANNER", True),
+            console_stream=ConsoleStreamEnum(os.getenv(f"{frefix}CONSOLE_STREAM", "stdout")),
+            console_colorize=get_bool("CONSOLE_COLORIZE", False) if os.getenv(f"{frefix}CONSOLE_COLORIZE") else None,
+            console_flush_interval=float(os.environ[f"{frefix}CONSOLE_FLUSH_INTERVAL"]) if os.getenv(f"{frefix}CONSOLE_FLUSH_INTERVAL") else None,
             file=get_bool("ENABLE_FILE", False),
             dirname=os.getenv(f"{frefix}DIR", "logs"),
             filename=os.getenv(f"{frefix}FILE", "fairyland-logger.log"),
             rotation=os.getenv(f"{frefix}ROTATION", "5 MB"),
             retention=os.getenv(f"{frefix}RETENTION", "180 days"),
+            compression=CompressionEnum(os.environ[f"{frefix}COMPRESSION"]) if os.getenv(f"{frefix}COMPRESSION") else None,
+            index=get_bool("INDEX", False),
             pattern=os.getenv(f"{frefix}PATTERN", _DEFAULT_LOG_PATTERN),
+            backtrace=get_bool("BACKTRACE", False),
+            diagnose=get_bool("DIAGNOSE", False),
+            backtrace_level=LogLevelEnum(os.getenv(f"{frefix}BACKTRACE_LEVEL", "TRACE")),
+            diagnose_level=LogLevelEnum(os.getenv(f"{frefix}DIAGNOSE_LEVEL", "TRACE")),
+            fingerprint_tracebacks=get_bool("FINGERPRINT_TRACEBACKS", True),
             json=get_bool("JSON", False),
+            json_fields=tuple(f.strip() for f in os.environ[f"{frefix}JSON_FIELDS"].split(",")) if os.getenv(f"{frefix}JSON_FIELDS") else None,
+            binary=get_bool("BINARY", False),
+            network=NetworkProtocolEnum(os.environ[f"{frefix}NETWORK"]) if os.getenv(f"{frefix}NETWORK") else None,
+            network_host=os.getenv(f"{frefix}NETWORK_HOST", "127.0.0.1"),
+            network_port=int(os.getenv(f"{frefix}NETWORK_PORT", "5140")),
+            network_format=NetworkFormatEnum(os.getenv(f"{frefix}NETWORK_FORMAT", "json")),
+            network_app_name=os.getenv(f"{frefix}NETWORK_APP_NAME", ""),
+            network_batch_size=os.getenv(f"{frefix}NETWORK_BATCH_SIZE", "64 KB"),
+            network_flush_interval=float(os.getenv(f"{frefix}NETWORK_FLUSH_INTERVAL", "1.0")),
+            network_spill_size=os.getenv(f"{frefix}NETWORK_SPILL_SIZE", "16 MB"),
             encoding=EncodingEnum(os.getenv(f"{frefix}ENCODING", "UTF-8")),
+            buffered=get_bool("BUFFERED", False),
+            buffer_size=os.getenv(f"{frefix}BUFFER_SIZE", "64 KB"),
+            flush_records=int(os.getenv(f"{frefix}FLUSH_RECORDS", "1000")),
+            flush_interval=float(os.getenv(f"{frefix}FLUSH_INTERVAL", "1.0")),
+            fsync=get_bool("FSYNC", False),
+            logger_files_max_open=int(os.getenv(f"{frefix}LOGGER_FILES_MAX_OPEN", "256")),
+            logger_files_idle_timeout=float(os.getenv(f"{frefix}LOGGER_FILES_IDLE_TIMEOUT", "60")),
+            multiprocess=get_bool("MULTIPROCESS", False),
+            queue_size=int(os.getenv(f"{frefix}QUEUE_SIZE", "0")),
+            queue_policy=QueuePolicyEnum(os.getenv(f"{frefix}QUEUE_POLICY", "block")),
+            rate_limits=dict(item.strip().rsplit("=", 1) for item in os.environ[f"{frefix}RATE_LIMITS"].split(",")) if os.getenv(f"{frefix}RATE_LIMITS") else None,
+            call_site_rate_limit=os.getenv(f"{frefix}CALL_SITE_RATE_LIMIT") or None,
+            dedupe=get_bool("DEDUPE", False),
+            stats_interval=float(os.getenv(f"{frefix}STATS_INTERVAL", "0")),
+            flight_recorder=get_bool("FLIGHT_RECORDER", False),
+            flight_recorder_level=LogLevelEnum(os.getenv(f"{frefix}FLIGHT_RECORDER_LEVEL", "TRACE")),
+            flight_recorder_records=int(os.getenv(f"{frefix}FLIGHT_RECORDER_RECORDS", "4096")),
+            flight_recorder_dump_records=int(os.getenv(f"{frefix}FLIGHT_RECORDER_DUMP_RECORDS", "0")),
+            watch_interval=float(os.getenv(f"{frefix}WATCH_INTERVAL", "0")),
         )
 
     @staticmethod
     def from_yaml(path: t.Union[str, Path]) -> "LoggerConfigStructure":
+        import yaml  # Only needed with a config file, keeps it out of ``import fairylandlogger``
+
         with open(path, "r", encoding=EncodingEnum.UTF8) as stream:
             content = yaml.safe_load(stream) or {}
 
@@ -63,21 +159,85 @@ class LoggerConfigStructure:
         return LoggerConfigStructure(
             level=LogLevelEnum(data.get("level", "INFO")),
             console=bool(data.get("console", True)),
+            banner=bool(data.get("banner", True)),
+            console_stream=ConsoleStreamEnum(data.get("console_stream", "stdout")),
+            console_colorize=bool(data["console_colorize"]) if data.get("console_colorize") is not None else None,
+            console_flush_interval=float(data["console_flush_interval"]) if data.get("console_flush_interval") is not None else None,
             file=bool(data.get("file", False)),
             dirname=data.get("dirname", "logs"),
             filename=data.get("filename", "fairyland-logger.log"),
             rotation=data.get("rotation", "5 MB"),
             retention=data.get("retention", "180 days"),
+            compression=CompressionEnum(data["compression"]) if data.get("compression") else None,
+            index=bool(data.get("index", False)),
             pattern=data.get("pattern", _DEFAULT_LOG_PATTERN),
+            backtrace=bool(data.get("backtrace", False)),
+            diagnose=bool(data.get("diagnose", False)),
+            backtrace_level=LogLevelEnum(data.get("backtrace_level", "TRACE")),
+            diagnose_level=LogLevelEnum(data.get("diagnose_level", "TRACE")),
+            fingerprint_tracebacks=bool(data.get("fingerprint_tracebacks", True)),
+            appender_tracebacks={str(k): dict(v or {}) for k, v in data["appender_tracebacks"].items()} if data.get("appender_tracebacks") else None,
             json=bool(data.get("json", False)),
+            json_fields=tuple(data["json_fields"]) if data.get("json_fields") else None,
+            binary=bool(data.get("binary", False)),
+            network=NetworkProtocolEnum(data["network"]) if data.get("network") else None,
+            network_host=str(data.get("network_host", "127.0.0.1")),
+            network_port=int(data.get("network_port", 5140)),
+            network_format=NetworkFormatEnum(data.get("network_format", "json")),
+            network_app_name=str(data.get("network_app_name", "")),
+            network_batch_size=str(data.get("network_batch_size", "64 KB")),
+            network_flush_interval=float(data.get("network_flush_interval", 1.0)),
+            network_spill_size=str(data.get("network_spill_size", "16 MB")),
             encoding=EncodingEnum(data.get("encoding", "UTF-8")),
+            buffered=bool(data.get("buffered", False)),
+            buffer_size=str(data.get("buffer_size", "64 KB")),
+            flush_records=int(data.get("flush_records", 1000)),
+            flush_interval=float(data.get("flush_interval", 1.0)),
+            fsync=bool(data.get("fsync", False)),
+            logger_files_max_open=int(data.get("logger_files_max_open", 256)),
+            logger_files_idle_timeout=float(data.get("logger_files_idle_timeout", 60)),
+            multiprocess=bool(data.get("multiprocess", False)),
+            queue_size=int(data.get("queue_size", 0)),
+            queue_policy=QueuePolicyEnum(data.get("queue_policy", "block")),
+            rate_limits={str(k): str(v) for k, v in data["rate_limits"].items()} if data.get("rate_limits") else None,
+            call_site_rate_limit=data.get("call_site_rate_limit"),
+            dedupe=bool(data.get("dedupe", False)),
+            stats_interval=float(data.get("stats_interval", 0)),
+            flight_recorder=bool(data.get("flight_recorder", False)),
+            flight_recorder_level=LogLevelEnum(data.get("flight_recorder_level", "TRACE")),
+            flight_recorder_records=int(data.get("flight_recorder_records", 4096)),
+            flight_recorder_dump_records=int(data.get("flight_recorder_dump_records", 0)),
+            watch_interval=float(data.get("watch_interval", 0)),
         )
 
 
+@dataclass(frozen=True)
+class LoggerTracebackStructure:
+    backtrace: bool = False
+    diagnose: bool = False
+    backtrace_level: LogLevelEnum = LogLevelEnum.TRACE
+    diagnose_level: LogLevelEnum = LogLevelEnum.TRACE
+    fingerprint: bool = True
+
+
+@dataclass(frozen=True)
+class LoggerCallSiteStructure:
+    name: str
+    file: str
+    function: str
+    line: int
+    thread_id: int
+    thread_name: str
+    timestamp: float
+
+
 @dataclass(frozen=False)
 class LoggerRecordStructure:
     name: str
     level: LogLevelEnum
-    message: str
+    message: t.Any  # str template, callable or any object rendered with str() once the level gate passed
     depth: int
     extra: t.Optional[t.Dict[str, t.Any]] = None
+    args: t.Tuple[t.Any, ...] = ()
+    call_site: t.Optional[LoggerCallSiteStructure] = None  # Captured when the record is routed off the caller's thread
+    exception: t.Any = None  # ``ExceptionInfo`` attached by ``Logger.exception()``
@@ -0,0 +1,144 @@
+# coding: UTF-8
+"""
+@software: PyCharm
+@author: Lionel Johnson
+@contact: https://fairy.host
+@organization: https://github.com/FairylandFuture
+@datetime: 2026-10-17 23:12:40 UTC+08:00
+"""
+
+import collections
+import itertools
+import sys
+import threading
+import traceback
+import typing as t
+import weakref
+
+from ._enums import _LOG_LEVEL_SEVERITY
+from ._structure import LoggerTracebackStructure
+
+EXCEPTION_KEY = "fairy_exception"  # extra set by the registry: the ``ExceptionInfo`` of ``Logger.exception()``
+
+_renderers: "weakref.WeakValueDictionary[str, TracebackRenderer]" = weakref.WeakValueDictionary()
+_tokens = itertools.count(1)
+
+
+def _fingerprint(error: BaseException, outer: t.Optional[traceback.StackSummary] = None) -> str:
+    # Hash of the exception types and code locations of the whole chain, independent of the messages
+    import hashlib  # Only needed once an exception is logged
+
+    digest = hashlib.blake2b(digest_size=6)
+    for frame in outer or ():
+        digest.update(f"|{frame.filename}:{frame.name}:{frame.lineno}".encode())
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        digest.update(f"{type(error).__module__}.{type(error).__qualname__}".encode())
+        tb = error.__traceback__
+        while tb is not None:
+            code = tb.tb_frame.f_code
+            digest.update(f"|{code.co_filename}:{code.co_name}:{tb.tb_lineno}".encode())
+            tb = tb.tb_next
+        error = error.__cause__ or (None if error.__suppress_context__ else error.__context__)
+    return digest.hexdigest()
+
+
+class ExceptionInfo:
+    """
+    Exception attached to a record by ``Logger.exception()``.
+
+    Rendered on demand by the appenders' ``TracebackRenderer``; each rendering variant is produced once per record
+    however many appenders write it. Formatting it with a renderer token as spec (``{extra[fairy_exception]:r1}``)
+    lets a plain loguru format string pull in the text of that renderer.
+    """
+
+    __slots__ = ("error", "level_no", "fingerprint", "outer", "_texts")
+
+    def __init__(self, error: BaseException, level_no: int, outer: t.Optional[traceback.StackSummary] = None):
+        self.error = error
+        self.level_no = level_no
+        self.outer = outer  # Frames above the one that caught the exception, captured for backtraces
+        self.fingerprint = _fingerprint(error, outer)
+        self._texts: t.Dict[t.Tuple[bool, bool], str] = {}
+
+    @classmethod
+    def capture(cls, level_no: int, backtrace: bool = False) -> t.Optional["ExceptionInfo"]:
+        # The exception currently being handled, None outside an ``except`` block
+        error = sys.exc_info()[1]
+        if error is None:
+            return None
+        outer = None
+        if backtrace and error.__traceback__ is not None:
+            frames = traceback.walk_stack(error.__traceback__.tb_frame.f_back)
+            outer = traceback.StackSummary.extract(frames, lookup_lines=False)
+            outer.reverse()
+        return cls(error, level_no, outer)
+
+    def render(self, backtrace: bool = False, diagnose: bool = False) -> str:
+        key = (backtrace and self.outer is not None, diagnose)
+        text = self._texts.get(key)
+        if text is None:
+            text = self._texts[key] = self._render(*key)
+        return text
+
+    def _render(self, backtrace: bool, diagnose: bool) -> str:
+        error = self.error
+        try:
+            exception = traceback.TracebackException(type(error), error, error.__traceback__, capture_locals=diagnose)
+        except Exception:  # A failing ``repr`` of a local variable
+            exception = traceback.TracebackException(type(error), error, error.__traceback__)
+        if backtrace:
+            exception.stack = traceback.StackSummary.from_list(list(self.outer) + list(exception.stack))
+        return "".join(exception.format()).rstrip("\n")
+
+    def summary(self) -> str:
+        # Last line of the traceback: exception type and message
+        return "".join(traceback.format_exception_only(type(self.error), self.error)).rstrip("\n")
+
+    def __format__(self, spec: str) -> str:
+        renderer = _renderers.get(spec)
+        return renderer.render(self) if renderer is not None else self.render()
+
+
+class TracebackRenderer:
+    """
+    Renders the exceptions of one appender according to its ``LoggerTracebackStructure``.
+
+    With ``fingerprint`` enabled the first record of a stack gets the full traceback under a ``[traceback <hash>]``
+    header, later records with the same stack only repeat the last line and the hash. The most recent
+    ``remember`` hashes are tracked per appender.
+    """
+
+    def __init__(self, options: t.Optional[LoggerTracebackStructure] = None, remember: int = 1024):
+        options = options or LoggerTracebackStructure()
+        self.options = options
+        self.remember = remember
+        self._backtrace_no = _LOG_LEVEL_SEVERITY[options.backtrace_level.upper()] if options.backtrace else None
+        self._diagnose_no = _LOG_LEVEL_SEVERITY[options.diagnose_level.upper()] if options.diagnose else None
+        self._seen: "collections.OrderedDict[t.Tuple[str, bool, bool], None]" = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.token = f"r{next(_tokens)}"
+        self.field = f"{{extra[{EXCEPTION_KEY}]:{self.token}}}"
+        _renderers[self.token] = self
+
+    def patterns(self, pattern: str) -> t.Tuple[str, str]:
+        # (format of plain records, format of records carrying an ``ExceptionInfo``) for a loguru format callable
+        pattern = pattern.rstrip("\n")
+        return pattern + "\n{exception}", f"{pattern}\n{self.field}\n"
+
+    def render(self, info: ExceptionInfo) -> str:
+        backtrace = self._backtrace_no is not None and info.level_no >= self._backtrace_no
+        diagnose = self._diagnose_no is not None and info.level_no >= self._diagnose_no
+        if not self.options.fingerprint:
+            return info.render(backtrace, diagnose)
+
+        key = (info.fingerprint, backtrace, diagnose)
+        with self._lock:
+            if key in self._seen:
+                self._seen.move_to_end(key)
+                return f"{info.summary()} [traceback {info.fingerprint} logged earlier]"
+            self._seen[key] = None
+            if len(self._seen) > self.remember:
+                self._seen.popitem(last=False)
+        return f"[traceback {info.fingerprint}]\n{info.render(backtrace, diagnose)}"
@@ -0,0 +1,78 @@
+# coding: UTF-8
+"""
+@software: PyCharm
+@author: Lionel Johnson
+@contact: https://fairy.host
+@organization: https://github.com/FairylandFuture
+@datetime: 2026-10-17 22:04:51 UTC+08:00
+"""
+
+import os
+import sys
+import threading
+import typing as t
+
+from ._structure import LoggerConfigStructure
+
+
+class ConfigWatcher:
+    """
+    Daemon thread polling the modification time and size of a YAML config file every ``interval`` seconds.
+
+    A changed file is parsed completely before ``apply`` gets the new config, so a half-written or invalid file
+    is reported and skipped while the current configuration stays in place.
+    """
+
+    def __init__(
+            self,
+            path: t.Union[str, os.PathLike],
+            interval: float,
+            apply: t.Callable[[LoggerConfigStructure], None],
+            load: t.Callable[[str], LoggerConfigStructure] = LoggerConfigStructure.from_yaml,
+    ):
+        self.path = str(path)
+        self.interval = interval
+        self.apply = apply
+        self.load = load
+        self.reloads: int = 0
+        self._signature = self._stat()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="fairylandlogger-config", daemon=True)
+        self._pid = os.getpid()
+
+    def _stat(self) -> t.Optional[t.Tuple[int, int]]:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            self.check()
+
+    def check(self) -> bool:
+        # True when a changed file was applied
+        signature = self._stat()
+        if signature is None or signature == self._signature:
+            return False
+        self._signature = signature
+
+        try:
+            config = self.load(self.path)
+        except Exception as error:
+            print(f"fairylandlogger: ignoring invalid config {self.path}: {error!r}", file=sys.stderr)
+            return False
+        if config.watch_interval > 0:
+            self.interval = config.watch_interval
+        self.apply(config)
+        self.reloads += 1
+        return True
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._pid == os.getpid() and self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join(1.0)
@@ -7,21 +7,49 @@
 @datetime: 2025-11-29 16:58:56 UTC+08:00
 """
 
-from ._structure import LoggerConfigStructure, LoggerRecordStructure
+import sys
+import threading
+import time
+import typing as t
+import weakref
+
+from ._context import context_scope, current_context
+from ._dispatcher import LoggerDispatcher
+from ._structure import LoggerCallSiteStructure, LoggerConfigStructure, LoggerRecordStructure
 from ._registry import LoggerRegistry
 from ._enums import LogLevelEnum
+from ._tracebacks import ExceptionInfo
+
+_TRACE = LogLevelEnum.TRACE.severity
+_DEBUG = LogLevelEnum.DEBUG.severity
+_INFO = LogLevelEnum.INFO.severity
+_SUCCESS = LogLevelEnum.SUCCESS.severity
+_WARNING = LogLevelEnum.WARNING.severity
+_ERROR = LogLevelEnum.ERROR.severity
+_CRITICAL = LogLevelEnum.CRITICAL.severity
 
 
 class Logger:
 
-    def __init__(self, name: str, dirname: str = "", depth: int | None = None):
+    def __init__(self, name: str, dirname: str = "", depth: int | None = None, context: t.Optional[t.Dict[str, t.Any]] = None):
         self._name = name
         self._dirname = dirname
         self._depth = depth
+        self._context = context or {}  # Fields bound by ``bind``, part of the pre-bound sink
         self._registry = LoggerRegistry.get_instance()
+        self._threshold: int = 0
+        self._sink = None
+        self._stats = self._registry.counters  # Calls rejected by the level gate are counted in the registry
+
+        self._refresh()
+        self._registry.attach(self)
 
-        if name:
-            self._registry.register_logger_file(name, dirname)
+    def _refresh(self) -> None:
+        # Resolve everything the emit path needs once; called again by the registry on reconfigure
+        if self._name:
+            self._registry.register_logger_file(self._name, self._dirname)
+        self._threshold = self._registry.gate_severity(self._name)
+        self._sink = self._registry.bind_logger(self._name, self._depth or 0, self._context)
 
     @property
     def name(self) -> str:
@@ -31,43 +59,181 @@ class Logger:
     def dirname(self):
         return self._dirname
 
-    def _emit(self, level: LogLevelEnum, msg: str, depth: int, **kwargs) -> None:
+    @property
+    def context(self) -> t.Dict[str, t.Any]:
+        return dict(self._context)
+
+    def bind(self, **context: t.Any) -> "Logger":
+        # Child logger of the same name whose records carry these fields; merged here, not on every call
+        return type(self)(self._name, self._dirname, self._depth, {**self._context, **context})
+
+    def is_enabled(self, level: t.Union[str, LogLevelEnum]) -> bool:
+        return self._registry.is_enabled(self._name, level)
+
+    def _emit(
+            self,
+            level: LogLevelEnum,
+            msg: t.Any,
+            args: t.Tuple[t.Any, ...],
+            depth: int,
+            extra: t.Dict[str, t.Any],
+            exception: t.Optional[ExceptionInfo] = None,
+    ) -> None:
+        # The pre-bound sink only matches the default depth; an explicit call depth is bound by the registry
+        sink = None if depth else self._sink
         if self._depth is not None:
             depth += self._depth
+        scope = current_context()
+        if scope or (sink is None and self._context):
+            extra = self._merge_context(extra, scope, sink is None)
 
         record = LoggerRecordStructure(
             name=self._name,
             level=level.upper(),
             message=msg,
             depth=depth,
-            extra=kwargs or {}
+            extra=extra,
+            args=args,
+            exception=exception,
         )
-        self._registry.route(record)
+        self._registry.route(record, sink)
+
+    def _merge_context(self, extra: t.Dict[str, t.Any], scope: t.Dict[str, t.Any], with_bound: bool) -> t.Dict[str, t.Any]:
+        # Precedence: call keywords, then the ``LogManager.context`` scope, then the fields of ``bind``; those are
+        # only added here (``with_bound``) when the record does not go through the pre-bound sink
+        if with_bound:
+            return {**self._context, **scope, **extra}
+        return {**scope, **extra}
+
+    def trace(self, msg: t.Any, *args: t.Any, depth: int = 0, **kwargs) -> None:
+        if _TRACE >= self._threshold:
+            self._emit(LogLevelEnum.TRACE, msg, args, depth, kwargs)
+        else:
+            self._stats.shard().filtered += 1
+
+    def debug(self, msg: t.Any, *args: t.Any, depth: int = 0, **kwargs) -> None:
+        if _DEBUG >= self._threshold:
+            self._emit(LogLevelEnum.DEBUG, msg, args, depth, kwargs)
+        else:
+            self._stats.shard().filtered += 1
+
+    def info(self, msg: t.Any, *args: t.Any, depth: int = 0, **kwargs) -> None:
+        if _INFO >= self._threshold:
+            self._emit(LogLevelEnum.INFO, msg, args, depth, kwargs)
+        else:
+            self._stats.shard().filtered += 1
 
-    def trace(self, msg: str, depth: int = 0, **kwargs) -> None:
-        self._emit(LogLevelEnum.TRACE, msg, depth, **kwargs)
+    def success(self, msg: t.Any, *args: t.Any, depth: int = 0, **kwargs) -> None:
+        if _SUCCESS >= self._threshold:
+            self._emit(LogLevelEnum.SUCCESS, msg, args, depth, kwargs)
+        else:
+            self._stats.shard().filtered += 1
 
-    def debug(self, msg: str, depth: int = 0, **kwargs) -> None:
-        self._emit(LogLevelEnum.DEBUG, msg, depth, **kwargs)
+    def warning(self, msg: t.Any, *args: t.Any, depth: int = 0, **kwargs) -> None:
+        if _WARNING >= self._threshold:
+            self._emit(LogLevelEnum.WARNING, msg, args, depth, kwargs)
+        else:
+            self._stats.shard().filtered += 1
 
-    def info(self, msg: str, depth: int = 0, **kwargs) -> None:
-        self._emit(LogLevelEnum.INFO, msg, depth, **kwargs)
+    def error(self, msg: t.Any, *args: t.Any, depth: int = 0, **kwargs) -> None:
+        if _ERROR >= self._threshold:
+            self._emit(LogLevelEnum.ERROR, msg, args, depth, kwargs)
+        else:
+            self._stats.shard().filtered += 1
+
+    def critical(self, msg: t.Any, *args: t.Any, depth: int = 0, **kwargs) -> None:
+        if _CRITICAL >= self._threshold:
+            self._emit(LogLevelEnum.CRITICAL, msg, args, depth, kwargs)
+        else:
+            self._stats.shard().filtered += 1
+
+    def exception(
+            self,
+            msg: t.Any,
+            *args: t.Any,
+            level: t.Union[str, LogLevelEnum] = LogLevelEnum.ERROR,
+            depth: int = 0,
+            **kwargs,
+    ) -> None:
+        # Record carrying the exception being handled (ERROR by default), call it from an ``except`` block
+        level = LogLevelEnum(level.upper())
+        severity = level.severity
+        if severity >= self._threshold:
+            exception = ExceptionInfo.capture(severity, self._registry.capture_backtrace)
+            self._emit(level, msg, args, depth, kwargs, exception)
+        else:
+            self._stats.shard().filtered += 1
+
+
+class AsyncLogger(Logger):
+    """
+    Logger for asyncio code: emitting only captures the call site and enqueues the record, message
+    rendering and every sink run on a background dispatcher thread. Arguments are rendered later,
+    so do not mutate them after the call. Await ``flush()`` or ``aclose()`` before shutting down;
+    the dispatcher thread is shared and stops once every open async logger is closed.
+    """
+
+    def __init__(self, name: str, dirname: str = "", depth: int | None = None, context: t.Optional[t.Dict[str, t.Any]] = None):
+        super().__init__(name, dirname, depth, context)
+        self._dispatcher = LoggerDispatcher.get_instance()
+        self._dispatcher.attach(self)
+
+    def _emit(
+            self,
+            level: LogLevelEnum,
+            msg: t.Any,
+            args: t.Tuple[t.Any, ...],
+            depth: int,
+            extra: t.Dict[str, t.Any],
+            exception: t.Optional[ExceptionInfo] = None,
+    ) -> None:
+        if self._depth is not None:
+            depth += self._depth
+        scope = current_context()
+        if scope:
+            extra = self._merge_context(extra, scope, False)
+
+        # Frames: _emit <- AsyncLogger.<level> <- caller
+        frame = sys._getframe(depth + 2)
+        thread = threading.current_thread()
+        call_site = LoggerCallSiteStructure(
+            name=frame.f_globals.get("__name__", ""),
+            file=frame.f_code.co_filename,
+            function=frame.f_code.co_name,
+            line=frame.f_lineno,
+            thread_id=thread.ident,
+            thread_name=thread.name,
+            timestamp=time.time(),
+        )
+        record = LoggerRecordStructure(
+            name=self._name,
+            level=level.upper(),
+            message=msg,
+            depth=depth,
+            extra=extra,
+            args=args,
+            exception=exception,
+            call_site=call_site,
+        )
+        self._dispatcher.submit(self._registry, record, self._sink)
 
-    def success(self, msg: str, depth: int = 0, **kwargs) -> None:
-        self._emit(LogLevelEnum.SUCCESS, msg, depth, **kwargs)
+    async def flush(self) -> None:
+        import asyncio  # Already loaded inside a coroutine; kept out of ``import fairylandlogger``
 
-    def warning(self, msg: str, depth: int = 0, **kwargs) -> None:
-        self._emit(LogLevelEnum.WARNING, msg, depth, **kwargs)
+        await self._dispatcher.flush()
+        await asyncio.to_thread(self._registry.flush)
 
-    def error(self, msg: str, depth: int = 0, **kwargs) -> None:
-        self._emit(LogLevelEnum.ERROR, msg, depth, **kwargs)
+    async def aclose(self) -> None:
+        import asyncio
 
-    def critical(self, msg: str, depth: int = 0, **kwargs) -> None:
-        self._emit(LogLevelEnum.CRITICAL, msg, depth, **kwargs)
+        await self._dispatcher.aclose(self)
+        await asyncio.to_thread(self._registry.flush)
 
 
 class LogManager:
     _configured: bool = False
+    _lock: threading.Lock = threading.Lock()
+    _loggers: "weakref.WeakValueDictionary[t.Tuple[type, str, str, int], Logger]" = weakref.WeakValueDictionary()
 
     @classmethod
     def configure(cls, config: LoggerConfigStructure) -> None:
@@ -83,20 +249,65 @@ class LogManager:
 
     @classmethod
     def get_logger(cls, name: str = "", /, *, dirname: str = "", depth: int = 0) -> Logger:
+        return cls._get_or_create(Logger, name, dirname, depth)
+
+    @classmethod
+    def get_async_logger(cls, name: str = "", /, *, dirname: str = "", depth: int = 0) -> AsyncLogger:
+        return cls._get_or_create(AsyncLogger, name, dirname, depth)
+
+    @classmethod
+    def _get_or_create(cls, logger_cls: t.Type[Logger], name: str, dirname: str, depth: int) -> t.Any:
         if not cls._configured:
             LoggerRegistry.get_instance().ensure_default()
             cls._configured = True
-        return Logger(name, dirname, depth)
+
+        key = (logger_cls, name, dirname, depth)
+        logger = cls._loggers.get(key)
+        if logger is None:
+            with cls._lock:
+                logger = cls._loggers.get(key)
+                if logger is None:
+                    logger = logger_cls(name, dirname, depth)
+                    cls._loggers[key] = logger
+        return logger
 
     @classmethod
     def reset(cls) -> None:
         LoggerRegistry.reset()
+        cls._loggers.clear()
         cls._configured = False
 
+    @classmethod
+    def context(cls, **fields: t.Any) -> t.ContextManager[t.Dict[str, t.Any]]:
+        # ``with LogManager.context(request_id=...)``: the fields go on every record logged inside the block, also
+        # from asyncio tasks created in it; nested scopes add to the enclosing fields
+        return context_scope(**fields)
+
     @classmethod
     def set_level(cls, prefix: str, level: str) -> None:
         LoggerRegistry.get_instance().set_level(prefix, level)
 
+    @classmethod
+    def watch_config(cls, path: str, interval: float = 1.0) -> None:
+        LoggerRegistry.get_instance().watch_config(path, interval)
+
+    @classmethod
+    def set_rate_limit(cls, prefix: str, rate: t.Optional[str]) -> None:
+        LoggerRegistry.get_instance().set_rate_limit(prefix, rate)
+
+    @classmethod
+    def dump_flight_recorder(cls, reason: str = "requested") -> t.Optional[str]:
+        # Path of the written dump, None when the flight recorder is disabled
+        return LoggerRegistry.get_instance().dump_flight_recorder(reason)
+
+    @classmethod
+    def get_stats(cls) -> t.Dict[str, t.Any]:
+        return LoggerRegistry.get_instance().stats()
+
+    @classmethod
+    def get_queue_stats(cls) -> t.Dict[str, t.Dict[str, t.Any]]:
+        return LoggerRegistry.get_instance().queue_stats()
+
     @classmethod
     def get_registry(cls) -> LoggerRegistry:
         return LoggerRegistry.get_instance()
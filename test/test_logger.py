@@ -7,11 +7,23 @@
 @datetime: 2025-11-29 17:41:08 UTC+08:00
 """
 
+import asyncio
+import contextlib
+import io
 import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
 import unittest
 from pathlib import Path
+from unittest import mock
 
-from fairylandlogger import LogManager
+from loguru import logger as _loguru_logger
+
+from fairylandlogger import Lazy, LogManager, LoggerConfigStructure, LogLevelEnum
+from fairylandlogger._context import resolve_pattern
 
 
 class TestFairylandLogger(unittest.TestCase):
@@ -47,6 +59,387 @@ class TestFairylandLogger(unittest.TestCase):
         logger1.info("Info message from another logger")
         logger1.debug("Debug message from another logger")
 
+    def test_level_gate(self):
+        LogManager.configure(LoggerConfigStructure(level=LogLevelEnum.INFO, console=False))
+        registry = LogManager.get_registry()
+        LogManager.set_level("pkg.noisy", "ERROR")
+
+        self.assertEqual(registry.effective_severity("pkg"), LogLevelEnum.INFO.severity)
+        self.assertEqual(registry.effective_severity("pkg.noisy.worker"), LogLevelEnum.ERROR.severity)
+
+        logger = LogManager.get_logger("pkg.noisy.worker")
+        with mock.patch.object(registry, "route") as route:
+            logger.debug("filtered")
+            logger.warning("filtered")
+            self.assertFalse(route.called)
+            logger.error("routed")
+            self.assertEqual(route.call_count, 1)
+
+        # Cached thresholds are invalidated by set_level
+        LogManager.set_level("pkg.noisy", LogLevelEnum.DEBUG)
+        self.assertEqual(registry.effective_severity("pkg.noisy.worker"), LogLevelEnum.DEBUG.severity)
+
+    def test_success_level_is_ordered(self):
+        LogManager.configure(LoggerConfigStructure(level=LogLevelEnum.WARNING, console=False))
+        logger = LogManager.get_logger("pkg")
+
+        self.assertFalse(logger.is_enabled(LogLevelEnum.SUCCESS))
+        self.assertTrue(logger.is_enabled("error"))
+
+    def test_deferred_message_formatting(self):
+        LogManager.configure(LoggerConfigStructure(level=LogLevelEnum.INFO, console=False))
+        logger = LogManager.get_logger()
+        lazy = mock.Mock(return_value="expensive")
+        messages = []
+        _loguru_logger.add(messages.append, format="{message}")
+
+        logger.debug(Lazy(lazy))
+        self.assertFalse(lazy.called)
+
+        logger.info("x=%s y=%d", "a", 2)
+        logger.info("x={} y={}", "a", 2)
+        logger.info(Lazy(lazy))
+        logger.info(len)  # Plain callables are logged, not called
+        logger.info("%(user)s logged in", {"user": "ann"})  # A single mapping feeds named fields, as in stdlib
+        logger.info("{user} logged out", {"user": "ann"})
+
+        self.assertEqual(
+            [m.strip() for m in messages],
+            ["x=a y=2", "x=a y=2", "expensive", str(len), "ann logged in", "ann logged out"],
+        )
+
+    def test_bad_format_args_never_raise(self):
+        LogManager.configure(LoggerConfigStructure(level=LogLevelEnum.INFO, console=False))
+        logger = LogManager.get_logger()
+        messages = []
+        _loguru_logger.add(messages.append, format="{message}")
+
+        logger.info("{x}", 1)
+        logger.info("%d items", "many")
+        logger.info(Lazy(lambda: 1 / 0))
+
+        self.assertEqual([m.strip() for m in messages[:2]], ["{x} (1,)", "%d items ('many',)"])
+        self.assertIn("ZeroDivisionError", messages[2])
+
+    def test_logger_cache_and_refresh(self):
+        LogManager.configure(LoggerConfigStructure(level=LogLevelEnum.INFO, console=False))
+        logger = LogManager.get_logger("pkg.cached")
+        self.assertIs(logger, LogManager.get_logger("pkg.cached"))
+        self.assertIsNot(logger, LogManager.get_logger("pkg.cached", depth=1))
+
+        records = []
+        _loguru_logger.add(lambda m: records.append(m.record), format="{message}")
+        logger.info("caller")
+        self.assertEqual(records[-1]["function"], "test_logger_cache_and_refresh")
+        self.assertEqual(records[-1]["extra"]["logger_name"], "pkg.cached")
+
+        self.assertFalse(logger.is_enabled(LogLevelEnum.DEBUG))
+        LogManager.set_level("pkg", LogLevelEnum.DEBUG)
+        self.assertTrue(logger.is_enabled(LogLevelEnum.DEBUG))
+
+    def test_async_logger(self):
+        LogManager.configure(LoggerConfigStructure(level=LogLevelEnum.INFO, console=False))
+        logger = LogManager.get_async_logger("pkg.aio")
+        records = []
+        _loguru_logger.add(lambda m: records.append(m.record), format="{message}")
+
+        async def handler():
+            logger.info("request %s", "r1", request_id="r1")
+            logger.debug("filtered")
+            await logger.flush()
+
+        asyncio.run(handler())
+
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0]["message"], "[pkg.aio] request r1")
+        self.assertEqual(records[0]["function"], "handler")
+        self.assertEqual(records[0]["thread"].name, threading.current_thread().name)
+        self.assertEqual(records[0]["extra"]["request_id"], "r1")
+
+    def test_async_dispatcher_lifecycle(self):
+        from fairylandlogger._dispatcher import LoggerDispatcher
+
+        LogManager.configure(LoggerConfigStructure(level=LogLevelEnum.INFO, console=False))
+        messages = []
+        _loguru_logger.add(messages.append, format="{message}")
+
+        # Closing one async logger leaves the shared dispatcher running for the others
+        with mock.patch.object(LoggerDispatcher, "_instance", None):
+            first, second = LogManager.get_async_logger("pkg.aio.a"), LogManager.get_async_logger("pkg.aio.b")
+            dispatcher = LoggerDispatcher.get_instance()
+
+            async def handler():
+                first.info("a")
+                await first.aclose()
+                self.assertIsNotNone(dispatcher._thread)
+                second.info("b")
+                await second.flush()
+                self.assertEqual([m.strip() for m in messages], ["[pkg.aio.a] a", "[pkg.aio.b] b"])
+                await second.aclose()
+                self.assertIsNone(dispatcher._thread)
+
+            asyncio.run(handler())
+
+        class Registry:
+            routed = []
+            writing = set()
+            overlapped = False
+
+            def route(self, record, sink):
+                # Two dispatcher threads writing at once would interleave records
+                self.writing.add(threading.get_ident())
+                self.overlapped |= len(self.writing) > 1
+                time.sleep(0)
+                self.writing.discard(threading.get_ident())
+                self.routed.append(record)
+
+        # Flush waits for earlier records only, and a restart never runs beside the thread still closing
+        dispatcher, registry = LoggerDispatcher(), Registry()
+        stop = threading.Event()
+        submitted = []
+
+        def submit():
+            while not stop.is_set():
+                dispatcher.submit(registry, len(submitted))
+                submitted.append(None)
+                time.sleep(0.0001)
+
+        producer = threading.Thread(target=submit)
+        producer.start()
+        try:
+            for _ in range(20):
+                self.assertTrue(dispatcher.join(5.0))
+                dispatcher.close(5.0)
+        finally:
+            stop.set()
+            producer.join()
+        self.assertTrue(dispatcher.join(5.0))
+        dispatcher.close(5.0)
+        self.assertFalse(registry.overlapped)
+        self.assertEqual(registry.routed, list(range(len(submitted))))
+
+    def test_bind_and_context(self):
+        LogManager.configure(LoggerConfigStructure(
+            level=LogLevelEnum.INFO, console=False, pattern="{extra[request_id]}|{extra[user]}|{message}",
+        ))
+        lines = []
+        pattern = "{extra[request_id]}|{extra[user]}|{message}\n"
+        _loguru_logger.add(lambda m: lines.append(str(m).rstrip("\n")), format=lambda r: resolve_pattern(pattern, r["extra"]))
+        logger = LogManager.get_logger("pkg.ctx")
+        child = logger.bind(user="ann")
+
+        logger.info("outside")
+        child.info("bound")
+        with LogManager.context(request_id="r1"):
+            child.info("scoped", depth=0)
+            with LogManager.context(user="bob"):
+                child.info("nested", user="eve")
+                logger.info("depth", depth=0)
+
+            async def handler():
+                logger.info("in task")
+                aio = LogManager.get_async_logger("pkg.ctx").bind(user="cat")
+                aio.info("async")
+                await aio.flush()
+
+            asyncio.run(handler())
+        logger.info("after")
+
+        self.assertEqual(lines, [
+            "||[pkg.ctx] outside",
+            "|ann|[pkg.ctx] bound",
+            "r1|ann|[pkg.ctx] scoped",
+            "r1|eve|[pkg.ctx] nested",
+            "r1|bob|[pkg.ctx] depth",
+            "r1||[pkg.ctx] in task",
+            "r1|cat|[pkg.ctx] async",
+            "||[pkg.ctx] after",
+        ])
+        self.assertEqual(child.context, {"user": "ann"})
+        self.assertIsNot(child, logger)
+
+    def test_application_extra_is_left_alone(self):
+        # Pattern fields missing from a record render empty in this library's handlers, not through loguru's
+        # process-wide ``extra``, which belongs to the application
+        _loguru_logger.configure(extra={"app_key": "x"})
+        try:
+            LogManager.configure(LoggerConfigStructure(
+                level=LogLevelEnum.INFO, console=False, pattern="{extra[request_id]}|{extra[app_key]}|{message}",
+            ))
+            records = []
+            _loguru_logger.add(lambda m: records.append(m.record["extra"]), format="{message}")
+            _loguru_logger.info("from the application")
+            self.assertEqual(records[-1], {"app_key": "x"})
+        finally:
+            _loguru_logger.configure(extra={})
+
+    def test_concurrent_routing_and_reconfigure(self):
+        # Emitting threads race a thread that keeps changing levels and reconfiguring; also meant for
+        # free-threaded builds, where nothing serializes the readers of the routing snapshot
+        LogManager.configure(LoggerConfigStructure(level=LogLevelEnum.INFO, console=False))
+        LogManager.set_level("pkg.stress.quiet", "ERROR")
+        received = []
+        _loguru_logger.add(lambda m: received.append(m.record["extra"]["logger_name"]), format="{message}", catch=False)
+        loud, quiet = LogManager.get_logger("pkg.stress.loud"), LogManager.get_logger("pkg.stress.quiet")
+        workers, calls = 8, 2000
+        stop = threading.Event()
+        barrier = threading.Barrier(workers + 1)
+        errors = []
+
+        def emit():
+            barrier.wait()
+            try:
+                for i in range(calls):
+                    loud.info("tick %d", i)
+                    quiet.info("hidden %d", i)
+            except Exception as error:  # pragma: no cover - reported below
+                errors.append(error)
+
+        def mutate():
+            barrier.wait()
+            levels = (LogLevelEnum.DEBUG, LogLevelEnum.INFO)
+            n = 0
+            while not stop.is_set():
+                n += 1
+                LogManager.configure(LoggerConfigStructure(level=levels[n % 2], console=False))
+                LogManager.set_level("pkg.stress.quiet", ("ERROR", "WARNING")[n % 2])
+                LogManager.set_level(f"pkg.stress.other{n % 16}", "DEBUG")
+
+        threads = [threading.Thread(target=emit) for _ in range(workers)]
+        mutator = threading.Thread(target=mutate)
+        for thread in threads + [mutator]:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        stop.set()
+        mutator.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(received.count("pkg.stress.loud"), workers * calls)
+        self.assertNotIn("pkg.stress.quiet", received)
+        # Counters updated from every thread at once lose no increment
+        stats = LogManager.get_stats()
+        self.assertEqual(stats["by_logger"], {"pkg.stress.loud": workers * calls})
+        self.assertEqual(stats["filtered"], workers * calls)
+
+    def test_rate_limit(self):
+        LogManager.configure(LoggerConfigStructure(level=LogLevelEnum.INFO, console=False, call_site_rate_limit="2/h"))
+        LogManager.set_rate_limit("pkg.noisy", "3/h")
+        noisy, quiet = LogManager.get_logger("pkg.noisy.db"), LogManager.get_logger("pkg.quiet")
+        messages = []
+        _loguru_logger.add(messages.append, format="{message}")
+
+        for i in range(5):
+            noisy.info("tick %d", i)
+        for i in range(3):
+            quiet.info("a %d", i)
+            quiet.info("b %d", i)
+        self.assertEqual(
+            [m.strip() for m in messages],
+            ["[pkg.noisy.db] tick 0", "[pkg.noisy.db] tick 1", "[pkg.quiet] a 0", "[pkg.quiet] b 0", "[pkg.quiet] a 1", "[pkg.quiet] b 1"],
+        )
+
+        limiter = LogManager.get_registry()._limiter
+        limiter._bucket_for("pkg.noisy.db").tokens = 1
+        noisy.info("tick again")
+        self.assertEqual([m.strip() for m in messages[-2:]], ["[pkg.noisy.db] 2 records suppressed by rate limit", "[pkg.noisy.db] tick again"])
+
+    def test_duplicate_suppression(self):
+        LogManager.configure(LoggerConfigStructure(level=LogLevelEnum.INFO, console=False, dedupe=True))
+        logger = LogManager.get_logger("pkg.dup")
+        records = []
+        _loguru_logger.add(lambda m: records.append(m.record), format="{message}")
+
+        for _ in range(4):
+            logger.warning("disk full")
+        logger.info("recovered")
+        logger.info("recovered")
+        LogManager.get_registry().flush()
+
+        self.assertEqual(
+            [(r["level"].name, r["message"]) for r in records],
+            [
+                ("WARNING", "[pkg.dup] disk full"),
+                ("WARNING", "[pkg.dup] Last message repeated 3 times"),
+                ("INFO", "[pkg.dup] recovered"),
+                ("INFO", "[pkg.dup] Last message repeated 1 times"),
+            ],
+        )
+        self.assertEqual(records[1]["function"], "test_duplicate_suppression")
+
+    def test_summaries_of_quiet_runs(self):
+        LogManager.configure(LoggerConfigStructure(level=LogLevelEnum.INFO, console=False, dedupe=True))
+        LogManager.set_rate_limit("pkg.burst", "1/h")
+        registry = LogManager.get_registry()
+        registry._SUMMARY_QUIET = 0.05
+        messages = []
+        _loguru_logger.add(messages.append, format="{message}")
+
+        for _ in range(3):
+            LogManager.get_logger("pkg.flood").warning("disk full")
+        for i in range(3):
+            LogManager.get_logger("pkg.burst").info("tick %d", i)
+        registry._tick_summaries()  # Still active
+        self.assertEqual([m.strip() for m in messages], ["[pkg.flood] disk full", "[pkg.burst] tick 0"])
+
+        time.sleep(0.1)
+        registry._tick_summaries()
+        registry._tick_summaries()
+        self.assertEqual(
+            sorted(m.strip() for m in messages[2:]),
+            ["[pkg.burst] 2 records suppressed by rate limit", "[pkg.flood] Last message repeated 2 times"],
+        )
+
+        # Counts still pending at exit are written before the handlers close
+        code = (
+            "import sys\n"
+            "from fairylandlogger import LogManager, LoggerConfigStructure\n"
+            "from loguru import logger\n"
+            "LogManager.configure(LoggerConfigStructure(console=False, dedupe=True, rate_limits={'pkg.burst': '1/h'}))\n"
+            "logger.add(sys.stdout, format='{message}')\n"
+            "for i in range(3):\n"
+            "    LogManager.get_logger('pkg.flood').warning('disk full')\n"
+            "    LogManager.get_logger('pkg.burst').info('tick %d', i)\n"
+        )
+        env = {**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)}
+        with tempfile.TemporaryDirectory() as dirname:
+            output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env, cwd=dirname, check=True).stdout
+        self.assertIn("[pkg.flood] Last message repeated 2 times", output.splitlines())
+        self.assertIn("[pkg.burst] 2 records suppressed by rate limit", output.splitlines())
+
+    def test_lazy_imports(self):
+        code = "import sys, fairylandlogger; print(sorted(m for m in ('loguru', 'yaml', 'asyncio') if m in sys.modules))"
+        env = {**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)}
+        output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env, check=True).stdout
+        self.assertEqual(output.strip(), "[]")
+
+    def test_auto_config_cached_and_banner_once(self):
+        from fairylandlogger._appenders import ConsoleLoggerAppender
+
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as dirname, mock.patch.object(ConsoleLoggerAppender, "_banner_printed", False):
+            Path(dirname, "fairyland-logger.yaml").write_text("fairyland:\n  logger:\n    level: WARNING\n", encoding="UTF-8")
+            os.chdir(dirname)
+            try:
+                output = io.StringIO()
+                with contextlib.redirect_stdout(output), mock.patch(
+                        "fairylandlogger._structure.LoggerConfigStructure.from_yaml", wraps=LoggerConfigStructure.from_yaml,
+                ) as from_yaml:
+                    LogManager.get_logger()
+                    LogManager.reset()
+                    LogManager.get_logger()
+                    LogManager.configure(LoggerConfigStructure(banner=False))
+                self.assertEqual(from_yaml.call_count, 1)
+                self.assertEqual(output.getvalue().count("F A I R Y L A N D"), 1)
+
+                # An edited file is parsed again after ``reset`` instead of re-applying the cached config
+                Path(dirname, "fairyland-logger.yaml").write_text("fairyland:\n  logger:\n    level: ERROR\n    banner: false\n", encoding="UTF-8")
+                LogManager.reset()
+                LogManager.get_logger()
+                self.assertEqual(LogManager.get_registry()._config.level, LogLevelEnum.ERROR)
+            finally:
+                os.chdir(cwd)
+
 
 if __name__ == "__main__":
     unittest.main()
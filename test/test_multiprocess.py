@@ -0,0 +1,120 @@
+# coding: UTF-8
+"""
+@software: PyCharm
+@author: Lionel Johnson
+@contact: https://fairy.host
+@organization: https://github.com/FairylandFuture
+@datetime: 2026-10-17 14:48:03 UTC+08:00
+"""
+
+import contextlib
+import io
+import multiprocessing
+import os
+import tempfile
+import time
+import unittest
+
+from fairylandlogger import LogManager, LoggerConfigStructure, LogLevelEnum
+
+
+def _worker(config: LoggerConfigStructure, index: int) -> None:
+    # Pre-fork servers typically configure again in every worker
+    LogManager.configure(config)
+    logger = LogManager.get_logger("svc.worker")
+    for i in range(50):
+        logger.info("worker %d line %d", index, i)
+    LogManager.get_registry().flush()
+
+
+@unittest.skipUnless(hasattr(os, "fork"), "requires fork")
+class TestMultiprocessWriter(unittest.TestCase):
+
+    def setUp(self):
+        LogManager.reset()
+        self._tmp = tempfile.TemporaryDirectory()
+        self.config = LoggerConfigStructure(
+            level=LogLevelEnum.INFO, console=False, file=True, dirname=self._tmp.name, multiprocess=True, rotation="4 KB",
+        )
+
+    def tearDown(self):
+        LogManager.reset()
+        self._tmp.cleanup()
+
+    def _read_lines(self, expected: int):
+        deadline = time.monotonic() + 10
+        while True:
+            lines = []
+            for name in os.listdir(self._tmp.name):
+                if name.startswith("fairyland-logger"):
+                    with open(os.path.join(self._tmp.name, name), encoding="UTF-8") as stream:
+                        lines.extend(stream.read().splitlines())
+            if len(lines) >= expected or time.monotonic() > deadline:
+                return lines
+            time.sleep(0.05)
+
+    def test_workers_write_through_central_writer(self):
+        LogManager.configure(self.config)
+        context = multiprocessing.get_context("fork")
+        workers = [context.Process(target=_worker, args=(self.config, i)) for i in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(10)
+
+        lines = self._read_lines(200)
+        self.assertEqual(len(lines), 200)
+        for index in range(4):
+            self.assertEqual(sum(f"worker {index} line" in line for line in lines), 50)
+        self.assertGreater(len(os.listdir(self._tmp.name)), 2)  # rotated by the writer only
+
+    def test_writer_survives_bad_batches(self):
+        from multiprocessing.connection import Client
+
+        from fairylandlogger._multiprocess import _process_authkey
+
+        LogManager.configure(self.config)
+        self.assertNotIn("FAIRY_LOG_WRITER_AUTHKEY", os.environ)  # exec'd programs must not inherit the key
+        errors = io.StringIO()
+        with contextlib.redirect_stderr(errors):
+            with Client(os.environ["FAIRY_LOG_WRITER_ADDRESS"], authkey=_process_authkey()) as connection:
+                connection.send(({}, [("unknown.log", b"lost\n", 20, 0.0)]))  # No spec for this path
+                connection.send_bytes(b"not a pickle")
+            context = multiprocessing.get_context("fork")
+            worker = context.Process(target=_worker, args=(self.config, 0))
+            worker.start()
+            worker.join(10)
+            lines = self._read_lines(50)
+
+        self.assertEqual(len(lines), 50)
+        self.assertIn("failed to write a batch", errors.getvalue())
+        self.assertIn("unreadable batch", errors.getvalue())
+
+    def test_turning_multiprocess_off_stops_the_writer(self):
+        from fairylandlogger import _multiprocess, _sinks
+
+        LogManager.configure(self.config)
+        registry = LogManager.get_registry()
+        writer = registry._central_writer
+        self.assertIsNotNone(writer)
+        self.assertIn("FAIRY_LOG_WRITER_ADDRESS", os.environ)
+        # Forward as a forked worker would
+        _multiprocess._channel = _multiprocess.LogChannel(writer.address, _multiprocess._process_authkey())
+        _sinks.set_forwarder(_multiprocess._channel)
+
+        LogManager.configure(LoggerConfigStructure(
+            level=LogLevelEnum.INFO, console=False, file=True, dirname=self._tmp.name, rotation="4 KB",
+        ))
+        self.assertIsNone(registry._central_writer)
+        self.assertTrue(writer._closed)
+        self.assertNotIn("FAIRY_LOG_WRITER_ADDRESS", os.environ)
+        self.assertIsNone(_multiprocess._channel)
+        self.assertIsNone(_sinks._forwarder)
+
+        LogManager.get_logger("svc.local").info("written locally")
+        LogManager.get_registry().flush()
+        self.assertEqual(len(self._read_lines(1)), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,740 @@
+# coding: UTF-8
+"""
+@software: PyCharm
+@author: Lionel Johnson
+@contact: https://fairy.host
+@organization: https://github.com/FairylandFuture
+@datetime: 2026-10-17 09:40:12 UTC+08:00
+"""
+
+import contextlib
+import datetime
+import gc
+import glob
+import gzip
+import io
+import json
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from loguru import logger as _loguru_logger
+
+from fairylandlogger import LogManager, LoggerConfigStructure, LogLevelEnum, NetworkFormatEnum, NetworkProtocolEnum
+from fairylandlogger.__main__ import main as cli_main
+from fairylandlogger._binary import iter_records, render_pattern
+from fairylandlogger._index import query, read_index
+from fairylandlogger._network import NetworkSink
+from fairylandlogger._recorder import read_ring_buffer
+from fairylandlogger._serializers import JSONRecordSerializer
+from fairylandlogger._watcher import ConfigWatcher
+from fairylandlogger._sinks import (
+    QueuedSink, RotatingFileSink, next_daytime, parse_daytime, parse_duration, parse_size, rotation_scheduler,
+)
+
+
+class _Message(str):
+    record: dict
+
+
+class TestSinks(unittest.TestCase):
+
+    def setUp(self):
+        LogManager.reset()
+        self._tmp = tempfile.TemporaryDirectory()
+        self.dirname = self._tmp.name
+
+    def tearDown(self):
+        LogManager.reset()
+        self._tmp.cleanup()
+
+    def test_parse_rotation_and_retention(self):
+        self.assertEqual(parse_size("5 MB"), 5 * 1024 ** 2)
+        self.assertEqual(parse_size("100KB"), 100 * 1024)
+        self.assertIsNone(parse_size("1 day"))
+        self.assertEqual(parse_duration("180 days"), 180 * 86400)
+        self.assertEqual(parse_duration("1 week"), 7 * 86400)
+        # loguru's time of day and weekday forms
+        self.assertEqual(parse_daytime("00:00"), (None, 0))
+        self.assertEqual(parse_daytime("18:30:15"), (None, 18 * 3600 + 30 * 60 + 15))
+        self.assertEqual(parse_daytime("monday"), (0, 0))
+        self.assertEqual(parse_daytime("Sunday at 12:00"), (6, 12 * 3600))
+        self.assertEqual(parse_daytime("w2"), (2, 0))
+        self.assertIsNone(parse_daytime("25:00"))
+        self.assertIsNone(parse_daytime("5 MB"))
+
+        friday = datetime.datetime(2026, 10, 16, 15, 0).timestamp()
+        self.assertEqual(next_daytime((None, 0), friday), datetime.datetime(2026, 10, 17).timestamp())
+        self.assertEqual(next_daytime((None, 16 * 3600), friday), datetime.datetime(2026, 10, 16, 16).timestamp())
+        self.assertEqual(next_daytime((0, 12 * 3600), friday), datetime.datetime(2026, 10, 19, 12).timestamp())
+        self.assertEqual(next_daytime((4, 15 * 3600), friday), datetime.datetime(2026, 10, 23, 15).timestamp())
+
+        sink = RotatingFileSink(os.path.join(self.dirname, "daily.log"), rotation="monday at 12:00")
+        sink.write("line\n")
+        self.assertEqual(datetime.datetime.fromtimestamp(sink._rotate_deadline).strftime("%A %H:%M"), "Monday 12:00")
+        sink.stop()
+
+    def test_rotating_file_sink(self):
+        path = os.path.join(self.dirname, "app.log")
+        sink = RotatingFileSink(path, rotation="10 B", retention=2)
+        for i in range(5):
+            sink.write(f"line-{i}\n")
+        sink.stop()
+        rotation_scheduler.join()
+
+        self.assertEqual(len(sink.rotated_files()), 2)
+        with open(path, encoding="UTF-8") as stream:
+            self.assertEqual(stream.read(), "line-4\n")
+
+    def test_rotation_scheduler(self):
+        path = os.path.join(self.dirname, "timed.log")
+        stale = os.path.join(self.dirname, "timed.2020-01-01_00-00-00_000000.log")
+        with open(stale, "w", encoding="UTF-8") as stream:
+            stream.write("old\n")
+        sink = RotatingFileSink(path, rotation="0.2 seconds", retention="1 day")
+        sink.write("first\n")
+        sink.write("second\n")
+        self.assertEqual(sink.rotated_files(), [stale])
+
+        # The scheduler marks the segment due once its interval has passed; the next write rotates
+        deadline = time.monotonic() + 5
+        while sink._rotate_limit and time.monotonic() < deadline:
+            time.sleep(0.01)
+        rotations = rotation_scheduler.rotations
+        sink.write("third\n")
+        rotation_scheduler.join()
+        sink.stop()
+
+        self.assertEqual(rotation_scheduler.rotations, rotations + 1)
+        rotated = sink.rotated_files()
+        self.assertEqual(len(rotated), 1)  # The 2020 segment expired by the stamp in its name
+        with open(rotated[0], encoding="UTF-8") as stream:
+            self.assertEqual(stream.read(), "first\nsecond\n")
+        with open(path, encoding="UTF-8") as stream:
+            self.assertEqual(stream.read(), "third\n")
+
+    def test_rotated_files_are_compressed(self):
+        from fairylandlogger._sinks import _compressor
+
+        path = os.path.join(self.dirname, "app.log")
+        sink = RotatingFileSink(path, rotation="100 B", retention=2, compression="gzip")
+        for i in range(5):
+            sink.write_bytes(f"{i}".encode() * 80 + b"\n")
+            time.sleep(0.01)
+        _compressor.join()
+        rotation_scheduler.join()
+        sink.stop()
+
+        rotated = sorted(sink.rotated_files())
+        self.assertEqual(len(rotated), 2)
+        self.assertTrue(all(p.endswith(".log.gz") for p in rotated))
+        with gzip.open(rotated[-1], "rb") as stream:
+            self.assertEqual(stream.read(), b"3" * 80 + b"\n")
+        with self.assertRaises(ValueError):
+            RotatingFileSink(path, compression="zip")
+
+    def test_buffered_file_sink(self):
+        path = os.path.join(self.dirname, "buffered.log")
+        sink = RotatingFileSink(path, buffer_size="1 KB", flush_records=3)
+        sink.write("one\n")
+        sink.write("two\n")
+        self.assertFalse(os.path.exists(path))
+
+        sink.write("three\n")
+        with open(path, encoding="UTF-8") as stream:
+            self.assertEqual(stream.read(), "one\ntwo\nthree\n")
+
+        sink.write("four\n")
+        sink.stop()
+        with open(path, encoding="UTF-8") as stream:
+            self.assertEqual(stream.read().splitlines()[-1], "four")
+
+    def test_buffered_appender_flushes_errors(self):
+        config = LoggerConfigStructure(
+            level=LogLevelEnum.INFO, console=False, file=True, dirname=self.dirname, buffered=True, flush_interval=0,
+        )
+        LogManager.configure(config)
+        logger = LogManager.get_logger()
+        path = os.path.join(self.dirname, config.filename)
+
+        queue = LogManager.get_registry().appenders[0]._queue
+        logger.info("buffered")
+        queue.join()
+        self.assertFalse(os.path.exists(path))
+
+        logger.error("urgent")
+        queue.join()
+        with open(path, encoding="UTF-8") as stream:
+            self.assertEqual(len(stream.read().splitlines()), 2)
+
+    def test_json_appender_flat_lines_with_extras(self):
+        config = LoggerConfigStructure(level=LogLevelEnum.INFO, console=False, file=True, json=True, dirname=self.dirname)
+        LogManager.configure(config)
+        logger = LogManager.get_logger("svc.api")
+
+        logger.info("user %s logged in", "alice", user_id=42)
+        try:
+            1 / 0
+        except ZeroDivisionError:
+            _loguru_logger.opt(exception=True).bind(logger_name="svc.api").error("boom")
+        LogManager.reset()
+
+        with open(os.path.join(self.dirname, "fairyland-logger-json.log"), encoding="UTF-8") as stream:
+            lines = [json.loads(line) for line in stream]
+
+        self.assertEqual(lines[0]["message"], "user alice logged in")
+        self.assertEqual(lines[0]["logger"], "svc.api")
+        self.assertEqual(lines[0]["user_id"], 42)
+        self.assertEqual(lines[0]["level"], "INFO")
+        self.assertNotIn("exception", lines[0])
+        self.assertIn("ZeroDivisionError", lines[1]["exception"])
+
+    def test_json_serializer_stdlib_fallback(self):
+        serializer = JSONRecordSerializer(fields=("level", "message"), use_orjson=False)
+        record = {"level": mock.Mock(), "message": "hi", "extra": {"logger_name": "x", "k": "v"}}
+        record["level"].name = "INFO"
+        self.assertEqual(serializer(record), b'{"level":"INFO","message":"hi","k":"v"}\n')
+
+    def test_bounded_queue_policies(self):
+        class SlowTarget:
+            def __init__(self):
+                self.release = threading.Event()
+                self.written = []
+
+            def write(self, message):
+                self.release.wait(5)
+                self.written.append(str(message))
+
+        def message(text, level_no):
+            item = _Message(text)
+            item.record = {"level": mock.Mock(no=level_no)}
+            return item
+
+        for policy, expected in (
+                ("drop_newest", ["m0", "m1", "m2"]),
+                ("drop_oldest", ["m0", "m3", "m4"]),
+                ("drop_below_level", ["m0", "m2", "warn"]),
+        ):
+            target = SlowTarget()
+            reports = []
+            queue = QueuedSink(target, maxsize=2, policy=policy, report=reports.append)
+            queue.write(message("m0", 20))
+            while queue.depth:  # the writer thread holds m0 until released
+                time.sleep(0.001)
+            for text in ("m1", "m2", "m3", "m4"):
+                queue.write(message(text, 20))
+            if policy == "drop_below_level":
+                queue.write(message("warn", 30))
+            target.release.set()
+            queue.join()
+            queue.stop()
+
+            self.assertEqual(target.written, expected, policy)
+            self.assertEqual(queue.stats()["dropped"], 2 if policy != "drop_below_level" else 3)
+            self.assertEqual(len(reports), 1)
+
+    def test_queue_report_does_not_wait_on_its_own_queue(self):
+        release = threading.Event()
+        written = []
+
+        def message(text, level_no):
+            item = _Message(text)
+            item.record = {"level": mock.Mock(no=level_no)}
+            return item
+
+        class Target:
+            def write(self, item):
+                release.wait(5)
+                written.append(str(item))
+
+        def report(summary):
+            # Like loguru: the summary is logged again through every handler, this queue included
+            for _ in range(3):
+                queue.write(message(summary, 30))
+
+        queue = QueuedSink(Target(), maxsize=1, policy="drop_below_level", report=report)
+        queue.write(message("m0", 20))
+        while queue.depth:
+            time.sleep(0.001)
+        queue.write(message("m1", 20))
+        queue.write(message("m2", 20))  # Dropped: the queue holds m1
+        release.set()
+        joined = threading.Thread(target=queue.join, daemon=True)
+        joined.start()
+        joined.join(5)
+        self.assertFalse(joined.is_alive())
+        queue.stop()
+        self.assertEqual(written[:2], ["m0", "m1"])
+        self.assertEqual(len(written), 5)
+        self.assertTrue(written[2].startswith("Log queue"))
+
+    def test_logger_files_share_one_handler(self):
+        LogManager.configure(LoggerConfigStructure(level=LogLevelEnum.INFO, console=False, file=True, dirname=self.dirname))
+        registry = LogManager.get_registry()
+        loggers = [LogManager.get_logger(f"svc.worker{i}") for i in range(20)]
+        routed_files = len(registry._logger_file_router)
+
+        for i, logger in enumerate(loggers):
+            logger.info("hello from %d", i)
+        LogManager.reset()
+
+        self.assertEqual(routed_files, 20)
+        for i in range(20):
+            with open(os.path.join(self.dirname, f"svc.worker{i}.log"), encoding="UTF-8") as stream:
+                lines = stream.read().splitlines()
+            self.assertEqual(len(lines), 1)
+            self.assertTrue(lines[0].endswith(f"[svc.worker{i}] hello from {i}"))
+
+    def test_logger_files_bounded_handle_pool(self):
+        LogManager.configure(LoggerConfigStructure(
+            level=LogLevelEnum.INFO, console=False, file=True, dirname=self.dirname,
+            logger_files_max_open=4, logger_files_idle_timeout=0.1,
+        ))
+        registry = LogManager.get_registry()
+        loggers = [LogManager.get_logger(f"tenant{i}") for i in range(10)]
+        pool = registry._logger_file_router.pool
+
+        for round_no in range(2):
+            for i, logger in enumerate(loggers):
+                logger.info("round %d for %d", round_no, i)
+            registry.flush()
+            self.assertLessEqual(len(pool), 4)
+        stats = registry.stats()["appenders"]["logger-files"]
+        self.assertGreaterEqual(stats["evicted_files"], 16)
+
+        # Files not written for the idle timeout are closed by the sweeper
+        deadline = time.monotonic() + 5
+        while len(pool) and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self.assertEqual(len(pool), 0)
+        loggers[3].info("after idle")
+        registry.flush()
+        self.assertEqual(len(pool), 1)
+        LogManager.reset()
+
+        for i in range(10):
+            with open(os.path.join(self.dirname, f"tenant{i}.log"), encoding="UTF-8") as stream:
+                lines = [line.split(" - ", 1)[1] for line in stream.read().splitlines()]
+            expected = [f"[tenant{i}] round 0 for {i}", f"[tenant{i}] round 1 for {i}"] + (["[tenant3] after idle"] if i == 3 else [])
+            self.assertEqual(lines, expected)
+
+    def test_stats(self):
+        LogManager.configure(LoggerConfigStructure(level=LogLevelEnum.INFO, console=False, file=True, dirname=self.dirname))
+        logger = LogManager.get_logger("svc.stats")
+        logger.info("one")
+        logger.warning("two")
+        logger.debug("filtered")
+        LogManager.get_registry().flush()
+
+        stats = LogManager.get_stats()
+        self.assertEqual(stats["emitted"], 2)
+        self.assertEqual(stats["by_level"], {"INFO": 1, "WARNING": 1})
+        self.assertEqual(stats["by_logger"], {"svc.stats": 2})
+        self.assertEqual(stats["filtered"], 1)
+        self.assertEqual(set(stats["rotation"]), {"rotations", "deleted", "scheduled"})
+
+        main = stats["appenders"][os.path.join(self.dirname, "fairyland-logger.log")]
+        self.assertEqual(main["depth"], 0)
+        self.assertEqual(main["bytes_written"], os.path.getsize(os.path.join(self.dirname, "fairyland-logger.log")))
+        self.assertEqual(main["latency"]["count"], 2)
+        self.assertEqual(stats["appenders"]["logger-files"]["latency"]["count"], 2)
+
+        # Gate rejections outlive the logger that counted them, and the counts of finished threads are kept
+        del logger
+        for _ in range(10):
+            LogManager.get_logger("svc.transient").debug("dropped")
+        thread = threading.Thread(target=lambda: LogManager.get_logger("svc.thread").debug("dropped"))
+        thread.start()
+        thread.join()
+        gc.collect()
+        self.assertEqual(LogManager.get_stats()["filtered"], 12)
+
+    def test_stats_self_report(self):
+        LogManager.configure(LoggerConfigStructure(level=LogLevelEnum.INFO, console=False, stats_interval=0.05))
+        messages = []
+        _loguru_logger.add(messages.append, format="{message}")
+        deadline = time.monotonic() + 2
+        while not messages and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        self.assertTrue(messages[0].startswith("Logging stats: emitted=0, filtered=0"))
+
+    def test_flight_recorder(self):
+        config = LoggerConfigStructure(
+            level=LogLevelEnum.INFO, console=False, file=True, dirname=self.dirname, flight_recorder=True,
+            flight_recorder_records=4, flight_recorder_level=LogLevelEnum.DEBUG,
+        )
+        LogManager.configure(config)
+        logger = LogManager.get_logger()
+        for i in range(6):
+            logger.debug("detail %d", i)
+        logger.trace("not recorded")
+
+        # Readable from the file while the process is still writing to the mapping
+        records = read_ring_buffer(os.path.join(self.dirname, "fairyland-logger.flight"))
+        self.assertEqual([message.split(" - ")[1] for _, _, _, message in records], [f"detail {i}" for i in range(2, 6)])
+        self.assertTrue(records[0][3].startswith("test.test_sinks:test_flight_recorder:"))
+
+        logger.error("boom")
+        try:
+            1 / 0
+        except ZeroDivisionError:
+            with contextlib.redirect_stderr(io.StringIO()):
+                sys.excepthook(*sys.exc_info())
+        LogManager.get_registry().flush()
+
+        dumps = sorted(glob.glob(os.path.join(self.dirname, "*.dump.log")))
+        self.assertEqual(len(dumps), 2)
+        with open(dumps[0], encoding="UTF-8") as stream:
+            lines = stream.read().splitlines()
+        self.assertEqual(lines[0], "# Flight recorder dump (ERROR record): last 4 records")
+        self.assertIn("| ERROR    |", lines[-1])
+        with open(dumps[1], encoding="UTF-8") as stream:
+            self.assertIn("ZeroDivisionError", stream.read())
+        with open(os.path.join(self.dirname, "fairyland-logger.log"), encoding="UTF-8") as stream:
+            self.assertNotIn("detail", stream.read())
+
+    def test_binary_round_trip(self):
+        config = LoggerConfigStructure(level=LogLevelEnum.INFO, console=False, file=True, binary=True, dirname=self.dirname, rotation="2 KB")
+        LogManager.configure(config)
+        lines = []
+        _loguru_logger.add(lambda m: lines.append(m.rstrip("\n")), format=config.pattern)
+        logger = LogManager.get_logger("svc.bin")
+        for i in range(40):
+            logger.info("request %s took %.2f ms", f"r{i}", i * 1.5, user="bob", attempt=i)
+        logger.warning("plain message", payload=[1, 2])
+        LogManager.get_registry().flush()
+
+        segments = sorted(glob.glob(os.path.join(self.dirname, "fairyland-logger.*flb")), key=os.path.getmtime)
+        self.assertGreater(len(segments), 1)
+        records = []
+        for segment in segments:
+            with open(segment, "rb") as stream:
+                records.extend(iter_records(stream))
+
+        self.assertEqual([render_pattern(config.pattern, record) for record in records], lines)
+        self.assertEqual(records[3]["extra"], {"logger_name": "svc.bin", "user": "bob", "attempt": 3})
+        self.assertEqual(records[-1]["extra"]["payload"], "[1, 2]")
+        self.assertLess(sum(map(os.path.getsize, segments)), sum(len(line) + 1 for line in lines))
+
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            self.assertEqual(cli_main(["decode", "--format", "json", segments[-1]]), 0)
+        document = json.loads(output.getvalue().splitlines()[-1])
+        self.assertEqual((document["level"], document["message"], document["payload"]), ("WARNING", "plain message", "[1, 2]"))
+
+    def test_sidecar_index_and_query(self):
+        from fairylandlogger._sinks import _compressor
+
+        config = LoggerConfigStructure(
+            level=LogLevelEnum.DEBUG, console=False, file=True, dirname=self.dirname, rotation="4 KB", compression="gzip", index=True,
+        )
+        LogManager.configure(config)
+        db, web = LogManager.get_logger("app.db"), LogManager.get_logger("app.web")
+        for i in range(120):
+            (db if i % 2 else web).debug("record %s", i)
+            if i % 40 == 0:
+                db.error("failure %s", i)
+        LogManager.get_registry().flush()
+        _compressor.join()
+        path = os.path.join(self.dirname, "fairyland-logger.log")
+
+        segments = glob.glob(os.path.join(self.dirname, "fairyland-logger.*.log.gz"))
+        self.assertGreater(len(segments), 1)
+        for segment in segments:
+            with gzip.open(segment, "rb") as stream:
+                data = stream.read()
+            blocks = read_index(segment)
+            self.assertEqual(blocks[-1].offset + blocks[-1].length, len(data))
+            self.assertEqual(sum(sum(block.counts) for block in blocks), data.count(b"\n"))
+
+        errors = list(query(path, level="ERROR"))
+        self.assertEqual([line.rsplit(" - ", 1)[1] for line in errors], [f"[app.db] failure {i}" for i in (0, 40, 80)])
+        self.assertEqual(len(list(query(path, logger="app"))), 123)
+        self.assertEqual(len(list(query(path, logger="app.web", level="DEBUG"))), 60)
+        self.assertEqual(list(query(path, since=time.time() + 60)), [])
+
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            self.assertEqual(cli_main(["query", path, "--since", "5m", "--level", "error", "--logger", "app.db"]), 0)
+        self.assertEqual(output.getvalue().splitlines(), errors)
+
+    def test_incremental_reconfigure(self):
+        base = dict(console=False, file=True, dirname=self.dirname, buffered=True, flush_interval=0.0)
+        LogManager.configure(LoggerConfigStructure(level=LogLevelEnum.INFO, **base))
+        registry = LogManager.get_registry()
+        logger = LogManager.get_logger("svc.reload")
+        logger.info("before")
+        logger.debug("hidden")
+        file_appender = registry.appenders[0]
+        sink = file_appender._sink
+        logger_files = registry._logger_file_router
+
+        LogManager.configure(LoggerConfigStructure(level=LogLevelEnum.DEBUG, json=True, **base))
+        logger.debug("after")
+        self.assertIs(registry.appenders[0], file_appender)
+        self.assertIs(file_appender._sink, sink)
+        self.assertIs(registry._logger_file_router, logger_files)
+        self.assertEqual(len(registry.appenders), 2)
+        file_appender._queue.join()
+        self.assertEqual(len(sink._buffer), 2)  # Still buffered: the reconfigure drained and reopened nothing
+
+        handler_id = registry._logger_file_handler_id
+        opened_after = []
+        add_sink = type(file_appender).add_sink
+
+        def replacing_add_sink(appender):
+            opened_after.append(file_appender.handler_id)
+            add_sink(appender)
+
+        with mock.patch.object(type(file_appender), "add_sink", replacing_add_sink):
+            LogManager.configure(LoggerConfigStructure(level=LogLevelEnum.DEBUG, rotation="1 MB", **base))
+        self.assertEqual(opened_after, [None])  # The old appender of the same file was removed first
+        self.assertIsNot(registry.appenders[0], file_appender)
+        self.assertIsNot(registry._logger_file_router, logger_files)
+        self.assertEqual(registry._logger_file_handler_id, handler_id)  # Same handler, its queue moved to new files
+        logger.debug("rotated")
+        registry.flush()
+
+        for name in ("fairyland-logger.log", "svc.reload.log"):
+            with open(os.path.join(self.dirname, name), encoding="UTF-8") as stream:
+                messages = [line.rsplit(" - ", 1)[1] for line in stream.read().splitlines()]
+            self.assertEqual(messages, ["[svc.reload] before", "[svc.reload] after", "[svc.reload] rotated"])
+
+        # Replacing the logger-file handler while another thread logs loses no record
+        busy = LogManager.get_logger("svc.busy", dirname="busy")
+        stop = threading.Event()
+        sent = []
+
+        def emit():
+            while not stop.is_set():
+                busy.info("n %d", len(sent))
+                sent.append(None)
+
+        thread = threading.Thread(target=emit)
+        thread.start()
+        for rotation in ("2 MB", "3 MB", "4 MB", "5 MB"):
+            LogManager.configure(LoggerConfigStructure(level=LogLevelEnum.DEBUG, rotation=rotation, **base))
+            time.sleep(0.02)
+        stop.set()
+        thread.join()
+        registry.flush()
+        with open(os.path.join(self.dirname, "busy", "svc.busy.log"), encoding="UTF-8") as stream:
+            self.assertEqual(len(stream.read().splitlines()), len(sent))
+
+    def test_config_watcher(self):
+        path = os.path.join(self.dirname, "fairyland-logger.yaml")
+        with open(path, "w", encoding="UTF-8") as stream:
+            stream.write("fairyland:\n  logger:\n    level: INFO\n    console: false\n")
+        LogManager.configure(LoggerConfigStructure.from_yaml(path))
+        logger = LogManager.get_logger("svc.watch")
+        self.assertFalse(logger.is_enabled("DEBUG"))
+
+        applied = []
+        watcher = ConfigWatcher(path, 60.0, lambda config: (applied.append(config), LogManager.configure(config)))
+        self.assertFalse(watcher.check())
+        with open(path, "w", encoding="UTF-8") as stream:
+            stream.write("fairyland:\n  logger:\n    level: [broken\n")
+        with contextlib.redirect_stderr(io.StringIO()) as errors:
+            self.assertFalse(watcher.check())
+        self.assertIn("ignoring invalid config", errors.getvalue())
+
+        with open(path, "w", encoding="UTF-8") as stream:
+            stream.write("fairyland:\n  logger:\n    level: DEBUG\n    console: false\n    watch_interval: 0.5\n")
+        self.assertTrue(watcher.check())
+        self.assertEqual((len(applied), watcher.interval), (1, 0.5))
+        self.assertTrue(logger.is_enabled("DEBUG"))
+
+    def test_console_batches_plain_stderr(self):
+        errors = io.StringIO()
+        with contextlib.redirect_stderr(errors):
+            LogManager.configure(LoggerConfigStructure(
+                level=LogLevelEnum.INFO, banner=False, console_stream="stderr", console_flush_interval=60.0,
+            ))
+            console = LogManager.get_registry().appenders[0]
+            logger = LogManager.get_logger("svc.console")
+            logger.info("queued")
+            self.assertEqual(errors.getvalue(), "")  # Batched until the interval passes or a warning arrives
+            logger.warning("prompt")
+            lines = errors.getvalue().splitlines()
+            logger.info("tail")
+            console.flush()
+
+        self.assertEqual([line.rsplit(" - ", 1)[1] for line in lines], ["[svc.console] queued", "[svc.console] prompt"])
+        self.assertTrue(errors.getvalue().endswith("[svc.console] tail\n"))
+        self.assertNotIn("\x1b[", errors.getvalue())  # Not a terminal: no colors
+        self.assertEqual(console.stats()["bytes_written"], len(errors.getvalue()))
+
+    def test_exception_rendering(self):
+        LogManager.configure(LoggerConfigStructure(
+            level=LogLevelEnum.INFO, console=False, file=True, json=True, dirname=self.dirname,
+            diagnose=True, diagnose_level=LogLevelEnum.CRITICAL, appender_tracebacks={"json": {"fingerprint": False}},
+        ))
+        logger = LogManager.get_logger("svc.errors")
+
+        def fail(token):
+            raise KeyError(token)
+
+        for token in ("first", "second", "third"):
+            try:
+                fail(token)
+            except KeyError:
+                logger.exception("lookup failed", level="CRITICAL" if token == "third" else LogLevelEnum.ERROR)
+        logger.exception("nothing raised")
+        LogManager.get_registry().flush()
+
+        with open(os.path.join(self.dirname, "fairyland-logger.log"), encoding="UTF-8") as stream:
+            text = stream.read()
+        fingerprint = text.split("[traceback ", 1)[1].split("]", 1)[0]
+        self.assertIn(f"KeyError: 'second' [traceback {fingerprint} logged earlier]", text)
+        # diagnose only applies from CRITICAL on, so the third record renders the stack again with the values
+        self.assertEqual(text.count("Traceback (most recent call last)"), 2)
+        self.assertIn("token = 'third'", text)
+        self.assertNotIn("token = 'first'", text)
+        self.assertTrue(text.rstrip("\n").endswith("[svc.errors] nothing raised"))
+
+        with open(os.path.join(self.dirname, "fairyland-logger-json.log"), encoding="UTF-8") as stream:
+            documents = [json.loads(line) for line in stream]
+        self.assertEqual(
+            [d["exception"].splitlines()[-1] for d in documents[:3]], ["KeyError: 'first'", "KeyError: 'second'", "KeyError: 'third'"],
+        )
+        self.assertNotIn("fairy_exception", documents[0])
+        self.assertNotIn("exception", documents[3])
+
+    def test_network_appender_spills_while_receiver_is_down(self):
+        server = socket.socket()
+        server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        server.bind(("127.0.0.1", 0))
+        port = server.getsockname()[1]
+        server.close()  # Nothing listens yet: records go to the spill file
+
+        LogManager.configure(LoggerConfigStructure(
+            level=LogLevelEnum.INFO, console=False, dirname=self.dirname, network=NetworkProtocolEnum.TCP,
+            network_port=port, network_flush_interval=0.05,
+        ))
+        logger = LogManager.get_logger("svc.net")
+        for i in range(3):
+            logger.info("while down {}", i, request_id=f"r{i}")
+        registry = LogManager.get_registry()
+        registry.flush()
+        stats = registry.stats()["appenders"]["NetworkLoggerAppender"]
+        self.assertEqual((stats["spilled"], stats["connected"]), (3, False))
+        spill_path = os.path.join(self.dirname, "fairyland-logger.spill")
+        self.assertTrue(os.path.exists(spill_path))
+
+        server = socket.socket()
+        server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        server.bind(("127.0.0.1", port))
+        server.listen(1)
+        server.settimeout(10)
+        received = []
+
+        def receive():
+            connection, _ = server.accept()
+            with connection, connection.makefile("rb") as stream:
+                for line in stream:
+                    received.append(json.loads(line))
+
+        receiver = threading.Thread(target=receive, daemon=True)
+        receiver.start()
+        logger.info("back up")
+        deadline = time.monotonic() + 10
+        while len(received) < 4 and time.monotonic() < deadline:
+            registry.flush()
+            time.sleep(0.05)
+        # Spilled records are sent first, in order, then the newer ones over the same connection
+        self.assertEqual([d["message"] for d in received], [text for text in ("while down 0", "while down 1", "while down 2", "back up")])
+        self.assertEqual(received[1]["request_id"], "r1")
+        self.assertFalse(os.path.exists(spill_path))
+        self.assertEqual(registry.stats()["appenders"]["NetworkLoggerAppender"]["reconnects"], 1)
+        LogManager.reset()
+        receiver.join(5)
+        server.close()
+
+    def test_network_appender_syslog_over_udp(self):
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as server:
+            server.bind(("127.0.0.1", 0))
+            server.settimeout(10)
+            LogManager.configure(LoggerConfigStructure(
+                level=LogLevelEnum.INFO, console=False, dirname=self.dirname, network=NetworkProtocolEnum.UDP,
+                network_port=server.getsockname()[1], network_format=NetworkFormatEnum.SYSLOG, network_app_name="billing",
+                network_flush_interval=0.05,
+            ))
+            logger = LogManager.get_logger("svc.udp")
+            logger.warning("disk almost full", mount='/var "data"')
+            LogManager.get_registry().flush()
+            message = server.recv(65535).decode("UTF-8")
+        self.assertTrue(message.startswith("<12>1 "))  # facility user (1), severity warning (4)
+        self.assertIn(" billing ", message)
+        self.assertIn('[fairy@32473 logger_name="svc.udp" mount="/var \\"data\\""] ', message)
+        self.assertTrue(message.endswith('""] disk almost full'))
+
+    def test_network_sink_failures(self):
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as server:
+            server.bind(("127.0.0.1", 0))
+            server.settimeout(0.5)
+            port = server.getsockname()[1]
+
+            # Oversized datagrams are dropped, or cut with ``truncate``, instead of failing the batch
+            for truncate, expected in ((False, [b"small"]), (True, [b"x" * 100, b"small"])):
+                sink = NetworkSink("127.0.0.1", port, "udp", flush_interval=0.05, max_datagram=100, truncate=truncate)
+                sink.write_bytes(b"x" * 200)
+                sink.write_bytes(b"small")
+                sink.drain()
+                self.assertEqual([server.recv(65535) for _ in expected], expected)
+                self.assertEqual((sink.dropped, sink.truncated), (0, 1) if truncate else (1, 0))
+                sink.stop()
+
+            # A replay interrupted after the first record keeps only the records not sent yet
+            spill_path = os.path.join(self.dirname, "net.spill")
+            sink = NetworkSink("127.0.0.1", port, "udp", spill_path=spill_path)
+            sink._spill([b"one", b"two", b"three"])
+            self.assertTrue(sink._connect())
+            real = sink._sock
+            calls = []
+
+            def flaky_sendto(data, address):
+                calls.append(data)
+                if len(calls) == 2:
+                    raise OSError("network unreachable")
+                return real.sendto(data, address)
+
+            sink._sock = mock.Mock(sendto=flaky_sendto, close=real.close)
+            with mock.patch("fairylandlogger._network._REPLAY_BATCH", 2):  # The file is read two records at a time
+                sink._ship([b"four"])
+                self.assertEqual(server.recv(65535), b"one")
+                sink._next_attempt = 0
+                sink._ship([])
+            self.assertEqual([server.recv(65535) for _ in range(3)], [b"two", b"three", b"four"])
+            self.assertFalse(os.path.exists(spill_path))
+
+            # A forked child spills to a file of its own, starting empty
+            sink._spill([b"parent"])
+            with mock.patch("os.getpid", return_value=4321):
+                sink._after_fork_in_child()
+            self.assertEqual((sink.spill_path, sink._spill_bytes), (f"{spill_path}.4321", 0))
+            sink._spill([b"child"])
+            self.assertEqual(os.path.getsize(spill_path), 4 + len(b"parent"))
+            sink.stop()
+
+            # Unexpected errors are reported and the sender thread keeps running
+            sink = NetworkSink("127.0.0.1", port, "udp", flush_interval=0.05)
+            errors = io.StringIO()
+            with contextlib.redirect_stderr(errors), mock.patch.object(sink, "_send", side_effect=RuntimeError("bug")):
+                sink.write_bytes(b"lost")
+                sink.drain()
+            sink.write_bytes(b"after")
+            sink.drain()
+            self.assertEqual(server.recv(65535), b"after")
+            self.assertEqual(sink.dropped, 1)
+            self.assertIn("RuntimeError('bug')", errors.getvalue())
+            sink.stop()
+
+
+if __name__ == "__main__":
+    unittest.main()